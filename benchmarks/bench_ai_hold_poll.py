@@ -0,0 +1,112 @@
+"""Voice-agent AI turns under load: synchronous webhook vs hold-and-poll.
+
+CALLERS callers finish speaking at the same moment and Twilio posts /ai for
+each. Requests are served by WORKER_THREADS threads, like the production
+gunicorn worker. Gemini is replaced by a stub that takes MODEL_SECONDS
+(+/- 20%). Twilio abandons a webhook that has not answered within
+TWILIO_TIMEOUT_SECONDS, which drops the caller's turn.
+
+  sync  - /ai holds its thread for the whole model call
+  async - /ai answers with a hold prompt; the caller then polls /ai_result,
+          pausing POLL_SECONDS between polls as <Pause> would
+
+Reported per turn: time until the caller hears the reply, webhook thread time
+spent on it, and turns dropped by the Twilio timeout.
+
+Usage: python benchmarks/bench_ai_hold_poll.py [CALLERS] [MODEL_SECONDS]
+"""
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "voice-agent"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+WORKER_THREADS = 8
+TWILIO_TIMEOUT_SECONDS = 15.0
+
+
+def stub_model(model_seconds):
+    rng = random.Random(1)
+    lock = threading.Lock()
+
+    def generate_content(**kwargs):
+        with lock:
+            seconds = model_seconds * rng.uniform(0.8, 1.2)
+        time.sleep(seconds)
+        return MagicMock(text="We charge 35 dollars per hour.")
+
+    return generate_content
+
+
+def run(mode, callers, model_seconds):
+    import main as voice_main
+    voice_main.AI_TURN_MODE = mode
+    voice_main.ai_turns = voice_main.AITurns()
+    app = voice_main.app.test_client()
+    threads = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+
+    def webhook(path, data=None):
+        # Submitted like a Twilio request; time spent queued for a thread counts toward the timeout.
+        submitted = time.perf_counter()
+        holding = []
+
+        def serve():
+            start = time.perf_counter()
+            response = app.post(path, data=data)
+            holding.append(time.perf_counter() - start)
+            return response
+
+        response = threads.submit(serve).result()
+        return response.data.decode(), time.perf_counter() - submitted, holding[0]
+
+    def caller(i):
+        start = time.perf_counter()
+        body, waited, held = webhook("/ai", {"From": f"+1555{i:07d}", "RecordingUrl": "https://example/rec"})
+        busy = held
+        while waited <= TWILIO_TIMEOUT_SECONDS:
+            if "We charge" in body:
+                return time.perf_counter() - start, busy, False
+            result = re.search(r"<Redirect>(/ai_result\?turn=[\w-]+)</Redirect>", body)
+            if result is None:
+                break
+            if "<Pause" in body:
+                time.sleep(voice_main.AI_RESULT_POLL_SECONDS)
+            body, waited, held = webhook(result.group(1))
+            busy += held
+        return time.perf_counter() - start, busy, True
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(caller, range(callers)))
+    threads.shutdown()
+    answered = sorted(seconds for seconds, _, dropped in results if not dropped)
+    return {
+        "dropped": sum(dropped for _, _, dropped in results),
+        "p50": statistics.median(answered) if answered else float("nan"),
+        "max": answered[-1] if answered else float("nan"),
+        "busy_ms": statistics.mean(busy for _, busy, _ in results) * 1000,
+    }
+
+
+def main(callers=24, model_seconds=5.0):
+    with patch("google.genai.Client") as genai_client:
+        genai_client.return_value.models.generate_content.side_effect = stub_model(model_seconds)
+        import main as voice_main
+        with patch.object(voice_main.recordings, "fetch", return_value=b"audio"):
+            print(f"{callers} callers at once, {WORKER_THREADS} webhook threads, model ~{model_seconds:.0f} s, "
+                  f"Twilio timeout {TWILIO_TIMEOUT_SECONDS:.0f} s")
+            print(f"{'mode':>6} {'dropped':>8} {'reply p50 (s)':>14} {'reply max (s)':>14} {'thread ms/turn':>15}")
+            for mode in ("sync", "async"):
+                r = run(mode, callers, model_seconds)
+                print(f"{mode:>6} {r['dropped']:>8} {r['p50']:>14.1f} {r['max']:>14.1f} {r['busy_ms']:>15.1f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 24, float(args[1]) if len(args) > 1 else 5.0)
@@ -0,0 +1,58 @@
+"""Operations API response cache: uncached vs cache hit vs 304 revalidation.
+
+Builds a synthetic database with the query-path indexes (rollup hidden, so
+misses pay for the on-demand aggregates), then times each endpoint through
+the Flask test client with the cache disabled, warm, and with If-None-Match.
+
+Usage: python benchmarks/bench_api_cache.py [ROWS]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_api_queries import ENDPOINTS, build_db, query_path_indexes  # noqa: E402
+from bench_api_queries import api  # noqa: E402
+
+
+def time_requests(client, url, repeat, headers=None):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), response
+
+
+def main(rows=1_000_000, repeat=20):
+    client = api.app.test_client()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_cache.db")
+        conn = build_db(path, rows)
+        for statement in query_path_indexes():
+            conn.execute(statement)
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+        api.DATABASE_NAME = path
+
+        print(f"{rows:,} rows, median of {repeat} requests")
+        print(f"{'endpoint':>15} {'uncached (ms)':>14} {'hit (ms)':>9} {'304 (ms)':>9} {'body bytes':>11}")
+        for name, url in ENDPOINTS:
+            api.RESPONSE_CACHE_TTL_SECONDS = 0
+            uncached, _ = time_requests(client, url, repeat)
+            api.RESPONSE_CACHE_TTL_SECONDS = 300
+            api.clear_response_cache()
+            hit, response = time_requests(client, url, repeat)
+            assert response.headers["X-Cache"] == "HIT"
+            revalidated, not_modified = time_requests(client, url, repeat, {"If-None-Match": response.headers["ETag"]})
+            assert not_modified.status_code == 304
+            print(f"{name:>15} {uncached:>14.2f} {hit:>9.2f} {revalidated:>9.2f} {len(response.data):>11}")
+        api.close_db_pool()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
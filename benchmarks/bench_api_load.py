@@ -0,0 +1,138 @@
+"""Operations API load test while ingestion writes concurrently.
+
+Runs the real Flask app on a local threaded server and hammers both
+endpoints from client threads, while a writer thread keeps committing
+batches of shipment upserts (firing the partner_metrics triggers) the way
+data_ingestion does. Compares:
+
+  legacy  - rollback journal, a new sqlite3 connection per request
+  pooled  - WAL journal, pooled read-only connections
+  cached  - pooled, plus the response cache; every writer commit bumps
+            data_version, so cached responses are invalidated ~20x a second
+
+Usage: python benchmarks/bench_api_load.py [SECONDS] [CLIENT_THREADS]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+
+import data_ingestion as di  # noqa: E402
+import operations_api as api  # noqa: E402
+from bench_api_queries import SYNTHETIC_ROWS_SQL  # noqa: E402
+
+ROWS = 200_000
+WRITE_BATCH = 5_000
+URLS = ["/api/logistics/daily_summary",
+        "/api/partner_performance/status?partner_contract=Hertz-Local",
+        "/api/partner_performance/batch_status"]
+
+
+class QuietHandler(api.KeepAliveRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def legacy_get_db_connection():
+    conn = sqlite3.connect(api.DATABASE_NAME)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def build_db(path, journal_mode):
+    di.DATABASE_NAME = path
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    di.create_db_tables(conn)
+    conn.execute(SYNTHETIC_ROWS_SQL, (ROWS,))
+    conn.commit()
+    conn.close()
+
+
+def writer(path, journal_mode, stop, commits):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    i = 0
+    while not stop.is_set():
+        with conn:
+            conn.execute("UPDATE daily_shipments SET shipment_value_usd = shipment_value_usd + 1 "
+                         "WHERE id BETWEEN ? AND ?", (i, i + WRITE_BATCH))
+            conn.execute("UPDATE data_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP")
+        commits.append(time.perf_counter())
+        i = (i + WRITE_BATCH) % ROWS
+        time.sleep(0.05)
+    conn.close()
+
+
+def client(base_url, stop, latencies, errors):
+    session = requests.Session()
+    n = 0
+    while not stop.is_set():
+        url = base_url + URLS[n % len(URLS)]
+        n += 1
+        start = time.perf_counter()
+        try:
+            response = session.get(url, timeout=30)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            errors.append(url)
+
+
+def run(mode, seconds, threads):
+    journal_mode = "DELETE" if mode == "legacy" else "WAL"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load.db")
+        build_db(path, journal_mode)
+        api.DATABASE_NAME = path
+        api.close_db_pool()
+        api.clear_response_cache()
+        api.RESPONSE_CACHE_TTL_SECONDS = 300 if mode == "cached" else 0
+        original = api.get_db_connection
+        if mode == "legacy":
+            api.get_db_connection = legacy_get_db_connection
+        server = make_server("127.0.0.1", 0, api.app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        stop = threading.Event()
+        latencies, errors, commits = [], [], []
+        workers = [threading.Thread(target=writer, args=(path, journal_mode, stop, commits))]
+        workers += [threading.Thread(target=client, args=(base_url, stop, latencies, errors)) for _ in range(threads)]
+        for w in workers:
+            w.start()
+        time.sleep(seconds)
+        stop.set()
+        for w in workers:
+            w.join()
+        server.shutdown()
+        api.get_db_connection = original
+        api.close_db_pool()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else float("nan")
+    print(f"{mode:>7} {len(latencies) / seconds:>9.0f} {statistics.median(latencies) if latencies else float('nan'):>9.2f} "
+          f"{p95:>9.2f} {len(errors):>7} {len(commits):>8}")
+
+
+def main(seconds=10, threads=8):
+    print(f"{ROWS:,} rows, {threads} client threads, {seconds}s per mode, writer commits every ~50 ms")
+    print(f"{'mode':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7} {'commits':>8}")
+    for mode in ("legacy", "pooled", "cached"):
+        run(mode, seconds, threads)
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,106 @@
+"""Operations API endpoint latency: on-demand SQL without and with the
+query-path indexes, and answered from the partner_metrics rollup.
+
+Builds a synthetic daily_shipments table of each size, then times both
+endpoints through the Flask test client. The rollup is hidden (renamed)
+for the on-demand measurements.
+
+Usage: python benchmarks/bench_api_queries.py [ROWS ...]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+LOGISTICS_DIR = os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard")
+sys.path.insert(0, LOGISTICS_DIR)
+
+import data_ingestion as di  # noqa: E402
+import operations_api as api  # noqa: E402
+
+ENDPOINTS = [
+    ("daily_summary", "/api/logistics/daily_summary"),
+    ("partner_status", "/api/partner_performance/status?partner_contract=Hertz-Local"),
+]
+QUERY_PATH_INDEX_MIGRATION = 3
+
+SYNTHETIC_ROWS_SQL = """
+INSERT INTO daily_shipments (shipment_id, log_date, partner_contract, delivery_status,
+                             on_time_status_calculated, fuel_efficiency_mpg, shipment_value_usd)
+WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < ? - 1)
+SELECT 'BENCH-' || i,
+       date('2020-01-01', '+' || (i % 1800) || ' days'),
+       CASE i % 6 WHEN 0 THEN 'Amazon-Prime' WHEN 1 THEN 'Hertz-Local' WHEN 2 THEN 'Uhaul-Interstate'
+                  WHEN 3 THEN 'Budget-Airport' WHEN 4 THEN 'Ryder-Logistics' ELSE 'Enterprise-Corp' END,
+       CASE i % 5 WHEN 0 THEN 'In-Transit' WHEN 1 THEN 'Delayed' ELSE 'Delivered' END,
+       CASE i % 5 WHEN 0 THEN 'Pending' WHEN 1 THEN 'Pending' WHEN 2 THEN 'Late' ELSE 'On-Time' END,
+       5 + (i % 25) * 0.5,
+       100 + (i % 997) * 12.5
+FROM seq
+"""
+
+
+def query_path_indexes():
+    for version, _, statements in di.SCHEMA_MIGRATIONS:
+        if version == QUERY_PATH_INDEX_MIGRATION:
+            return statements
+    raise RuntimeError("query-path index migration not found")
+
+
+def build_db(path, rows):
+    conn = sqlite3.connect(path)
+    di.create_db_tables(conn)
+    objects = conn.execute("SELECT type, name FROM sqlite_master "
+                           "WHERE (type = 'index' AND name LIKE 'idx_%') OR type = 'trigger'").fetchall()
+    for kind, name in objects:
+        conn.execute(f"DROP {kind.upper()} {name}")
+    conn.execute(SYNTHETIC_ROWS_SQL, (rows,))
+    di.rebuild_metrics_rollups(conn)
+    conn.execute("ALTER TABLE partner_metrics RENAME TO partner_metrics_hidden")
+    conn.executemany(
+        "INSERT INTO partner_tasks_status (partner_contract, task_source_id, simulated_service_health) "
+        "VALUES (?, ?, ?)",
+        [(p, i, "OK" if i % 2 else "Action Required") for p in di.PARTNER_ID_TO_NAME_MAP.values() for i in range(5)],
+    )
+    conn.commit()
+    return conn
+
+
+def time_endpoint(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.data
+    return statistics.median(samples)
+
+
+def main(sizes, repeat=5):
+    client = api.app.test_client()
+    api.RESPONSE_CACHE_TTL_SECONDS = 0  # time the queries, not the response cache
+    print(f"{'rows':>11} {'endpoint':>15} {'no index (ms)':>14} {'indexed (ms)':>13} {'rollup (ms)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"bench_{rows}.db")
+            conn = build_db(path, rows)
+            api.DATABASE_NAME = path
+            baseline = {name: time_endpoint(client, url, repeat) for name, url in ENDPOINTS}
+            for statement in query_path_indexes():
+                conn.execute(statement)
+            conn.execute("ANALYZE")
+            conn.commit()
+            indexed = {name: time_endpoint(client, url, repeat) for name, url in ENDPOINTS}
+            conn.execute("ALTER TABLE partner_metrics_hidden RENAME TO partner_metrics")
+            conn.commit()
+            for name, url in ENDPOINTS:
+                rollup = time_endpoint(client, url, repeat)
+                print(f"{rows:>11,} {name:>15} {baseline[name]:>14.2f} {indexed[name]:>13.2f} {rollup:>12.2f}")
+            conn.close()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 1_000_000, 10_000_000])
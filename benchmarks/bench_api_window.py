@@ -0,0 +1,70 @@
+"""Windowed daily_summary latency as history grows.
+
+Builds databases holding the same number of shipments per day but a week,
+a year and five years of history, then times a one-day and a seven-day
+window at day granularity (daily_metrics rollup, and on-demand SQL with the
+rollup hidden) and a one-day window at hour granularity. Response caching
+is disabled so every request runs its queries.
+
+Usage: python benchmarks/bench_api_window.py [ROWS_PER_DAY]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_api_queries import api, di, time_endpoint  # noqa: E402
+
+HISTORY_DAYS = [7, 365, 5 * 365]
+HISTORY_ROWS_SQL = """
+INSERT INTO daily_shipments (shipment_id, log_date, actual_departure_datetime, partner_contract, delivery_status,
+                             on_time_status_calculated, fuel_efficiency_mpg, shipment_value_usd)
+WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < :rows - 1)
+SELECT 'BENCH-' || i,
+       date('2020-01-01', '+' || (i / :per_day) || ' days'),
+       date('2020-01-01', '+' || (i / :per_day) || ' days') || 'T' || printf('%02d', i % 24) || ':15:00',
+       CASE i % 3 WHEN 0 THEN 'Amazon-Prime' WHEN 1 THEN 'Hertz-Local' ELSE 'Budget-Airport' END,
+       CASE i % 5 WHEN 0 THEN 'In-Transit' WHEN 1 THEN 'Delayed' ELSE 'Delivered' END,
+       CASE i % 5 WHEN 0 THEN 'Pending' WHEN 1 THEN 'Pending' WHEN 2 THEN 'Late' ELSE 'On-Time' END,
+       5 + (i % 25) * 0.5,
+       100 + (i % 997) * 12.5
+FROM seq
+"""
+
+
+def main(per_day=500, repeat=20):
+    client = api.app.test_client()
+    api.RESPONSE_CACHE_TTL_SECONDS = 0
+    print(f"{per_day} shipments per day, median of {repeat} requests (ms)")
+    print(f"{'history':>8} {'rows':>10} {'1 day rollup':>13} {'1 day on-demand':>16} "
+          f"{'7 days rollup':>14} {'1 day hourly':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for days in HISTORY_DAYS:
+            path = os.path.join(tmp, f"window_{days}.db")
+            conn = sqlite3.connect(path)
+            di.create_db_tables(conn)
+            conn.execute(HISTORY_ROWS_SQL, {"rows": days * per_day, "per_day": per_day})
+            conn.execute("ANALYZE")
+            conn.commit()
+            api.DATABASE_NAME = path
+            api.close_db_pool()
+
+            last_day = conn.execute("SELECT MAX(log_date) FROM daily_shipments").fetchone()[0]
+            url = f"/api/logistics/daily_summary?from={last_day}&to={last_day}"
+            week_url = f"/api/logistics/daily_summary?to={last_day}"
+            rollup = time_endpoint(client, url, repeat)
+            week = time_endpoint(client, week_url, repeat)
+            hourly = time_endpoint(client, url + "&granularity=hour", repeat)
+            conn.execute("ALTER TABLE daily_metrics RENAME TO daily_metrics_hidden")
+            conn.commit()
+            api.close_db_pool()
+            on_demand = time_endpoint(client, url, repeat)
+            print(f"{days:>7}d {days * per_day:>10,} {rollup:>13.2f} {on_demand:>16.2f} {week:>14.2f} {hourly:>13.2f}")
+            conn.close()
+            api.close_db_pool()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
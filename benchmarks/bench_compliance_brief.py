@@ -0,0 +1,95 @@
+"""Compliance brief latency and model calls: uncached vs the SQLite LLM cache,
+then startup warming.
+
+A fake Gemini client sleeps for LATENCY seconds per call, standing in for
+gemini-2.5-flash. Each partner's brief is generated CLICKS times, as repeated
+button clicks would: uncached every click calls the model, cached only the
+first click per partner does.
+
+Warming: the time until every partner's brief is ready, generating them one
+after another vs the background warmer, and how long a button click blocks
+while the warm-up is still running.
+
+Usage: python benchmarks/bench_compliance_brief.py [LATENCY_SECONDS] [CLICKS]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import compliance_dashboard as compliance  # noqa: E402
+from brief_warmer import BriefWarmer  # noqa: E402
+from llm_cache import LLMResponseCache  # noqa: E402
+
+
+class SlowModels:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, model, contents):
+        self.calls += 1
+        time.sleep(self.latency)
+        return type("Response", (), {"text": "- Report incidents within 1 hour."})()
+
+
+class NoCache:
+    def get(self, model, prompt, contract_text):
+        return None
+
+    def put(self, model, prompt, contract_text, response_text):
+        pass
+
+
+def main(latency=1.5, clicks=5):
+    compliance.GEMINI_READY = True
+    print(f"model latency {latency * 1000:.0f} ms, {clicks} clicks per partner, "
+          f"{len(compliance.AVAILABLE_PARTNERS_LIST)} partners")
+    print(f"{'mode':>9} {'model calls':>12} {'first (ms)':>11} {'repeat p50 (ms)':>16} {'total (s)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, cache in (("uncached", NoCache()),
+                            ("cached", LLMResponseCache(os.path.join(tmp, "llm.db")))):
+            models = SlowModels(latency)
+            compliance.client = type("Client", (), {"models": models})()
+            compliance.brief_cache = cache
+            first, repeats = [], []
+            start_all = time.perf_counter()
+            for partner in compliance.AVAILABLE_PARTNERS_LIST:
+                for click in range(clicks):
+                    start = time.perf_counter()
+                    compliance.generate_compliance_brief(partner, compliance.SIMULATED_CONTRACTS[partner])
+                    (repeats if click else first).append((time.perf_counter() - start) * 1000)
+            total = time.perf_counter() - start_all
+            print(f"{name:>9} {models.calls:>12} {statistics.median(first):>11.1f} "
+                  f"{statistics.median(repeats):>16.2f} {total:>10.2f}")
+            if isinstance(cache, LLMResponseCache):
+                cache.close()
+
+    compliance.brief_cache = NoCache()
+    compliance.client = type("Client", (), {"models": SlowModels(latency)})()
+    start = time.perf_counter()
+    for partner, contract in compliance.SIMULATED_CONTRACTS.items():
+        compliance.generate_compliance_brief(partner, contract)
+    sequential = time.perf_counter() - start
+
+    compliance.brief_warmer = BriefWarmer(compliance.generate_compliance_brief)
+    start = time.perf_counter()
+    compliance.brief_warmer.warm(compliance.SIMULATED_CONTRACTS)
+    click_start = time.perf_counter()
+    compliance.get_partner_compliance_brief_for_dashboard(compliance.AVAILABLE_PARTNERS_LIST[-1])
+    click_ms = (time.perf_counter() - click_start) * 1000
+    compliance.brief_warmer.wait()
+    warmed = time.perf_counter() - start
+    print()
+    print(f"{'warm-up':>11} {'all ready (s)':>14} {'click during warm-up (ms)':>26}")
+    print(f"{'sequential':>11} {sequential:>14.2f} {latency * 1000:>26.1f}")
+    print(f"{'warmer':>11} {warmed:>14.2f} {click_ms:>26.2f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 1.5, int(args[1]) if len(args) > 1 else 5)
@@ -0,0 +1,93 @@
+"""Dashboard API calls: bare requests.get vs the pooled OperationsApiClient.
+
+Against a local Operations API server, times the six per-partner status
+calls the chart used to make, once with a new connection per call
+(requests.get) and once over the client's keep-alive pool. Then points both
+at a server that accepts connections but never answers, and times how long
+a dashboard worker is blocked before the call gives up (bare requests.get is
+cut off by the harness after HUNG_CUTOFF_SECONDS; it has no timeout of its own).
+
+Usage: python benchmarks/bench_dashboard_client.py [ROUNDS]
+"""
+import os
+import socket
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_api_load import QuietHandler  # noqa: E402
+from bench_api_queries import SYNTHETIC_ROWS_SQL, api, di  # noqa: E402
+from api_client import ApiUnavailableError, OperationsApiClient  # noqa: E402
+
+PARTNERS = list(di.PARTNER_ID_TO_NAME_MAP.values())
+HUNG_CUTOFF_SECONDS = 15
+
+
+def six_partner_calls(get):
+    start = time.perf_counter()
+    for partner in PARTNERS:
+        get("/partner_performance/status", {"partner_contract": partner})
+    return (time.perf_counter() - start) * 1000
+
+
+def time_hung_call(call):
+    done = threading.Event()
+    start = time.perf_counter()
+
+    def run():
+        try:
+            call()
+        except (requests.RequestException, ApiUnavailableError):
+            pass
+        done.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    finished = done.wait(HUNG_CUTOFF_SECONDS)
+    return time.perf_counter() - start, finished
+
+
+def main(rounds=50):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "client.db")
+        conn = sqlite3.connect(path)
+        di.create_db_tables(conn)
+        conn.execute(SYNTHETIC_ROWS_SQL, (10_000,))
+        conn.commit()
+        conn.close()
+        api.DATABASE_NAME = path
+        server = make_server("127.0.0.1", 0, api.app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}/api"
+
+        client = OperationsApiClient(base_url)
+        bare = [six_partner_calls(lambda p, q: requests.get(base_url + p, params=q).json()) for _ in range(rounds)]
+        pooled = [six_partner_calls(client.get_json) for _ in range(rounds)]
+        print(f"six partner status calls, median of {rounds} rounds")
+        print(f"  new connection per call: {statistics.median(bare):6.2f} ms")
+        print(f"  pooled keep-alive:       {statistics.median(pooled):6.2f} ms")
+        server.shutdown()
+
+    hung = socket.socket()
+    hung.bind(("127.0.0.1", 0))
+    hung.listen(16)  # accepts the TCP handshake, never responds
+    hung_url = f"http://127.0.0.1:{hung.getsockname()[1]}/api"
+    client = OperationsApiClient(hung_url)
+    bare_s, bare_done = time_hung_call(lambda: requests.get(hung_url + "/dashboard/snapshot"))
+    client_s, _ = time_hung_call(lambda: client.get_json("/dashboard/snapshot"))
+    print("API accepts connections but never answers: worker blocked for")
+    print(f"  requests.get:            {'>' if not bare_done else ''}{bare_s:.1f} s"
+          f"{' (still waiting)' if not bare_done else ''}")
+    print(f"  OperationsApiClient:     {client_s:.1f} s (read timeout {client.timeout[1]} s)")
+    hung.close()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,106 @@
+"""live_dashboard per-tick wall time: separate fetches vs one snapshot.
+
+Serves the Operations API on a local threaded server and runs one dashboard
+refresh tick repeatedly, calling the Dash callbacks directly:
+
+  per-panel  - each panel fetches its own data, as before the snapshot store
+               (daily_summary, six partner statuses for the chart, one status
+               for the details panel: 8 requests)
+  snapshot   - refresh_metrics_snapshot makes one request and the three render
+               callbacks read from the stored snapshot
+
+The API response cache is disabled, as every tick follows a new ingest.
+
+Usage: python benchmarks/bench_dashboard_refresh.py [ROWS] [TICKS]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_api_load import QuietHandler  # noqa: E402
+from bench_api_queries import SYNTHETIC_ROWS_SQL, api, di  # noqa: E402
+import live_dashboard as dashboard  # noqa: E402
+
+SELECTED_PARTNER = dashboard.AVAILABLE_PARTNERS[0]
+
+
+class CountingSession:
+    """Stands in for the dashboard API client's session and counts calls."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.session.get(url, **kwargs)
+
+
+def per_panel_tick(http):
+    # Returns (snapshot-equivalent data, fetch ms); rendering is timed by the caller.
+    start = time.perf_counter()
+    base = dashboard.API_BASE_URL
+    summary = http.get(f"{base}/logistics/daily_summary").json()
+    partners = {p: http.get(f"{base}/partner_performance/status", params={"partner_contract": p}).json()
+                for p in dashboard.ALL_PARTNERS_FOR_CHART}
+    selected = http.get(f"{base}/partner_performance/status", params={"partner_contract": SELECTED_PARTNER}).json()
+    return {"daily_summary": summary, "partners": {**partners, SELECTED_PARTNER: selected}}, \
+        (time.perf_counter() - start) * 1000
+
+
+def snapshot_tick(http):
+    start = time.perf_counter()
+    return dashboard.refresh_metrics_snapshot(None), (time.perf_counter() - start) * 1000
+
+
+def render(snapshot):
+    dashboard.update_daily_summary(snapshot)
+    dashboard.update_partner_shipments_chart(snapshot)
+    dashboard.update_partner_performance_details(SELECTED_PARTNER, snapshot)
+
+
+def main(rows=200_000, ticks=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dashboard.db")
+        conn = sqlite3.connect(path)
+        di.create_db_tables(conn)
+        conn.execute(SYNTHETIC_ROWS_SQL, (rows,))
+        conn.commit()
+        conn.close()
+        api.DATABASE_NAME = path
+        api.RESPONSE_CACHE_TTL_SECONDS = 0
+        server = make_server("127.0.0.1", 0, api.app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        dashboard.API_BASE_URL = f"http://127.0.0.1:{server.server_port}/api"
+        dashboard.api_client.base_url = dashboard.API_BASE_URL
+
+        print(f"{rows:,} rows, median of {ticks} ticks")
+        print(f"{'mode':>10} {'requests/tick':>14} {'fetch (ms)':>11} {'tick (ms)':>10}")
+        for name, tick in (("per-panel", per_panel_tick), ("snapshot", snapshot_tick)):
+            http = CountingSession()
+            dashboard.api_client.session = http
+            render(tick(http)[0])  # warm up connections and plotly
+            http.calls = 0
+            fetches, samples = [], []
+            for _ in range(ticks):
+                start = time.perf_counter()
+                snapshot, fetch_ms = tick(http)
+                render(snapshot)
+                samples.append((time.perf_counter() - start) * 1000)
+                fetches.append(fetch_ms)
+            print(f"{name:>10} {http.calls / ticks:>14.0f} {statistics.median(fetches):>11.1f} "
+                  f"{statistics.median(samples):>10.1f}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
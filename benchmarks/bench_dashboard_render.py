@@ -0,0 +1,78 @@
+"""live_dashboard refresh cost per viewer: server vs client render mode.
+
+For each mode, runs what the Dash server does for one viewer's refresh:
+the snapshot callback plus, in server mode, the three Python render
+callbacks. Every callback output is serialized the way Dash sends it to the
+browser. The API call is stubbed with a fixed snapshot, so only dashboard
+work is measured. Reports the bytes sent per refresh and server CPU, for one
+viewer and extrapolated to VIEWERS tabs refreshing together.
+
+Usage: python benchmarks/bench_dashboard_render.py [VIEWERS] [REFRESHES]
+"""
+import importlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_api_queries import SYNTHETIC_ROWS_SQL, api, di  # noqa: E402
+
+
+def build_snapshot():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "render.db")
+        conn = sqlite3.connect(path)
+        di.create_db_tables(conn)
+        conn.execute(SYNTHETIC_ROWS_SQL, (10_000,))
+        conn.executemany(
+            "INSERT INTO partner_tasks_status (partner_contract, task_source_id, simulated_service_health) "
+            "VALUES (?, ?, ?)",
+            [(p, i, "OK" if i % 2 else "Action Required") for p in di.PARTNER_ID_TO_NAME_MAP.values() for i in range(5)])
+        conn.commit()
+        conn.row_factory = sqlite3.Row
+        snapshot = api.build_metrics_snapshot(conn)
+        conn.close()
+    return snapshot
+
+
+def load_dashboard(mode, snapshot):
+    os.environ["DASHBOARD_RENDER_MODE"] = mode
+    import live_dashboard
+    dashboard = importlib.reload(live_dashboard)
+    dashboard.api_client.get_json = lambda path, params=None: (snapshot, None)
+    return dashboard
+
+
+def refresh(dashboard, partner):
+    """One viewer's refresh; returns the serialized bytes sent to the browser."""
+    outputs = [dashboard.refresh_metrics_snapshot(None)]
+    if dashboard.RENDER_MODE == "server":
+        outputs += [dashboard.update_daily_summary(outputs[0]),
+                    dashboard.update_partner_shipments_chart(outputs[0]),
+                    dashboard.update_partner_performance_details(partner, outputs[0])]
+    return len(to_json_plotly(outputs))
+
+
+def main(viewers=200, refreshes=50):
+    snapshot = build_snapshot()
+    print(f"per refresh of one viewer, mean of {refreshes}; x{viewers} = {viewers} tabs refreshing together")
+    print(f"{'mode':>7} {'bytes':>8} {'CPU ms':>8} {f'CPU s x{viewers}':>12} {f'MB x{viewers}':>10}")
+    for mode in ("server", "client"):
+        dashboard = load_dashboard(mode, snapshot)
+        partner = dashboard.AVAILABLE_PARTNERS[0]
+        refresh(dashboard, partner)  # warm up plotly
+        start = time.process_time()
+        sizes = [refresh(dashboard, partner) for _ in range(refreshes)]
+        cpu_ms = (time.process_time() - start) * 1000 / refreshes
+        size = sum(sizes) / refreshes
+        print(f"{mode:>7} {size:>8,.0f} {cpu_ms:>8.2f} {cpu_ms * viewers / 1000:>12.2f} {size * viewers / 1e6:>10.2f}")
+    os.environ.pop("DASHBOARD_RENDER_MODE")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
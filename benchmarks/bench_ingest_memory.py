@@ -0,0 +1,65 @@
+"""Peak-RSS benchmark: whole-file vs chunked shipment ingestion.
+
+Each measurement runs in a fresh interpreter so ru_maxrss reflects only
+that ingestion run.
+
+Usage: python benchmarks/bench_ingest_memory.py [ROWS ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+LOGISTICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logistics-dashboard")
+SAMPLE_CSV = os.path.join(LOGISTICS_DIR, "shipments.csv")
+
+CHILD = """
+import resource, sqlite3, sys
+sys.path.insert(0, {logistics_dir!r})
+import data_ingestion as di
+di.SHIPMENTS_LOG_CSV = {csv_path!r}
+conn = sqlite3.connect({db_path!r})
+di.create_db_tables(conn)
+di.ingest_shipments_data(conn, chunksize={chunksize!r})
+conn.close()
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stderr)
+"""
+
+
+def write_csv(path, rows):
+    sample = pd.read_csv(SAMPLE_CSV)
+    block = 100_000
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < rows:
+            n = min(block, rows - written)
+            df = pd.concat([sample] * (-(-n // len(sample))), ignore_index=True).head(n).copy()
+            df["shipment_id"] = [f"MAVBENCH-{i:09d}" for i in range(written, written + n)]
+            df.to_csv(f, header=written == 0, index=False)
+            written += n
+
+
+def peak_rss_mb(csv_path, chunksize):
+    with tempfile.TemporaryDirectory() as tmp:
+        code = CHILD.format(logistics_dir=LOGISTICS_DIR, csv_path=csv_path,
+                            db_path=os.path.join(tmp, "bench.db"), chunksize=chunksize)
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        return int(proc.stderr.strip().splitlines()[-1]) / 1024
+
+
+def main(sizes, chunksize=50_000):
+    print(f"{'rows':>10} {'file MB':>8} {'whole-file RSS MB':>18} {'chunked RSS MB':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            csv_path = os.path.join(tmp, f"shipments_{rows}.csv")
+            write_csv(csv_path, rows)
+            size_mb = os.path.getsize(csv_path) / 2**20
+            whole = peak_rss_mb(csv_path, None)
+            chunked = peak_rss_mb(csv_path, chunksize)
+            print(f"{rows:>10} {size_mb:>8.1f} {whole:>18.1f} {chunked:>15.1f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100_000, 400_000, 1_600_000])
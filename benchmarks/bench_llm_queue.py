@@ -0,0 +1,116 @@
+"""Scenario analysis load: one blocking call per request vs the LLM job queue.
+
+USERS simulated browser tabs each submit REQUESTS analyses at once, drawn
+from a small set of common scenarios, so some prompts repeat while in
+flight. A fake Gemini client streams CHUNKS chunks over LATENCY seconds and
+tracks how many calls run concurrently.
+
+  blocking - every request holds a server thread for a full model call
+             (the callback before streaming and the queue)
+  queue    - start_scenario_analysis returns at once; the queue runs at most
+             LLM_STREAM_WORKERS calls, LLM_STREAM_PER_USER per tab, and
+             identical in-flight prompts share one call
+
+Usage: python benchmarks/bench_llm_queue.py [USERS] [REQUESTS] [LATENCY_SECONDS]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import compliance_dashboard as compliance  # noqa: E402
+from llm_streams import LLMStreams  # noqa: E402
+
+SCENARIOS = [
+    "Truck 12 broke down outside Tulsa; ETA slips by 3 hours.",
+    "Tracking API was down for 90 minutes this morning.",
+    "A van's check-engine light came on mid-route.",
+]
+CHUNKS = 20
+
+
+class CountingModels:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_content_stream(self, model, contents):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            for i in range(CHUNKS):
+                time.sleep(self.latency / CHUNKS)
+                yield type("Chunk", (), {"text": f"word{i} "})()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def generate_content(self, model, contents):
+        text = "".join(chunk.text for chunk in self.generate_content_stream(model, contents))
+        return type("Response", (), {"text": text})()
+
+
+def requests_for(users, per_user):
+    return [(f"user-{u}", compliance.AVAILABLE_PARTNERS_LIST[i % 3], SCENARIOS[(u + i) % len(SCENARIOS)])
+            for u in range(users) for i in range(per_user)]
+
+
+def run_blocking(requests):
+    def call(request):
+        start = time.perf_counter()
+        compliance.client.models.generate_content(compliance.GEMINI_MODEL, request[2])
+        return time.perf_counter() - start, time.perf_counter() - start
+
+    # One server thread per request, as a threaded Flask server would use.
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        return list(pool.map(call, requests))
+
+
+def run_queue(requests):
+    start = time.perf_counter()
+    submitted = []
+    for client_id, partner, scenario in requests:
+        t0 = time.perf_counter()
+        _, stream_id = compliance.start_scenario_analysis(partner, scenario, client_id)
+        submitted.append((stream_id, time.perf_counter() - t0))
+
+    def finished(item):
+        stream_id, hold = item
+        compliance.scenario_streams.wait(stream_id)
+        return hold, time.perf_counter() - start
+
+    # One waiter per request stands in for the browser polling its result.
+    with ThreadPoolExecutor(max_workers=len(submitted)) as pool:
+        return list(pool.map(finished, submitted))
+
+
+def main(users=8, per_user=3, latency=2.0):
+    requests = requests_for(users, per_user)
+    compliance.GEMINI_READY = True
+    compliance.scenario_streams = LLMStreams(max_queued=len(requests))
+    print(f"{users} tabs x {per_user} analyses, {latency:.1f} s per model call")
+    print(f"{'mode':>9} {'model calls':>12} {'peak concurrent':>16} {'thread hold p50 (ms)':>21} "
+          f"{'done p50 (s)':>13} {'done max (s)':>13}")
+    for name, run in (("blocking", run_blocking), ("queue", run_queue)):
+        models = CountingModels(latency)
+        compliance.client = type("Client", (), {"models": models})()
+        results = run(requests)
+        holds = [hold * 1000 for hold, _ in results]
+        done = [finished for _, finished in results]
+        print(f"{name:>9} {models.calls:>12} {models.peak:>16} {statistics.median(holds):>21.1f} "
+              f"{statistics.median(done):>13.2f} {max(done):>13.2f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*(int(a) for a in args[:2]), *(float(a) for a in args[2:3]))
@@ -0,0 +1,100 @@
+"""Voice-agent end-of-speech-to-response latency: <Record> + download vs Media Streams VAD.
+
+Synthesized calls (line noise plus voiced, syllable-modulated speech) of
+several utterance lengths are measured both ways, with the model stubbed at
+MODEL_SECONDS:
+
+  record - <Record> stops after Twilio's RECORD_SILENCE_SECONDS of silence,
+           then the webhook downloads the whole WAV from a local stub media
+           host (HANDSHAKE_SECONDS per new connection) before the model runs
+  stream - the WAV is replayed as Media Streams frames through
+           MediaStreamSession; the model runs once the VAD hears silence
+
+Also reports the decode + VAD cost per 20 ms frame.
+
+Usage: python benchmarks/bench_media_stream.py [MODEL_SECONDS] [HANDSHAKE_SECONDS]
+"""
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+VOICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "voice-agent")
+sys.path.insert(0, VOICE_DIR)
+
+import stream_replay  # noqa: E402
+from media_stream import MediaStreamSession  # noqa: E402
+
+RECORD_SILENCE_SECONDS = 5.0  # <Record timeout>, Twilio's default
+UTTERANCE_SECONDS = (1.0, 3.0, 8.0, 20.0)
+
+
+def media_host(path, handshake):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def setup(self):
+            super().setup()
+            time.sleep(handshake)
+
+        def do_GET(self):
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/x-wav")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/Recordings/RE1.wav"
+
+
+def record_latency(path, model_seconds, handshake):
+    server, url = media_host(path, handshake)
+    start = time.perf_counter()
+    audio = requests.get(url).content
+    download = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    time.sleep(model_seconds)
+    return RECORD_SILENCE_SECONDS + download + model_seconds, len(audio)
+
+
+def frame_cost_ms(path):
+    messages = list(stream_replay.media_messages(stream_replay.wav_frames(path)))
+    session = MediaStreamSession(lambda audio: session.resume())
+    start = time.perf_counter()
+    for message in messages:
+        session.handle(message)
+    return (time.perf_counter() - start) / (len(messages) - 3) * 1000
+
+
+def main(model_seconds=1.0, handshake=0.15):
+    workdir = tempfile.mkdtemp()
+    print(f"model {model_seconds:.1f} s, {handshake * 1000:.0f} ms connection setup to the media host, "
+          f"<Record> silence timeout {RECORD_SILENCE_SECONDS:.0f} s")
+    print(f"{'utterance (s)':>14} {'WAV KB':>7} {'record (s)':>11} {'stream (s)':>11} {'VAD hangover (ms)':>18} "
+          f"{'saved (s)':>10}")
+    for speech in UTTERANCE_SECONDS:
+        path = os.path.join(workdir, f"utterance_{speech:g}s.wav")
+        stream_replay.synthesize_call(path, utterances=((speech, 1.5),))
+        record, size = record_latency(path, model_seconds, handshake)
+        turns = stream_replay.replay(path, lambda wav: time.sleep(model_seconds))
+        stream = turns[0]["latency_seconds"]
+        print(f"{speech:>14.0f} {size / 1024:>7.0f} {record:>11.2f} {stream:>11.2f} "
+              f"{turns[0]['hangover_seconds'] * 1000:>18.0f} {record - stream:>10.2f}")
+    cost = frame_cost_ms(path)
+    print(f"decode + VAD: {cost:.3f} ms per 20 ms frame ({cost / 20:.1%} of real time, one core)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 1.0, float(args[1]) if len(args) > 1 else 0.15)
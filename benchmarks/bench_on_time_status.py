@@ -0,0 +1,50 @@
+"""Throughput benchmark: per-row apply vs columnar on-time status.
+
+Usage: python benchmarks/bench_on_time_status.py [ROWS ...]
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+
+import data_ingestion as di  # noqa: E402
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard", "shipments.csv")
+
+
+def build_frame(rows):
+    sample = pd.read_csv(SAMPLE_CSV)
+    reps = -(-rows // len(sample))
+    return pd.concat([sample] * reps, ignore_index=True).head(rows)
+
+
+def time_row_apply(df):
+    start = time.perf_counter()
+    df.apply(lambda row: di.calculate_on_time_status(
+        row['planned_arrival_datetime'], row['actual_arrival_datetime'], row['delivery_status']
+    ), axis=1)
+    return time.perf_counter() - start
+
+
+def time_columnar(df):
+    start = time.perf_counter()
+    di.calculate_on_time_status_column(
+        df['planned_arrival_datetime'], df['actual_arrival_datetime'], df['delivery_status']
+    )
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'apply (s)':>10} {'columnar (s)':>13} {'rows/s columnar':>16} {'speedup':>8}")
+    for rows in sizes:
+        df = build_frame(rows)
+        t_apply = time_row_apply(df)
+        t_col = time_columnar(df)
+        print(f"{rows:>10} {t_apply:>10.3f} {t_col:>13.3f} {rows / t_col:>16,.0f} {t_apply / t_col:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,72 @@
+"""Latency benchmark: sequential per-partner requests vs the pooled concurrent fetcher.
+
+A local stub server stands in for the partner tasks API and sleeps for
+LATENCY seconds on every request.
+
+Usage: python benchmarks/bench_partner_fetch.py [LATENCY_SECONDS] [PARTNERS ...]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+
+import data_ingestion as di  # noqa: E402
+
+TODOS = [{"id": i, "title": f"task {i}", "completed": i % 2 == 0} for i in range(1, 11)]
+
+
+def start_stub_server(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = json.dumps(TODOS).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fetch_sequential():
+    for api_user_id in di.PARTNER_ID_TO_NAME_MAP:
+        response = requests.get(di.PARTNER_TASKS_API_URL, params={"userId": api_user_id}, timeout=10)
+        response.raise_for_status()
+        response.json()
+
+
+def main(latency, partner_counts):
+    server = start_stub_server(latency)
+    di.PARTNER_TASKS_API_URL = f"http://127.0.0.1:{server.server_port}/todos"
+    print(f"stub latency {latency * 1000:.0f} ms, concurrency {di.PARTNER_FETCH_CONCURRENCY}")
+    print(f"{'partners':>9} {'sequential (s)':>15} {'concurrent (s)':>15} {'speedup':>8}")
+    for count in partner_counts:
+        di.PARTNER_ID_TO_NAME_MAP = {i: f"Partner-{i}" for i in range(1, count + 1)}
+        start = time.perf_counter()
+        fetch_sequential()
+        t_seq = time.perf_counter() - start
+        start = time.perf_counter()
+        _, errors = di.fetch_all_partner_tasks()
+        t_con = time.perf_counter() - start
+        assert not errors, errors
+        print(f"{count:>9} {t_seq:>15.3f} {t_con:>15.3f} {t_seq / t_con:>7.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 0.2, [int(a) for a in args[1:]] or [6, 24, 48])
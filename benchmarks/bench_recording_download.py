@@ -0,0 +1,115 @@
+"""Voice-agent recording download: bare requests.get vs RecordingDownloader.
+
+A local stub stands in for Twilio's media host. Each new connection pays
+HANDSHAKE_SECONDS (standing in for the TCP + TLS setup to api.twilio.com) and
+each response waits FIRST_BYTE_SECONDS before sending a ~480 KB WAV body.
+
+  normal    - DOWNLOADS recordings fetched one after another, as consecutive turns
+  not ready - the first two requests for a recording answer 404, as Twilio does
+              for a moment after the recording callback
+  stalled   - the host sends headers and then stops; the legacy call is given
+              STALL_SECONDS before the benchmark gives up on it (in production
+              it would wait forever)
+
+Usage: python benchmarks/bench_recording_download.py [DOWNLOADS] [HANDSHAKE_SECONDS] [FIRST_BYTE_SECONDS]
+"""
+import http.server
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "voice-agent"))
+
+from recordings import RecordingDownloader, RecordingError  # noqa: E402
+
+BODY = b"RIFF" + os.urandom(480_000)
+STALL_SECONDS = 20.0
+
+
+class MediaHost:
+    def __init__(self, handshake, first_byte):
+        self.mode = "normal"
+        self.not_ready_left = 0
+        self.connections = 0
+        host = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                host.connections += 1
+                time.sleep(handshake)
+
+            def do_GET(self):
+                time.sleep(first_byte)
+                if host.not_ready_left:
+                    host.not_ready_left -= 1
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/x-wav")
+                self.send_header("Content-Length", str(len(BODY)))
+                self.end_headers()
+                if host.mode == "stalled":
+                    time.sleep(STALL_SECONDS + 5)
+                    return
+                self.wfile.write(BODY)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/Recordings/RE1"
+
+
+def legacy_fetch(url, stall_limit=None):
+    # What ai_conversation did: a new connection per call, whole body buffered, no timeout.
+    return requests.get(url, timeout=stall_limit).content
+
+
+def timed(fetch):
+    start = time.perf_counter()
+    try:
+        ok = fetch() == BODY
+    except (RecordingError, requests.exceptions.RequestException):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def main(downloads=50, handshake=0.05, first_byte=0.02):
+    host = MediaHost(handshake, first_byte)
+    downloader = RecordingDownloader()
+    print(f"{len(BODY):,}-byte recordings, {handshake * 1000:.0f} ms connection setup, "
+          f"{first_byte * 1000:.0f} ms to first byte")
+    print(f"{'scenario':>10} {'client':>11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'ok':>6} {'connections':>12}")
+    for scenario in ("normal", "not ready", "stalled"):
+        host.mode = scenario
+        runs = downloads if scenario == "normal" else 3
+        for name, fetch in (("legacy", lambda: legacy_fetch(host.url, STALL_SECONDS if scenario == "stalled" else None)),
+                            ("downloader", lambda: downloader.fetch(host.url))):
+            before = host.connections
+            results = []
+            for _ in range(runs):
+                host.not_ready_left = 2 if scenario == "not ready" else 0
+                results.append(timed(fetch))
+            latencies = sorted(seconds * 1000 for seconds, _ in results)
+            print(f"{scenario:>10} {name:>11} {statistics.median(latencies):>9.0f} "
+                  f"{latencies[int(len(latencies) * 0.95)]:>9.0f} {sum(ok for _, ok in results):>3}/{runs:<2} "
+                  f"{host.connections - before:>12}")
+    print(f"(legacy 'stalled' stopped by the benchmark after {STALL_SECONDS:.0f} s; "
+          f"the downloader gives up after its {downloader.timeout[1]:.0f} s read timeout)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 50, float(args[1]) if len(args) > 1 else 0.05,
+         float(args[2]) if len(args) > 2 else 0.02)
@@ -0,0 +1,78 @@
+"""Scenario analysis perceived latency: blocking call vs streamed output.
+
+A fake Gemini client takes FIRST_TOKEN seconds before the first chunk and
+CHUNK_DELAY seconds per chunk after it, for CHUNKS chunks. The blocking path
+waits for the whole response, as the callback did before streaming. The
+streaming path polls the output area every OUTPUT_POLL_INTERVAL_MS, as the
+browser does, and records when text first appears and when the stream ends.
+
+Usage: python benchmarks/bench_scenario_stream.py [FIRST_TOKEN] [CHUNK_DELAY] [CHUNKS] [RUNS]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import compliance_dashboard as compliance  # noqa: E402
+
+PARTNER = "Uhaul-Interstate"
+SCENARIO = "Truck 12 broke down outside Tulsa; ETA slips by 3 hours."
+
+
+class StreamingModels:
+    def __init__(self, first_token, chunk_delay, chunks):
+        self.first_token = first_token
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+
+    def generate_content_stream(self, model, contents):
+        time.sleep(self.first_token)
+        for i in range(self.chunks):
+            if i:
+                time.sleep(self.chunk_delay)
+            yield type("Chunk", (), {"text": f"word{i} "})()
+
+    def generate_content(self, model, contents):
+        text = "".join(chunk.text for chunk in self.generate_content_stream(model, contents))
+        return type("Response", (), {"text": text})()
+
+
+def streamed_run():
+    start = time.perf_counter()
+    _, stream_id = compliance.start_scenario_analysis(PARTNER, SCENARIO)
+    first_text = None
+    while True:
+        time.sleep(compliance.OUTPUT_POLL_INTERVAL_MS / 1000)
+        stream = compliance.scenario_streams.get(stream_id)
+        if first_text is None and stream["text"]:
+            first_text = time.perf_counter() - start
+        if stream["done"]:
+            return first_text, time.perf_counter() - start
+
+
+def main(first_token=0.8, chunk_delay=0.15, chunks=40, runs=3):
+    models = StreamingModels(first_token, chunk_delay, chunks)
+    compliance.client = type("Client", (), {"models": models})()
+    compliance.GEMINI_READY = True
+    print(f"first token {first_token * 1000:.0f} ms, {chunks} chunks x {chunk_delay * 1000:.0f} ms, "
+          f"poll every {compliance.OUTPUT_POLL_INTERVAL_MS} ms, median of {runs} runs")
+
+    blocking = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        models.generate_content(compliance.GEMINI_MODEL, SCENARIO)
+        blocking.append(time.perf_counter() - start)
+    streamed = [streamed_run() for _ in range(runs)]
+
+    print(f"{'mode':>10} {'first text (s)':>15} {'complete (s)':>13}")
+    print(f"{'blocking':>10} {statistics.median(blocking):>15.2f} {statistics.median(blocking):>13.2f}")
+    print(f"{'streaming':>10} {statistics.median(t for t, _ in streamed):>15.2f} "
+          f"{statistics.median(t for _, t in streamed):>13.2f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*(float(a) for a in args[:2]), *(int(a) for a in args[2:]))
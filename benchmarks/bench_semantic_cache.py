@@ -0,0 +1,112 @@
+"""Semantic cache hit rate and latency savings on a replayed scenario log.
+
+The log is generated from a fixed set of scenario intents, each phrased
+several ways, with a few different numbers and some incidental detail,
+replayed in random order across the three partners. Every query is looked
+up; on a miss the "model" answers (costing LATENCY seconds) and the answer is
+cached, labelled with the query's intent. A hit that returns another intent's
+answer is a false hit; some intents differ from another by one word ("delayed
+over 3 hours", "light came off", "not damaged") to catch exactly that.
+
+Compared: an exact-match cache on normalized text, and the semantic cache at
+several similarity thresholds.
+
+Usage: python benchmarks/bench_semantic_cache.py [QUERIES] [LATENCY_SECONDS] [SEED]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+
+from semantic_cache import SemanticCache, scenario_tokens  # noqa: E402
+
+PARTNERS = ["Amazon-Prime", "Uhaul-Interstate", "Hertz-Local"]
+INTENTS = {
+    "delay": ["Truck delayed {n} hours", "The truck is delayed by {n} hours", "truck got delayed {n} hours",
+              "Our truck is running {n} hours late", "Delivery truck delayed {n} hours"],
+    "api_down": ["Tracking API down for {n} hours", "The tracking API was down {n} hours",
+                 "tracking api outage of {n} hours", "Tracking API has been down for {n} hours"],
+    "damage": ["Pallet damaged on delivery", "A pallet was damaged on delivery", "pallet damaged at delivery",
+               "Customer reported a damaged pallet on delivery"],
+    "warning_light": ["Van warning light came on", "Warning light on the van came on",
+                      "dashboard warning light on van", "The van's warning light came on"],
+    "mileage": ["Van is at {n} miles this month", "Leased van reached {n} miles this month",
+                "van mileage at {n} miles this month"],
+    # Contrasting intents: one small word away from an intent above, with a different answer.
+    "delay_over": ["Truck delayed over {n} hours", "The truck is delayed more than {n} hours",
+                   "Truck running over {n} hours late"],
+    "delay_under": ["Truck delayed under {n} hours", "Truck delayed less than {n} hours"],
+    "warning_light_off": ["Van warning light came off", "Warning light on the van went off",
+                          "The van's warning light is off now"],
+    "no_damage": ["Pallet not damaged on delivery", "No damage to the pallet on delivery",
+                  "Pallet wasn't damaged at delivery"],
+}
+NUMBERS = {"delay": ["1", "2", "3", "5"], "delay_over": ["3", "5"], "delay_under": ["3", "5"],
+           "api_down": ["1", "2"], "mileage": ["2900", "3100"]}
+# Operators add incidental detail that does not change the contract question.
+PREFIXES = ["", "", "Heads up: ", "FYI "]
+SUFFIXES = ["", "", " this morning", " again", " near Tulsa", " on the Dallas route", "!"]
+
+
+def query_log(size, seed):
+    rng = random.Random(seed)
+    log = []
+    for _ in range(size):
+        intent = rng.choice(list(INTENTS))
+        number = rng.choice(NUMBERS.get(intent, [""]))
+        query = rng.choice(PREFIXES) + rng.choice(INTENTS[intent]).format(n=number) + rng.choice(SUFFIXES)
+        log.append((rng.choice(PARTNERS), intent, number, query))
+    return log
+
+
+class ExactCache:
+    def __init__(self):
+        self._entries = {}
+
+    def lookup(self, namespace, query):
+        entry = self._entries.get((namespace, " ".join(scenario_tokens(query))))
+        return None if entry is None else (entry, query, 1.0)
+
+    def store(self, namespace, query, response):
+        self._entries[(namespace, " ".join(scenario_tokens(query)))] = response
+
+
+def replay(cache, log, latency):
+    hits = false_hits = 0
+    lookup_seconds = 0.0
+    for partner, intent, number, query in log:
+        start = time.perf_counter()
+        hit = cache.lookup(partner, query)
+        lookup_seconds += time.perf_counter() - start
+        if hit is not None:
+            hits += 1
+            false_hits += hit[0] != (intent, number)
+        else:
+            cache.store(partner, query, (intent, number))
+    model_seconds = (len(log) - hits) * latency
+    return hits, false_hits, lookup_seconds / len(log) * 1000, model_seconds
+
+
+def main(size=2000, latency=4.0, seed=7):
+    log = query_log(size, seed)
+    distinct = len({(p, i, n) for p, i, n, _ in log})
+    print(f"{size} queries, {distinct} distinct (partner, intent, numbers), {latency:.1f} s per model call")
+    print(f"{'cache':>16} {'hit rate':>9} {'false hits':>11} {'lookup (ms)':>12} {'model time (s)':>15} {'saved':>7}")
+    baseline = size * latency
+    caches = [("none", None), ("exact", ExactCache())]
+    caches += [(f"semantic {t:.2f}", SemanticCache(threshold=t)) for t in (0.95, 0.9, 0.85, 0.8, 0.7, 0.6)]
+    for name, cache in caches:
+        if cache is None:
+            hits, false_hits, lookup_ms, model_seconds = 0, 0, 0.0, baseline
+        else:
+            hits, false_hits, lookup_ms, model_seconds = replay(cache, log, latency)
+        print(f"{name:>16} {hits / size:>9.1%} {false_hits:>11} {lookup_ms:>12.3f} {model_seconds:>15.0f} "
+              f"{1 - model_seconds / baseline:>7.1%}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 2000, float(args[1]) if len(args) > 1 else 4.0,
+         int(args[2]) if len(args) > 2 else 7)
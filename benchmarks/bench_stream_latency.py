@@ -0,0 +1,93 @@
+"""Push latency of /api/stream versus the dashboard's 60 s poll.
+
+Serves the Operations API on a local threaded server, opens SUBSCRIBERS
+streams, then commits a shipment plus a data_version bump every couple of
+seconds and records how long each subscriber takes to receive the delta.
+Also counts the bytes an idle subscriber receives (keep-alives only).
+
+Usage: python benchmarks/bench_stream_latency.py [SUBSCRIBERS] [UPDATES]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_api_load import QuietHandler  # noqa: E402
+from bench_api_queries import SYNTHETIC_ROWS_SQL, api, di  # noqa: E402
+
+ROWS = 100_000
+UPDATE_INTERVAL_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 60  # live_dashboard's fallback dcc.Interval
+
+
+def subscribe(url, ready, received, idle_bytes, stop):
+    with requests.get(url, stream=True, timeout=(3, 30)) as response:
+        for line in response.iter_lines(decode_unicode=True):
+            if stop.is_set():
+                return
+            if line.startswith("event: snapshot"):
+                ready.release()
+            elif line.startswith("event: delta"):
+                received.append(time.perf_counter())
+            elif line.startswith(":"):
+                idle_bytes.append(len(line) + 2)
+
+
+def main(subscribers=20, updates=10):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stream.db")
+        di.DATABASE_NAME = path
+        conn = di.get_db_connection()
+        di.create_db_tables(conn)
+        conn.execute(SYNTHETIC_ROWS_SQL, (ROWS,))
+        conn.commit()
+        api.DATABASE_NAME = path
+        server = make_server("127.0.0.1", 0, api.app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/api/stream"
+
+        ready, stop = threading.Semaphore(0), threading.Event()
+        inboxes, idle_bytes = [[] for _ in range(subscribers)], []
+        for inbox in inboxes:
+            threading.Thread(target=subscribe, args=(url, ready, inbox, idle_bytes, stop), daemon=True).start()
+        for _ in range(subscribers):
+            ready.acquire()
+
+        latencies = []
+        for i in range(updates):
+            # Jitter so commits do not line up with the watcher's poll phase.
+            time.sleep(UPDATE_INTERVAL_SECONDS + random.uniform(0, api.STREAM_POLL_INTERVAL_SECONDS))
+            with conn:
+                conn.execute("UPDATE daily_shipments SET shipment_value_usd = shipment_value_usd + 1 "
+                             "WHERE shipment_id = ?", (f"BENCH-{i * 5 + 2}",))
+            di.bump_data_version(conn)
+            committed = time.perf_counter()
+            deadline = committed + 5
+            while any(len(inbox) <= i for inbox in inboxes) and time.perf_counter() < deadline:
+                time.sleep(0.005)
+            latencies += [(inbox[i] - committed) * 1000 for inbox in inboxes if len(inbox) > i]
+        stop.set()
+        server.shutdown()
+        conn.close()
+
+    latencies.sort()
+    print(f"{subscribers} subscribers, {updates} ingests, {ROWS:,} rows")
+    print(f"commit -> delta received: p50 {statistics.median(latencies):.0f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.0f} ms, "
+          f"max {latencies[-1]:.0f} ms ({len(latencies)}/{subscribers * updates} delivered)")
+    print(f"60 s polling: mean wait {POLL_INTERVAL_SECONDS * 1000 / 2:.0f} ms, "
+          f"max {POLL_INTERVAL_SECONDS * 1000:.0f} ms, 8 API requests per tab per minute even when idle")
+    print(f"idle stream traffic: {sum(idle_bytes) / subscribers:.0f} bytes of keep-alives per subscriber "
+          f"over {updates * UPDATE_INTERVAL_SECONDS:.0f} s")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,111 @@
+"""Voice-agent session backends across several worker processes.
+
+WORKERS processes each open their own backend, as gunicorn workers or Cloud
+Run instances would. CALLERS callers each take TURNS turns, and a round-robin
+load balancer sends every turn to a different worker than the last. A turn
+reads the caller's history and appends a ~400-character reply; it "kept
+context" if it saw every earlier turn.
+
+  memory - the in-process ConversationStore (each worker has its own)
+  sqlite - SQLiteSessionBackend on one WAL database file
+  redis  - RedisSessionBackend, only if SESSION_REDIS_URL answers PING
+
+Also prints the stored size of a full 20-message history: types.Content JSON
+against encode_history().
+
+Usage: python benchmarks/bench_voice_session_backends.py [WORKERS] [CALLERS] [TURNS]
+"""
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+VOICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "voice-agent")
+sys.path.insert(0, VOICE_DIR)
+
+import sessions  # noqa: E402
+
+
+def reply(rng, caller, turn):
+    return f"Reply {turn} for {caller}: " + rng.randbytes(200).hex()
+
+
+def worker(name, tasks, results):
+    backend = sessions.create_session_backend(name)
+    rng = random.Random(os.getpid())
+    for caller, turn in iter(tasks.get, None):
+        start = time.perf_counter()
+        seen = len(backend.history(caller))
+        backend.append(caller, "model", reply(rng, caller, turn))
+        results.put((time.perf_counter() - start, seen == min(turn, backend.max_messages)))
+    results.put(("stats", backend.stats))
+
+
+def run(name, workers, callers, turns):
+    tasks = [multiprocessing.Queue() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(name, q, results)) for q in tasks]
+    for p in procs:
+        p.start()
+    latencies, kept = [], 0
+    start = time.perf_counter()
+    for turn in range(turns):
+        for c in range(callers):
+            tasks[(c + turn) % workers].put((f"+1555{c:07d}", turn))
+        for _ in range(callers):
+            seconds, ok = results.get()
+            latencies.append(seconds)
+            kept += ok
+    elapsed = time.perf_counter() - start
+    for q in tasks:
+        q.put(None)
+    conflicts = sum(results.get()[1]["conflicts"] for _ in procs)
+    for p in procs:
+        p.join()
+    latencies.sort()
+    return {
+        "kept": kept / len(latencies), "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000, "turns/s": len(latencies) / elapsed,
+        "conflicts": conflicts,
+    }
+
+
+def redis_available():
+    try:
+        sessions.RedisSessionBackend(sessions.SESSION_REDIS_URL)._call(lambda conn: conn.command("PING"))
+        return True
+    except OSError:
+        return False
+
+
+def serialization_sizes():
+    from google.genai import types
+    rng = random.Random(1)
+    messages = [("user" if i % 2 else "model", reply(rng, "+15550000000", i)) for i in range(20)]
+    content = sum(len(types.Content(parts=[types.Part(text=text)], role=role).model_dump_json(exclude_none=True))
+                  for role, text in messages)
+    return content, len(sessions.encode_history(messages))
+
+
+def main(workers=4, callers=200, turns=6):
+    # Every worker process inherits this, so sqlite workers share one file.
+    sessions.SESSION_SQLITE_PATH = os.path.join(tempfile.mkdtemp(), "voice_sessions.db")
+    backends = ["memory", "sqlite"] + (["redis"] if redis_available() else [])
+    print(f"{workers} workers, {callers} callers x {turns} turns, round-robin across workers")
+    print(f"{'backend':>8} {'kept context':>13} {'p50 (ms)':>9} {'p95 (ms)':>9} {'turns/s':>8} {'conflicts':>10}")
+    for name in backends:
+        r = run(name, workers, callers, turns)
+        print(f"{name:>8} {r['kept']:>13.1%} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['turns/s']:>8.0f} {r['conflicts']:>10}")
+    if "redis" not in backends:
+        print(f"(redis skipped: nothing answering at {sessions.SESSION_REDIS_URL})")
+    content, encoded = serialization_sizes()
+    print(f"20-message history: {content:,} bytes as types.Content JSON, {encoded:,} bytes encoded")
+
+
+if __name__ == "__main__":
+    multiprocessing.set_start_method("fork")
+    args = [int(a) for a in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,78 @@
+"""Soak test: voice-agent conversation memory over many distinct callers.
+
+Simulates CALLERS distinct callers, one arriving every ARRIVAL_SECONDS of
+simulated time. Each caller has 1-6 AI turns with ~400-character replies.
+RSS is sampled every tenth of the run.
+
+  legacy - the original module-level dict of types.Content lists, trimmed to
+           20 messages but never evicted
+  store  - sessions.ConversationStore with its idle TTL and memory budget
+
+Each mode runs in a fresh interpreter, so RSS reflects only that mode. The
+default 100k callers take a few minutes, mostly building legacy Content objects.
+
+Usage: python benchmarks/bench_voice_sessions.py [CALLERS] [ARRIVAL_SECONDS]
+"""
+import json
+import os
+import subprocess
+import sys
+
+VOICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "voice-agent")
+
+CHILD = """
+import json, random, sys
+sys.path.insert(0, {voice_dir!r})
+from google.genai import types
+import sessions
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 / 2**20
+
+rng = random.Random(1)
+callers, arrival = {callers!r}, {arrival!r}
+clock = [0.0]
+store = sessions.ConversationStore(clock=lambda: clock[0])
+legacy = {{}}
+samples = []
+for i in range(callers):
+    clock[0] = i * arrival
+    caller = f"+1555{{i:07d}}"
+    for turn in range(rng.randint(1, 6)):
+        text = f"Reply {{turn}} for {{caller}}: " + "".join(rng.choice("abcdefghij ") for _ in range(400))
+        if {mode!r} == "legacy":
+            legacy.setdefault(caller, []).append(types.Content(parts=[types.Part(text=text)], role="model"))
+            if len(legacy[caller]) > 20:
+                legacy[caller] = legacy[caller][-20:]
+        else:
+            store.append(caller, "model", text)
+    if (i + 1) % (callers // 10) == 0:
+        held = len(legacy) if {mode!r} == "legacy" else len(store)
+        samples.append([i + 1, rss_mb(), held, store.bytes_held / 2**20])
+print(json.dumps(samples))
+"""
+
+
+def run(mode, callers, arrival):
+    code = CHILD.format(voice_dir=VOICE_DIR, callers=callers, arrival=arrival, mode=mode)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(callers=100_000, arrival=0.05):
+    sys.path.insert(0, VOICE_DIR)
+    import sessions
+
+    print(f"{callers:,} callers, one every {arrival} s simulated; idle TTL {sessions.SESSION_IDLE_TTL_SECONDS} s, "
+          f"budget {sessions.SESSION_MEMORY_BUDGET_BYTES / 2**20:.0f} MiB")
+    legacy, store = run("legacy", callers, arrival), run("store", callers, arrival)
+    print(f"{'callers':>9} {'legacy RSS MB':>14} {'legacy sessions':>16} {'store RSS MB':>13} "
+          f"{'store sessions':>15} {'store MiB held':>15}")
+    for (n, legacy_rss, legacy_held, _), (_, store_rss, store_held, store_mib) in zip(legacy, store):
+        print(f"{n:>9,} {legacy_rss:>14.0f} {legacy_held:>16,} {store_rss:>13.0f} {store_held:>15,} {store_mib:>15.1f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 100_000, float(args[1]) if len(args) > 1 else 0.05)
@@ -0,0 +1,153 @@
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_TIMEOUT = (1.0, 5.0)  # (connect, read) seconds
+API_POOL_SIZE = 10
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_SECONDS = 30
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class ApiUnavailableError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling a failing API for BREAKER_RESET_SECONDS.
+
+    Opens after `failure_threshold` consecutive failures. Once the reset time
+    has passed, a single trial request is let through (half-open): success
+    closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=None, reset_seconds=None):
+        self.failure_threshold = BREAKER_FAILURE_THRESHOLD if failure_threshold is None else failure_threshold
+        self.reset_seconds = BREAKER_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class OperationsApiClient:
+    """Shared HTTP client for the Operations API.
+
+    One keep-alive session with a bounded pool and (connect, read) timeouts, so
+    a hung API cannot block a Dash worker. Behind a circuit breaker, failed or
+    short-circuited calls fall back to the last good response for the same
+    request. Latency and outcome counters are rendered by render_metrics() in
+    the Prometheus text format.
+    """
+
+    def __init__(self, base_url, timeout=API_TIMEOUT, pool_size=API_POOL_SIZE, breaker=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = breaker or CircuitBreaker()
+        self._last_good = {}  # (path, params) -> (data, fetched_at)
+        self._lock = threading.Lock()
+        self._requests = {}  # (path, outcome) -> count
+        self._latency_buckets = {}  # path -> [count per LATENCY_BUCKETS_SECONDS bound]
+        self._latency_sum = {}
+        self._latency_count = {}
+
+    def get_json(self, path, params=None):
+        """(data, stale_since): stale_since is None for a fresh response, else the
+        time the served fallback was fetched. Raises ApiUnavailableError when the
+        call fails and there is nothing to fall back to."""
+        key = (path, tuple(sorted((params or {}).items())))
+        if not self.breaker.allow_request():
+            self._count(path, "short_circuit")
+            return self._fallback(key, "circuit open after repeated Operations API failures")
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self._observe(path, "error", time.perf_counter() - start)
+            self.breaker.record_failure()
+            return self._fallback(key, e)
+        self._observe(path, "ok", time.perf_counter() - start)
+        self.breaker.record_success()
+        with self._lock:
+            self._last_good[key] = (data, datetime.now())
+        return data, None
+
+    def _fallback(self, key, reason):
+        with self._lock:
+            last_good = self._last_good.get(key)
+        if last_good is None:
+            raise ApiUnavailableError(f"Operations API unavailable: {reason}")
+        self._count(key[0], "stale")
+        return last_good
+
+    def _count(self, path, outcome):
+        with self._lock:
+            self._requests[(path, outcome)] = self._requests.get((path, outcome), 0) + 1
+
+    def _observe(self, path, outcome, seconds):
+        with self._lock:
+            self._requests[(path, outcome)] = self._requests.get((path, outcome), 0) + 1
+            buckets = self._latency_buckets.setdefault(path, [0] * len(LATENCY_BUCKETS_SECONDS))
+            for i, bound in enumerate(LATENCY_BUCKETS_SECONDS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            self._latency_sum[path] = self._latency_sum.get(path, 0.0) + seconds
+            self._latency_count[path] = self._latency_count.get(path, 0) + 1
+
+    def render_metrics(self):
+        with self._lock:
+            lines = [
+                "# HELP dashboard_api_requests_total Operations API calls by outcome "
+                "(ok, error, short_circuit, stale = served from the last good response).",
+                "# TYPE dashboard_api_requests_total counter",
+            ]
+            for (path, outcome), count in sorted(self._requests.items()):
+                lines.append(f'dashboard_api_requests_total{{endpoint="{path}",outcome="{outcome}"}} {count}')
+            lines += [
+                "# HELP dashboard_api_request_duration_seconds Operations API call latency.",
+                "# TYPE dashboard_api_request_duration_seconds histogram",
+            ]
+            for path, buckets in sorted(self._latency_buckets.items()):
+                for bound, count in zip(LATENCY_BUCKETS_SECONDS, buckets):
+                    lines.append(f'dashboard_api_request_duration_seconds_bucket{{endpoint="{path}",le="{bound}"}} {count}')
+                lines.append(f'dashboard_api_request_duration_seconds_bucket{{endpoint="{path}",le="+Inf"}} '
+                             f'{self._latency_count[path]}')
+                lines.append(f'dashboard_api_request_duration_seconds_sum{{endpoint="{path}"}} {self._latency_sum[path]}')
+                lines.append(f'dashboard_api_request_duration_seconds_count{{endpoint="{path}"}} {self._latency_count[path]}')
+        lines += [
+            "# HELP dashboard_api_circuit_open 1 while the circuit breaker short-circuits API calls.",
+            "# TYPE dashboard_api_circuit_open gauge",
+            f"dashboard_api_circuit_open {int(self.breaker.state == 'open')}",
+        ]
+        return "\n".join(lines) + "\n"
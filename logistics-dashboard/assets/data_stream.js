@@ -0,0 +1,91 @@
+// Bridges the Operations API metric stream (/api/stream, Server-Sent Events)
+// into Dash. Each connection starts with a 'snapshot' event holding every
+// metric; 'delta' events then carry only what changed and are merged into it
+// here. The clientside callback below writes the result into the
+// 'metrics-snapshot' store whenever the data_version moves, so the panels
+// update without the dashboard server fetching anything.
+(function () {
+    const stream = {source: null, connected: false, version: null, snapshot: null};
+
+    function applyDelta(snapshot, delta) {
+        // Mirrors operations_api.diff_stream_snapshots: a removed partner is null.
+        const partners = Object.assign({}, snapshot.partners);
+        Object.keys(delta.partners || {}).forEach(function (partner) {
+            if (delta.partners[partner] === null) {
+                delete partners[partner];
+            } else {
+                partners[partner] = delta.partners[partner];
+            }
+        });
+        return {
+            daily_summary: 'daily_summary' in delta ? delta.daily_summary : snapshot.daily_summary,
+            partners: partners
+        };
+    }
+
+    function compactSnapshot(snapshot) {
+        // Same shape as live_dashboard.compact_snapshot(), for DASHBOARD_RENDER_MODE=client.
+        const summary = snapshot.daily_summary;
+        const partners = {};
+        Object.keys(snapshot.partners).forEach(function (partner) {
+            const metrics = snapshot.partners[partner].shipment_metrics;
+            partners[partner] = {
+                total: metrics.total_shipments_with_partner,
+                delivered: metrics.delivered_by_partner,
+                on_time_pct: metrics.on_time_delivery_percent_partner,
+                health: snapshot.partners[partner].partner_service_health_summary
+            };
+        });
+        return {
+            summary: summary && {
+                total: summary.total_shipments_logged,
+                in_transit: summary.shipments_in_transit,
+                delivered: summary.delivered_shipments,
+                on_time_pct: summary.on_time_delivery_percent,
+                mpg: summary.average_fleet_mpg
+            },
+            partners: partners
+        };
+    }
+
+    function openStream(url) {
+        if (stream.source || !window.EventSource) {
+            return;
+        }
+        stream.source = new EventSource(url);
+        stream.source.onopen = function () {
+            stream.connected = true;
+        };
+        stream.source.onerror = function () {
+            // EventSource reconnects by itself and the server starts the new
+            // connection with a fresh snapshot; fall back to polling meanwhile.
+            stream.connected = false;
+        };
+        stream.source.addEventListener('snapshot', function (event) {
+            stream.snapshot = JSON.parse(event.data);
+            stream.version = Number(event.lastEventId);
+        });
+        stream.source.addEventListener('delta', function (event) {
+            if (stream.snapshot === null) {
+                return;
+            }
+            stream.snapshot = applyDelta(stream.snapshot, JSON.parse(event.data));
+            stream.version = Number(event.lastEventId);
+        });
+    }
+
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.maverick = Object.assign({}, window.dash_clientside.maverick, {
+        // Outputs: [metrics-snapshot.data, data-version-store.data, interval-component.disabled]
+        syncStreamSnapshot: function (n, config, currentVersion, pollingDisabled) {
+            const noUpdate = window.dash_clientside.no_update;
+            openStream(config.url);
+            const changed = stream.snapshot !== null && stream.version !== currentVersion;
+            return [
+                changed ? (config.compact ? compactSnapshot(stream.snapshot) : stream.snapshot) : noUpdate,
+                changed ? stream.version : noUpdate,
+                stream.connected !== pollingDisabled ? stream.connected : noUpdate
+            ];
+        }
+    });
+})();
@@ -0,0 +1,115 @@
+// Client render mode (DASHBOARD_RENDER_MODE=client): builds the KPI cards and
+// chart figures from the compact 'metrics-snapshot' store in the browser, so
+// the Dash server only serializes a few hundred bytes of numbers per refresh.
+// Mirrors the server-mode callbacks in live_dashboard.py.
+(function () {
+    function component(type, children, props, namespace) {
+        return {
+            type: type,
+            namespace: namespace || 'dash_html_components',
+            props: Object.assign({children: children}, props || {})
+        };
+    }
+
+    function p(text, className) {
+        return component('P', text, {className: className});
+    }
+
+    function alert(text, color) {
+        return component('Alert', text, {color: color}, 'dash_bootstrap_components');
+    }
+
+    function show(value) {
+        return value === null || value === undefined ? 'N/A' : value;
+    }
+
+    function titledLayout(figure, title) {
+        // Keep whatever layout Plotly already holds (zoom, size) and only swap the data.
+        const layout = Object.assign({}, (figure && figure.layout) || {});
+        layout.title = {text: title};
+        return layout;
+    }
+
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.maverick = Object.assign({}, window.dash_clientside.maverick, {
+        renderSummary: function (snapshot) {
+            if (!snapshot) {
+                return window.dash_clientside.no_update;
+            }
+            if (snapshot.error || !snapshot.summary) {
+                return alert('Error fetching daily summary: ' + (snapshot.error || 'No summary data available'), 'danger');
+            }
+            const s = snapshot.summary;
+            const items = [
+                p('Total Shipments Logged: ' + show(s.total), 'card-text'),
+                p('Shipments In-Transit: ' + show(s.in_transit), 'card-text'),
+                p('Delivered Shipments: ' + show(s.delivered), 'card-text'),
+                component('H4', show(s.on_time_pct) + '%', {className: 'card-title text-success'}),
+                p('On-Time Delivery Rate', 'card-text text-muted small'),
+                p('Average Fleet MPG: ' + show(s.mpg), 'card-text mt-2')
+            ];
+            if (snapshot.stale_since) {
+                items.push(p('Operations API unavailable - showing data from ' + snapshot.stale_since,
+                             'card-text text-warning small'));
+            }
+            return items;
+        },
+
+        renderPartnerChart: function (snapshot, figure, config) {
+            if (!snapshot) {
+                return window.dash_clientside.no_update;
+            }
+            if (snapshot.error) {
+                return {data: [], layout: titledLayout(figure, 'Error: ' + snapshot.error)};
+            }
+            const totals = config.partners.map(function (partner) {
+                const status = snapshot.partners[partner];
+                return status ? status.total : 0;
+            });
+            const layout = titledLayout(figure, 'Shipments by Partner');
+            layout.showlegend = false;
+            layout.yaxis = {title: {text: 'Number of Shipments'}};
+            return {
+                data: [{type: 'bar', x: config.partners, y: totals,
+                        marker: {color: config.partners.map(function (_, i) {
+                            return config.colorway[i % config.colorway.length];
+                        })}}],
+                layout: layout
+            };
+        },
+
+        renderPartnerDetails: function (partner, snapshot, config) {
+            const noUpdate = window.dash_clientside.no_update;
+            if (!partner) {
+                return [alert('Select partner.', 'info'), {data: [], layout: {}}];
+            }
+            if (!snapshot) {
+                return [noUpdate, noUpdate];
+            }
+            const status = snapshot.partners && snapshot.partners[partner];
+            if (snapshot.error || !status) {
+                const message = 'Error: ' + (snapshot.error || 'No data found for partner: ' + partner);
+                return [alert(message, 'danger'), {data: [], layout: {title: {text: message}}}];
+            }
+            const kpis = [
+                p('Total Shipments: ' + show(status.total), 'card-text'),
+                p('Delivered: ' + show(status.delivered), 'card-text'),
+                component('H4', show(status.on_time_pct) + '%', {className: 'card-title text-info'}),
+                p('Partner On-Time Delivery', 'card-text text-muted small')
+            ];
+            const labels = Object.keys(status.health || {}).filter(function (k) { return status.health[k] > 0; });
+            if (!labels.length) {
+                return [kpis, {data: [], layout: {
+                    title: {text: 'No Service Health Data'},
+                    annotations: [{text: 'No Data', x: 0.5, y: 0.5, font: {size: 20}, showarrow: false}]
+                }}];
+            }
+            return [kpis, {
+                data: [{type: 'pie', labels: labels,
+                        values: labels.map(function (k) { return status.health[k]; }),
+                        marker: {colors: labels.map(function (k) { return config.health_colors[k]; })}}],
+                layout: {title: {text: 'Simulated Service Health'}, legend: {title: {text: 'Service Status'}}}
+            }];
+        }
+    });
+})();
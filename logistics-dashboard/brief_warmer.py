@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+BRIEF_WARM_CONCURRENCY = 3
+BRIEF_WARM_MAX_RETRIES = 4
+BRIEF_WARM_BACKOFF_SECONDS = 2.0
+
+
+def is_rate_limited(error):
+    # google.genai raises errors.ClientError with code 429 / RESOURCE_EXHAUSTED.
+    return getattr(error, 'code', None) == 429 or 'RESOURCE_EXHAUSTED' in str(error)
+
+
+def contract_hash(contract_text):
+    return hashlib.sha256(contract_text.encode('utf-8')).hexdigest()
+
+
+class BriefWarmer:
+    """Generates per-partner briefs in the background and keeps them in memory.
+
+    `generate(partner_name, contract_text)` returns the brief text and may block
+    on the model. At most `concurrency` briefs are generated at once. A rate
+    limit error pauses every worker for an exponentially growing backoff before
+    the brief is retried. Entries remember the contract they were generated
+    from; asking for a partner whose contract has changed, or whose brief has
+    been ready for `ttl_seconds` (None = never expires), starts a new brief.
+    """
+
+    def __init__(self, generate, concurrency=BRIEF_WARM_CONCURRENCY, max_retries=BRIEF_WARM_MAX_RETRIES,
+                 backoff_seconds=BRIEF_WARM_BACKOFF_SECONDS, ttl_seconds=None, clock=time.monotonic):
+        self.generate = generate
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.stats = {"generated": 0, "failed": 0, "rate_limited": 0, "expired": 0}
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="brief-warmer")
+        self._entries = {}  # partner -> {"contract": hash, "status", "text", "error", "ready_at", "future"}
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def warm(self, contracts):
+        """Queue a brief for every partner without a current one; returns the queued partners."""
+        return [partner for partner, contract_text in contracts.items()
+                if self._submit(partner, contract_text, retry_failed=True)]
+
+    def get(self, partner_name, contract_text, retry_failed=False):
+        """Current entry for the partner: status "ready", "generating" or "error".
+
+        Never blocks. A missing or outdated brief is queued, as is a failed one
+        when `retry_failed` is set; a retried entry keeps its error for display.
+        """
+        self._submit(partner_name, contract_text, retry_failed)
+        with self._lock:
+            entry = self._entries[partner_name]
+            return {"status": entry["status"], "text": entry["text"], "error": entry["error"]}
+
+    def _submit(self, partner_name, contract_text, retry_failed):
+        key = contract_hash(contract_text)
+        with self._lock:
+            entry = self._entries.get(partner_name)
+            current = entry is not None and entry["contract"] == key
+            expired = current and entry["status"] == "ready" and self.ttl_seconds is not None \
+                and self.clock() - entry["ready_at"] >= self.ttl_seconds
+            if current and not expired and (entry["status"] != "error" or not retry_failed):
+                return False
+            if expired:
+                self.stats["expired"] += 1
+            error = entry["error"] if current else None
+            entry = {"contract": key, "status": "generating", "text": None, "error": error, "ready_at": None}
+            self._entries[partner_name] = entry
+            entry["future"] = self._executor.submit(self._run, partner_name, contract_text, key)
+        print(f"[INFO] Generating compliance brief for {partner_name} in the background.")
+        return True
+
+    def _run(self, partner_name, contract_text, key):
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_cooldown()
+            try:
+                text = self.generate(partner_name, contract_text)
+            except Exception as e:
+                if is_rate_limited(e) and attempt < self.max_retries:
+                    delay = self.backoff_seconds * 2 ** attempt
+                    with self._lock:
+                        self.stats["rate_limited"] += 1
+                        self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                    print(f"[WARNING] Gemini rate limit while generating brief for {partner_name}; "
+                          f"retrying in {delay:.1f}s.")
+                    continue
+                print(f"[ERROR] Compliance brief for {partner_name} failed: {e}")
+                self._finish(partner_name, key, "error", None, str(e))
+                return
+            self._finish(partner_name, key, "ready", text, None)
+            return
+
+    def _finish(self, partner_name, key, status, text, error):
+        with self._lock:
+            self.stats["generated" if status == "ready" else "failed"] += 1
+            entry = self._entries.get(partner_name)
+            # A newer contract may have replaced this entry while the brief was generating.
+            if entry is not None and entry["contract"] == key:
+                entry.update(status=status, text=text, error=error, ready_at=self.clock())
+
+    def _wait_for_cooldown(self):
+        while True:
+            with self._lock:
+                remaining = self._cooldown_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def render_metrics(self, prefix="compliance_brief_warmer"):
+        with self._lock:
+            stats = dict(self.stats)
+            generating = sum(entry["status"] == "generating" for entry in self._entries.values())
+        lines = []
+        for name, help_text in (("generated", "Briefs generated in the background."),
+                                ("failed", "Briefs that failed after retries."),
+                                ("rate_limited", "Rate limit errors that triggered a backoff."),
+                                ("expired", "Ready briefs regenerated after their TTL.")):
+            lines += [
+                f"# HELP {prefix}_{name}_total {help_text}",
+                f"# TYPE {prefix}_{name}_total counter",
+                f"{prefix}_{name}_total {stats[name]}",
+            ]
+        lines += [
+            f"# HELP {prefix}_generating Briefs currently queued or generating.",
+            f"# TYPE {prefix}_generating gauge",
+            f"{prefix}_generating {generating}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def wait(self, timeout=None):
+        """Block until every queued brief has finished (for tests and benchmarks)."""
+        with self._lock:
+            futures = [entry["future"] for entry in self._entries.values()]
+        wait(futures, timeout=timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
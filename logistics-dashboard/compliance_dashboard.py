@@ -1,10 +1,24 @@
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
+from flask import Response
 import os
+import uuid
 
 from google import genai
+from brief_warmer import BriefWarmer, contract_hash
+from llm_cache import LLMResponseCache
+from llm_streams import LLMStreams, QueueFullError, UserQueueFullError
+from semantic_cache import SemanticCache
+
+GEMINI_MODEL = "gemini-2.5-flash"
+# How often the output area re-renders a brief that is generating or an analysis that is streaming.
+OUTPUT_POLL_INTERVAL_MS = 300
+# Briefs depend only on the model, prompt and contract text, so repeat clicks
+# are answered from disk; see llm_cache for TTL, LRU and invalidation.
+brief_cache = LLMResponseCache()
 
 GEMINI_READY = False
 try:
@@ -44,124 +58,245 @@ SIMULATED_CONTRACTS = {
 AVAILABLE_PARTNERS_LIST = list(SIMULATED_CONTRACTS.keys())
 
 
-def get_partner_compliance_brief_for_dashboard(partner_name):
+def generate_compliance_brief(partner_name, contract_snippet):
+    # Runs on a brief_warmer worker thread; errors are recorded on the brief entry.
+    prompt = f"""You are an AI assistant for Maverick Logistics. Given the contract snippet for '{partner_name}': --- {contract_snippet} --- Generate a "Quick Compliance Brief" highlighting 3-4 most critical operational "Must Do's" or "Key Obligations". Present as actionable bullet points. Be concise."""
+    cached_brief = brief_cache.get(GEMINI_MODEL, prompt, contract_snippet)
+    if cached_brief is not None:
+        return cached_brief
+    response = client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
+    brief_cache.put(GEMINI_MODEL, prompt, contract_snippet, response.text)
+    return response.text
+
+
+# Briefs for every partner are generated in the background (at startup and
+# whenever a contract changes), so button clicks are served from memory.
+# Briefs expire from memory with the LLM cache's TTL, so a long-running dashboard picks up fresh ones.
+brief_warmer = BriefWarmer(generate_compliance_brief, ttl_seconds=brief_cache.ttl_seconds)
+
+
+def compliance_brief_view(partner_name, retry_failed=True):
+    """(component, generating) for the partner's brief; never waits on Gemini."""
     if not GEMINI_READY:
-        return dcc.Markdown("Gemini API not ready.")
+        return dcc.Markdown("Gemini API not ready."), False
     if partner_name not in SIMULATED_CONTRACTS:
-        return dcc.Markdown(f"No contract for {partner_name}")
-    contract_snippet = SIMULATED_CONTRACTS[partner_name]
-    prompt = f"""You are an AI assistant for Maverick Logistics. Given the contract snippet for '{partner_name}': --- {contract_snippet} --- Generate a "Quick Compliance Brief" highlighting 3-4 most critical operational "Must Do's" or "Key Obligations". Present as actionable bullet points. Be concise."""
-    try:
-        response = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
-        return dcc.Markdown(response.text)
-    except Exception as e:
-        return dcc.Markdown(f"Error with Gemini: {e}")
+        return dcc.Markdown(f"No contract for {partner_name}"), False
+    brief = brief_warmer.get(partner_name, SIMULATED_CONTRACTS[partner_name], retry_failed)
+    if brief["status"] == "ready":
+        return dcc.Markdown(brief["text"]), False
+    if brief["status"] == "error":
+        return dcc.Markdown(f"Error with Gemini: {brief['error']}"), False
+    notice = "Generating the brief with Gemini; it will appear here shortly."
+    if brief["error"]:
+        notice = f"Retrying after an error with Gemini: {brief['error']}"
+    return dbc.Alert([dbc.Spinner(size="sm", spinner_class_name="me-2"), notice], color="info"), True
+
+
+def get_partner_compliance_brief_for_dashboard(partner_name):
+    return compliance_brief_view(partner_name)[0]
+
 
+# Scenario analyses stream from Gemini through a bounded job queue (global and
+# per-user limits, identical prompts share one call); the output area polls them.
+scenario_streams = LLMStreams()
+# Near-duplicate scenarios for the same partner and contract reuse a finished analysis.
+scenario_cache = SemanticCache()
 
-def analyze_scenario_compliance_for_dashboard(partner_name, operational_scenario):
+
+def start_scenario_analysis(partner_name, operational_scenario, client_id=None):
+    """(component, stream_id): starts streaming the analysis and returns at once.
+    stream_id is None when there is nothing to stream (a validation message)."""
     if not GEMINI_READY:
-        return dcc.Markdown("Gemini API not ready.")
+        return dcc.Markdown("Gemini API not ready."), None
     if partner_name not in SIMULATED_CONTRACTS:
-        return dcc.Markdown(f"No contract for {partner_name}")
+        return dcc.Markdown(f"No contract for {partner_name}"), None
     if not operational_scenario.strip():
-        return dcc.Markdown("Please provide an operational scenario.")
+        return dcc.Markdown("Please provide an operational scenario."), None
     contract_snippet = SIMULATED_CONTRACTS[partner_name]
+    cache_namespace = (GEMINI_MODEL, partner_name, contract_hash(contract_snippet))
+    cached = scenario_cache.lookup(cache_namespace, operational_scenario)
+    if cached is not None:
+        return cached_analysis_view(*cached), None
     prompt = f"""You are an AI compliance analyst for Maverick Logistics. Contract with '{partner_name}': --- {contract_snippet} --- Scenario: "{operational_scenario}" --- Based *only* on the contract and scenario: 1. Potential breaches/obligations (e.g., notifications, penalties)? 2. Immediate actions for Maverick staff per contract? 3. If no implications, state so. Be specific."""
     try:
-        response = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
-        return dcc.Markdown(response.text)
-    except Exception as e:
-        return dcc.Markdown(f"Error with Gemini: {e}")
+        stream_id = scenario_streams.start(
+            lambda: client.models.generate_content_stream(model=GEMINI_MODEL, contents=prompt),
+            user=client_id, key=(GEMINI_MODEL, prompt),
+            on_complete=lambda text: scenario_cache.store(cache_namespace, operational_scenario, text))
+    except UserQueueFullError as e:
+        print(f"[WARNING] Scenario analysis rejected, user queue share full: {e}")
+        return dcc.Markdown(f"You already have {scenario_streams.max_queued_per_user} analyses waiting. "
+                            "Please wait for them to finish before starting another."), None
+    except QueueFullError as e:
+        print(f"[WARNING] Scenario analysis rejected, queue full: {e}")
+        return dcc.Markdown(f"The assistant is at capacity ({scenario_streams.max_queued} analyses queued). "
+                            "Please try again in a minute."), None
+    return scenario_analysis_view(stream_id)[0], stream_id
+
+
+def cached_analysis_view(analysis, cached_scenario, similarity):
+    return html.Div([
+        html.P([dbc.Badge("Cached", color="secondary", className="me-2"),
+                f'Reused the analysis of a similar scenario ({similarity:.0%} match): "{cached_scenario}"'],
+               className="small text-muted mb-2"),
+        dcc.Markdown(analysis),
+    ])
+
+
+def scenario_analysis_view(stream_id):
+    """(component, streaming) for the text streamed so far."""
+    stream = scenario_streams.get(stream_id)
+    if stream is None:
+        return dcc.Markdown("This analysis has expired. Please run it again."), False
+    if stream["error"]:
+        return dcc.Markdown(f"{stream['text']}\n\nError with Gemini: {stream['error']}".lstrip()), False
+    if stream["done"]:
+        return dcc.Markdown(stream["text"]), False
+    if stream["status"] == "queued":
+        return dbc.Alert([dbc.Spinner(size="sm", spinner_class_name="me-2"),
+                          f"Queued at position {stream['position']}; the analysis starts automatically."],
+                         color="secondary"), True
+    if not stream["text"]:
+        return dbc.Alert([dbc.Spinner(size="sm", spinner_class_name="me-2"), "Waiting for Gemini..."],
+                         color="info"), True
+    return dcc.Markdown(stream["text"] + " ▌"), True
 
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "Maverick Compliance Assistant"
 
-app.layout = dbc.Container([
-    dbc.Row(dbc.Col(html.H1("Maverick Partner Compliance Assistant", className="text-center text-primary my-4"))),
-
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Select Partner & Action"),
-                dbc.CardBody([
-                    dbc.Label("Partner Name:"),
-                    dcc.Dropdown(
-                        id='gemini-partner-dropdown',
-                        options=[{'label': partner, 'value': partner} for partner in AVAILABLE_PARTNERS_LIST],
-                        value=AVAILABLE_PARTNERS_LIST[0],
-                        className="mb-3"
-                    ),
-                    dbc.Button("Get Quick Compliance Brief", id="btn-get-brief", color="info", className="me-2 mb-2", n_clicks=0),
-                    html.Hr(),
-                    dbc.Label("Operational Scenario (Optional):"),
-                    dcc.Textarea(
-                        id='gemini-scenario-input',
-                        placeholder="Describe an operational scenario here...",
-                        style={'width': '100%', 'height': 100},
-                        className="mb-3"
-                    ),
-                    dbc.Button("Analyze Scenario Compliance", id="btn-analyze-scenario", color="success", className="mb-2", n_clicks=0),
-                ])
-            ], className="mb-4")
-        ], width=12, md=5),
-
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Gemini AI Analysis"),
-                dbc.CardBody(id='gemini-output-area', children=[
-                    dbc.Alert("Select an action and partner to see results.", color="secondary")
-                ])
-            ])
-        ], width=12, md=7)
-    ]),
-    dbc.Row(dbc.Col(html.P(
-        "Note: This is a Proof of Concept using simulated contract data and Google's Gemini AI.",
-        className="text-muted small text-center mt-4"
-    )))
-
-], fluid=True, className="p-3")
+
+@app.server.route('/metrics')
+def compliance_metrics():
+    return Response(brief_cache.render_metrics() + brief_warmer.render_metrics() + scenario_streams.render_metrics()
+                    + scenario_cache.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+def serve_layout():
+    # A function, so every page load gets its own client id for the per-user LLM limits.
+    return dbc.Container([
+        dbc.Row(dbc.Col(html.H1("Maverick Partner Compliance Assistant", className="text-center text-primary my-4"))),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Select Partner & Action"),
+                    dbc.CardBody([
+                        dbc.Label("Partner Name:"),
+                        dcc.Dropdown(
+                            id='gemini-partner-dropdown',
+                            options=[{'label': partner, 'value': partner} for partner in AVAILABLE_PARTNERS_LIST],
+                            value=AVAILABLE_PARTNERS_LIST[0],
+                            className="mb-3"
+                        ),
+                        dbc.Button("Get Quick Compliance Brief", id="btn-get-brief", color="info", className="me-2 mb-2", n_clicks=0),
+                        html.Hr(),
+                        dbc.Label("Operational Scenario (Optional):"),
+                        dcc.Textarea(
+                            id='gemini-scenario-input',
+                            placeholder="Describe an operational scenario here...",
+                            style={'width': '100%', 'height': 100},
+                            className="mb-3"
+                        ),
+                        dbc.Button("Analyze Scenario Compliance", id="btn-analyze-scenario", color="success", className="mb-2", n_clicks=0),
+                    ])
+                ], className="mb-4")
+            ], width=12, md=5),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Gemini AI Analysis"),
+                    dbc.CardBody(id='gemini-output-area', children=[
+                        dbc.Alert("Select an action and partner to see results.", color="secondary")
+                    ])
+                ]),
+                # Re-renders a generating brief or a streaming analysis until it is complete.
+                dcc.Interval(id='gemini-poll-interval', interval=OUTPUT_POLL_INTERVAL_MS, disabled=True),
+                dcc.Store(id='gemini-pending-output'),
+                dcc.Store(id='gemini-client-id', data=uuid.uuid4().hex)
+            ], width=12, md=7)
+        ]),
+        dbc.Row(dbc.Col(html.P(
+            "Note: This is a Proof of Concept using simulated contract data and Google's Gemini AI.",
+            className="text-muted small text-center mt-4"
+        )))
+
+    ], fluid=True, className="p-3")
+
+
+app.layout = serve_layout
+
+
+# Each renderer returns (output, poll interval disabled, pending output to poll).
+def render_brief(partner_name, retry_failed=True):
+    component, generating = compliance_brief_view(partner_name, retry_failed)
+    return (html.Div([html.H4(f"Compliance Brief: {partner_name}"), component]),
+            not generating, {"brief": partner_name} if generating else None)
+
+
+def render_scenario_analysis(partner_name, scenario_text, component, stream_id, streaming):
+    return (html.Div([html.H4(f"Scenario Analysis: {partner_name}"),
+                      html.P(f"Scenario: {scenario_text}", className="fst-italic mb-2"),
+                      component]),
+            not streaming,
+            {"stream": stream_id, "partner": partner_name, "scenario": scenario_text} if streaming else None)
 
 
 @app.callback(
-    Output('gemini-output-area', 'children'),
+    [Output('gemini-output-area', 'children'),
+     Output('gemini-poll-interval', 'disabled'),
+     Output('gemini-pending-output', 'data')],
     [Input('btn-get-brief', 'n_clicks'),
-     Input('btn-analyze-scenario', 'n_clicks')],
+     Input('btn-analyze-scenario', 'n_clicks'),
+     Input('gemini-poll-interval', 'n_intervals')],
     [State('gemini-partner-dropdown', 'value'),
-     State('gemini-scenario-input', 'value')],
+     State('gemini-scenario-input', 'value'),
+     State('gemini-pending-output', 'data'),
+     State('gemini-client-id', 'data')],
     prevent_initial_call=True
 )
-def update_gemini_output(n_brief, n_analyze, selected_partner, scenario_text):
+def update_gemini_output(n_brief, n_analyze, n_poll, selected_partner, scenario_text, pending, client_id):
     ctx = dash.callback_context
     if not ctx.triggered:
-        return dbc.Alert("Please select an action.", color="info")
+        return dbc.Alert("Please select an action.", color="info"), True, None
 
     button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
+    if button_id == 'gemini-poll-interval':
+        if not pending:
+            raise PreventUpdate
+        if "brief" in pending:
+            # Polling only shows a failure; a click on the button retries it.
+            return render_brief(pending["brief"], retry_failed=False)
+        component, streaming = scenario_analysis_view(pending["stream"])
+        return render_scenario_analysis(pending["partner"], pending["scenario"], component,
+                                        pending["stream"], streaming)
+
     if not GEMINI_READY:
-        return dbc.Alert("Gemini API is not configured. Please set GEMINI_API_KEY environment variable.", color="danger")
+        return dbc.Alert("Gemini API is not configured. Please set GEMINI_API_KEY environment variable.", color="danger"), True, None
 
     if not selected_partner:
-        return dbc.Alert("Please select a partner.", color="warning")
+        return dbc.Alert("Please select a partner.", color="warning"), True, None
 
     if button_id == 'btn-get-brief':
         print(f"[DASH INFO] Getting brief for {selected_partner}")
-        return html.Div([html.H4(f"Compliance Brief: {selected_partner}"),
-                         get_partner_compliance_brief_for_dashboard(selected_partner)])
+        return render_brief(selected_partner)
 
     elif button_id == 'btn-analyze-scenario':
         if not scenario_text or not scenario_text.strip():
-            return dbc.Alert("Please enter an operational scenario to analyze.", color="warning")
+            return dbc.Alert("Please enter an operational scenario to analyze.", color="warning"), True, None
         print(f"[DASH INFO] Analyzing scenario for {selected_partner}: {scenario_text[:50]}...")
-        return html.Div([html.H4(f"Scenario Analysis: {selected_partner}"),
-                         html.P(f"Scenario: {scenario_text}", className="fst-italic mb-2"),
-                         analyze_scenario_compliance_for_dashboard(selected_partner, scenario_text)])
+        component, stream_id = start_scenario_analysis(selected_partner, scenario_text, client_id)
+        return render_scenario_analysis(selected_partner, scenario_text, component, stream_id,
+                                        stream_id is not None)
 
-    return dbc.Alert("No action selected or error.", color="light")
+    return dbc.Alert("No action selected or error.", color="light"), True, None
 
 
 if __name__ == '__main__':
     if not GEMINI_READY:
         print("\n[CRITICAL] Gemini API key not configured. The dashboard will load but AI features will not work.")
         print("Please set the GEMINI_API_KEY environment variable and restart.")
+    else:
+        brief_warmer.warm(SIMULATED_CONTRACTS)
     app.run_server(debug=False, host='127.0.0.1', port=8051)
@@ -1,12 +1,43 @@
+import argparse
+import hashlib
+import io
+import math
+import os
+import sys
+import time
+import numpy as np
 import pandas as pd
 import requests
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 SHIPMENTS_LOG_CSV = 'shipments.csv'
 PARTNER_TASKS_API_URL = "https://jsonplaceholder.typicode.com/todos"
 DATABASE_NAME = 'maverick_operational_data.db'
 
+PARTNER_FETCH_CONCURRENCY = 8
+PARTNER_FETCH_TIMEOUT = (3.05, 10)  # (connect, read) seconds per attempt
+PARTNER_FETCH_RETRIES = 2
+PARTNER_FETCH_BACKOFF_SECONDS = 0.5
+PARTNER_FETCH_BATCH_TIMEOUT = 30
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+DB_BUSY_TIMEOUT_SECONDS = 30
+SHIPMENTS_CHUNK_SIZE = 50_000
+# Bytes hashed at each end of the already-ingested region to tell an append from a rewrite.
+WATERMARK_FINGERPRINT_BYTES = 64 * 1024
+
+SHIPMENT_COLUMNS = ['shipment_id', 'log_date', 'vehicle_id', 'driver_id', 'partner_contract',
+                    'origin_city', 'destination_city', 'load_type', 'package_count', 'shipment_value_usd',
+                    'planned_departure_datetime', 'actual_departure_datetime', 'planned_arrival_datetime',
+                    'actual_arrival_datetime', 'miles_driven', 'fuel_consumed_gallons',
+                    'fuel_efficiency_mpg', 'delivery_status', 'on_time_status_reported',
+                    'on_time_status_calculated', 'notes']
+NUMERIC_SHIPMENT_COLUMNS = ['package_count', 'shipment_value_usd', 'miles_driven', 'fuel_consumed_gallons']
+
+ON_TIME_GRACE_PERIOD = pd.Timedelta(minutes=15)
+
 PARTNER_ID_TO_NAME_MAP = {
     1: "Amazon-Prime",
     2: "Hertz-Local",
@@ -22,73 +53,488 @@ def calculate_on_time_status(planned_arrival_str, actual_arrival_str, delivery_s
     try:
         planned = datetime.fromisoformat(planned_arrival_str)
         actual = datetime.fromisoformat(actual_arrival_str)
-        if actual <= planned + pd.Timedelta(minutes=15):
+        if actual <= planned + ON_TIME_GRACE_PERIOD:
             return "On-Time"
         else:
             return "Late"
     except ValueError:
         return "Error"
 
-def create_db_tables(conn):
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS daily_shipments (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        shipment_id TEXT UNIQUE,
-        log_date TEXT,
-        vehicle_id TEXT,
-        driver_id TEXT,
-        partner_contract TEXT,
-        origin_city TEXT,
-        destination_city TEXT,
-        load_type TEXT,
-        package_count INTEGER,
-        shipment_value_usd REAL,
-        planned_departure_datetime TEXT,
-        actual_departure_datetime TEXT,
-        planned_arrival_datetime TEXT,
-        actual_arrival_datetime TEXT,
-        miles_driven REAL,
-        fuel_consumed_gallons REAL,
-        fuel_efficiency_mpg REAL,
-        delivery_status TEXT,
-        on_time_status_reported TEXT,
-        on_time_status_calculated TEXT,
-        notes TEXT
-    )
-    ''')
+# Timestamps shaped YYYY-MM-DDTHH:MM:SS[.ffffff] parse identically with pandas and
+# datetime.fromisoformat; anything else goes through calculate_on_time_status.
+_CANONICAL_TIMESTAMP_WIDTH = 26
+_CANONICAL_DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_CANONICAL_SEPARATORS = {4: "-", 7: "-", 10: "T", 13: ":", 16: ":"}
+
+def _canonical_timestamp_mask(values):
+    raw = values.to_numpy(dtype=object, na_value="")
+    chars = raw.astype(f"U{_CANONICAL_TIMESTAMP_WIDTH + 1}")
+    codes = chars.view(np.uint32).reshape(len(raw), _CANONICAL_TIMESTAMP_WIDTH + 1)
+    length = np.char.str_len(chars)
+
+    # Unsigned wrap-around turns the 0-9 range check into a single comparison.
+    mask = ((codes[:, _CANONICAL_DIGIT_POSITIONS] - ord("0")) < 10).all(axis=1)
+    for pos, sep in _CANONICAL_SEPARATORS.items():
+        mask &= codes[:, pos] == ord(sep)
+    fraction = codes[:, 20:_CANONICAL_TIMESTAMP_WIDTH]
+    fraction_ok = (((fraction - ord("0")) < 10) | (fraction == 0)).all(axis=1)
+    mask &= (length == 19) | ((length >= 21) & (length <= _CANONICAL_TIMESTAMP_WIDTH)
+                              & (codes[:, 19] == ord(".")) & fraction_ok)
+    return mask
+
+def _parse_canonical_timestamps(values):
+    is_canonical = _canonical_timestamp_mask(values)
+    parsed = pd.to_datetime(values.where(is_canonical), format="ISO8601", errors="coerce")
+    return parsed, is_canonical & parsed.notna().to_numpy()
+
+def calculate_on_time_status_column(planned_arrival, actual_arrival, delivery_status):
+    """Columnar equivalent of calculate_on_time_status for whole DataFrame columns.
+
+    Rows are parsed in bulk and labelled with array masks; the rare rows whose
+    timestamps are not in canonical ISO form fall back to the per-row function.
+    """
+    actual_missing = actual_arrival.isna() | actual_arrival.astype(object).eq("")
+    delivered = delivery_status.eq("Delivered").fillna(False)
+    pending = actual_missing.to_numpy(dtype=bool) | ~delivered.to_numpy(dtype=bool)
+
+    planned, planned_ok = _parse_canonical_timestamps(planned_arrival)
+    actual, actual_ok = _parse_canonical_timestamps(actual_arrival)
+    parsed = planned_ok & actual_ok
+    late = (actual > planned + ON_TIME_GRACE_PERIOD).to_numpy(dtype=bool)
+
+    status = np.where(pending, "Pending", np.where(late, "Late", "On-Time")).astype(object)
+    fallback = np.flatnonzero(~pending & ~parsed)
+    if fallback.size:
+        planned_raw = planned_arrival.to_numpy(dtype=object)
+        actual_raw = actual_arrival.to_numpy(dtype=object)
+        status_raw = delivery_status.to_numpy(dtype=object)
+        for i in fallback:
+            try:
+                status[i] = calculate_on_time_status(planned_raw[i], actual_raw[i], status_raw[i])
+            except TypeError:
+                status[i] = "Error"
+    return pd.Series(status, index=planned_arrival.index, name='on_time_status_calculated')
+
+PARTNER_TASKS_NATURAL_KEY_SQL = '''
+CREATE UNIQUE INDEX IF NOT EXISTS idx_partner_tasks_natural_key
+ON partner_tasks_status (partner_contract, task_source_id)
+'''
+
+# partner_metrics holds one row per partner over all of its shipments, plus a
+# global row (GLOBAL_METRICS_KEY) over the shipments the daily summary reports on.
+GLOBAL_METRICS_KEY = '__all__'
+SUMMARY_DELIVERY_STATUSES = "('Delivered', 'In-Transit')"
+PARTNER_METRICS_TERMS = [
+    # (column, contribution of one NEW/OLD row, aggregate over daily_shipments)
+    ('row_count', "1", "COUNT(*)"),
+    ('shipment_count', "({row}.shipment_id IS NOT NULL)", "COUNT(shipment_id)"),
+    ('delivered_count', "({row}.delivery_status IS 'Delivered')",
+     "COUNT(CASE WHEN delivery_status = 'Delivered' THEN 1 END)"),
+    ('on_time_count', "({row}.on_time_status_calculated IS 'On-Time')",
+     "COUNT(CASE WHEN on_time_status_calculated = 'On-Time' THEN 1 END)"),
+    ('in_transit_count', "({row}.delivery_status IS 'In-Transit')",
+     "COUNT(CASE WHEN delivery_status = 'In-Transit' THEN 1 END)"),
+    ('value_sum', "COALESCE({row}.shipment_value_usd, 0.0)", "TOTAL(shipment_value_usd)"),
+    ('value_count', "({row}.shipment_value_usd IS NOT NULL)", "COUNT(shipment_value_usd)"),
+    ('mpg_sum', "COALESCE({row}.fuel_efficiency_mpg, 0.0)", "TOTAL(fuel_efficiency_mpg)"),
+    ('mpg_count', "({row}.fuel_efficiency_mpg IS NOT NULL)", "COUNT(fuel_efficiency_mpg)"),
+]
+PARTNER_METRICS_COLUMNS = [col for col, _, _ in PARTNER_METRICS_TERMS]
+
+def _metrics_upsert_sql(table, key_column, keys_sql, row, sign):
+    # keys_sql selects the metrics_key rows one NEW/OLD row contributes to.
+    return f'''
+    INSERT INTO {table} ({key_column}, {', '.join(PARTNER_METRICS_COLUMNS)})
+    SELECT metrics_key, {', '.join(sign + term.format(row=row) for _, term, _ in PARTNER_METRICS_TERMS)}
+    FROM ({keys_sql.format(row=row)})
+    WHERE true
+    ON CONFLICT({key_column}) DO UPDATE SET
+        {', '.join(f'{col} = {col} + excluded.{col}' for col in PARTNER_METRICS_COLUMNS)};
+    '''
 
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS partner_tasks_status (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        partner_contract TEXT,
-        task_source_id INTEGER,
-        task_title TEXT,
-        task_completed_status BOOLEAN,
-        simulated_service_health TEXT,
-        log_timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+def _partner_metrics_trigger_sql(row, sign):
+    return _metrics_upsert_sql('partner_metrics', 'partner_contract', (
+        "SELECT {row}.partner_contract AS metrics_key WHERE {row}.partner_contract IS NOT NULL "
+        "UNION ALL "
+        f"SELECT '{GLOBAL_METRICS_KEY}' WHERE {{row}}.delivery_status IN {SUMMARY_DELIVERY_STATUSES}"
+    ), row, sign)
+
+# daily_metrics holds the global-row aggregates per log_date, so a date-range
+# summary reads one row per day however much history daily_shipments holds.
+def _daily_metrics_trigger_sql(row, sign):
+    return _metrics_upsert_sql('daily_metrics', 'log_date', (
+        "SELECT {row}.log_date AS metrics_key WHERE {row}.log_date IS NOT NULL "
+        f"AND {{row}}.delivery_status IN {SUMMARY_DELIVERY_STATUSES}"
+    ), row, sign)
+
+_PARTNER_METRICS_AGGREGATES = ', '.join(aggregate for _, _, aggregate in PARTNER_METRICS_TERMS)
+PARTNER_METRICS_ON_DEMAND_SQL = f'''
+SELECT partner_contract, {_PARTNER_METRICS_AGGREGATES}
+FROM daily_shipments WHERE partner_contract IS NOT NULL GROUP BY partner_contract
+UNION ALL
+SELECT '{GLOBAL_METRICS_KEY}', {_PARTNER_METRICS_AGGREGATES}
+FROM daily_shipments WHERE delivery_status IN {SUMMARY_DELIVERY_STATUSES}
+'''
+DAILY_METRICS_ON_DEMAND_SQL = f'''
+SELECT log_date, {_PARTNER_METRICS_AGGREGATES}
+FROM daily_shipments WHERE log_date IS NOT NULL AND delivery_status IN {SUMMARY_DELIVERY_STATUSES}
+GROUP BY log_date
+'''
+# (rollup table, key column, on-demand SQL producing the same rows)
+METRICS_ROLLUPS = [
+    ('partner_metrics', 'partner_contract', PARTNER_METRICS_ON_DEMAND_SQL),
+    ('daily_metrics', 'log_date', DAILY_METRICS_ON_DEMAND_SQL),
+]
+
+# Ordered, append-only list of (version, description, statements). Never edit a
+# released migration; add a new one. Statements stay idempotent so databases
+# created before versioning existed can adopt the history.
+SCHEMA_MIGRATIONS = [
+    (1, "baseline tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_shipments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            shipment_id TEXT UNIQUE,
+            log_date TEXT,
+            vehicle_id TEXT,
+            driver_id TEXT,
+            partner_contract TEXT,
+            origin_city TEXT,
+            destination_city TEXT,
+            load_type TEXT,
+            package_count INTEGER,
+            shipment_value_usd REAL,
+            planned_departure_datetime TEXT,
+            actual_departure_datetime TEXT,
+            planned_arrival_datetime TEXT,
+            actual_arrival_datetime TEXT,
+            miles_driven REAL,
+            fuel_consumed_gallons REAL,
+            fuel_efficiency_mpg REAL,
+            delivery_status TEXT,
+            on_time_status_reported TEXT,
+            on_time_status_calculated TEXT,
+            notes TEXT,
+            content_hash INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS partner_tasks_status (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            partner_contract TEXT,
+            task_source_id INTEGER,
+            task_title TEXT,
+            task_completed_status BOOLEAN,
+            simulated_service_health TEXT,
+            log_timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS ingest_watermarks (
+            source_file TEXT PRIMARY KEY,
+            byte_offset INTEGER,
+            file_size INTEGER,
+            file_mtime REAL,
+            fingerprint TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (2, "partner task natural key", [PARTNER_TASKS_NATURAL_KEY_SQL]),
+    (3, "covering indexes for Operations API query paths", [
+        # daily_summary: WHERE delivery_status IN (...) aggregating the trailing columns.
+        '''
+        CREATE INDEX IF NOT EXISTS idx_daily_shipments_status_summary
+        ON daily_shipments (delivery_status, on_time_status_calculated, fuel_efficiency_mpg,
+                            shipment_value_usd, shipment_id)
+        ''',
+        # partner_performance/status: WHERE partner_contract = ? aggregating the trailing columns.
+        '''
+        CREATE INDEX IF NOT EXISTS idx_daily_shipments_partner_summary
+        ON daily_shipments (partner_contract, delivery_status, on_time_status_calculated,
+                            shipment_value_usd, shipment_id)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_partner_tasks_health
+        ON partner_tasks_status (partner_contract, simulated_service_health)
+        ''',
+    ]),
+    (4, "partner_metrics rollup maintained by triggers", [
+        f'''
+        CREATE TABLE IF NOT EXISTS partner_metrics (
+            partner_contract TEXT PRIMARY KEY,
+            {', '.join(f"{col} {'REAL' if col.endswith('_sum') else 'INTEGER'} NOT NULL DEFAULT 0"
+                       for col in PARTNER_METRICS_COLUMNS)}
+        )
+        ''',
+        "DELETE FROM partner_metrics",
+        f"INSERT INTO partner_metrics (partner_contract, {', '.join(PARTNER_METRICS_COLUMNS)}) "
+        f"{PARTNER_METRICS_ON_DEMAND_SQL}",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_partner_metrics_insert AFTER INSERT ON daily_shipments
+        BEGIN {_partner_metrics_trigger_sql('NEW', '')} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_partner_metrics_delete AFTER DELETE ON daily_shipments
+        BEGIN {_partner_metrics_trigger_sql('OLD', '-')} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_partner_metrics_update AFTER UPDATE ON daily_shipments
+        BEGIN {_partner_metrics_trigger_sql('OLD', '-')} {_partner_metrics_trigger_sql('NEW', '')} END
+        """,
+    ]),
+    (5, "data_version counter for API cache invalidation", [
+        '''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        ''',
+        "INSERT OR IGNORE INTO data_version (id, version, updated_at) VALUES (1, 1, CURRENT_TIMESTAMP)",
+    ]),
+    (6, "daily_metrics rollup and log_date index for windowed summaries", [
+        f'''
+        CREATE TABLE IF NOT EXISTS daily_metrics (
+            log_date TEXT PRIMARY KEY,
+            {', '.join(f"{col} {'REAL' if col.endswith('_sum') else 'INTEGER'} NOT NULL DEFAULT 0"
+                       for col in PARTNER_METRICS_COLUMNS)}
+        )
+        ''',
+        "DELETE FROM daily_metrics",
+        f"INSERT INTO daily_metrics (log_date, {', '.join(PARTNER_METRICS_COLUMNS)}) {DAILY_METRICS_ON_DEMAND_SQL}",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_insert AFTER INSERT ON daily_shipments
+        BEGIN {_daily_metrics_trigger_sql('NEW', '')} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_delete AFTER DELETE ON daily_shipments
+        BEGIN {_daily_metrics_trigger_sql('OLD', '-')} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_daily_metrics_update AFTER UPDATE ON daily_shipments
+        BEGIN {_daily_metrics_trigger_sql('OLD', '-')} {_daily_metrics_trigger_sql('NEW', '')} END
+        """,
+        # Hourly buckets: WHERE delivery_status IN (...) AND log_date BETWEEN ? AND ?
+        # seeks straight to the window for each reported status.
+        '''
+        CREATE INDEX IF NOT EXISTS idx_daily_shipments_log_date
+        ON daily_shipments (delivery_status, log_date)
+        ''',
+    ]),
+]
+
+def get_schema_version(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TEXT DEFAULT CURRENT_TIMESTAMP
     )
     ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+def apply_migrations(conn):
+    """Apply pending SCHEMA_MIGRATIONS in order, each in its own transaction.
+
+    Stops at the first failing migration so later ones never run against an
+    unexpected schema. Returns the resulting schema version.
+    """
+    current_version = get_schema_version(conn)
     conn.commit()
-    print("[DB INFO] Database tables ensured.")
+    for version, description, statements in SCHEMA_MIGRATIONS:
+        if version <= current_version:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute("INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                         (version, description))
+            conn.commit()
+        except sqlite3.DatabaseError as e:
+            conn.rollback()
+            print(f"[DB ERROR] Migration {version} ({description}) failed: {e}")
+            if isinstance(e, sqlite3.IntegrityError) and version == 2:
+                print("[DB WARNING] 'partner_tasks_status' holds duplicate tasks from earlier runs; "
+                      "run 'python data_ingestion.py --compact-partner-tasks' once to remove them.")
+            break
+        print(f"[DB INFO] Applied schema migration {version}: {description}.")
+        current_version = version
+    return current_version
+
+def get_db_connection():
+    conn = sqlite3.connect(DATABASE_NAME, timeout=DB_BUSY_TIMEOUT_SECONDS)
+    # WAL (persisted in the file) lets Operations API readers keep querying while
+    # ingestion commits; NORMAL sync is durable across application crashes in WAL mode.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+BUMP_DATA_VERSION_SQL = "UPDATE data_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1"
+
+def bump_data_version(conn):
+    # Called after each write path commits; the Operations API drops cached
+    # responses built from an older version.
+    with conn:
+        conn.execute(BUMP_DATA_VERSION_SQL)
+
+def create_db_tables(conn):
+    existing_columns = [row[1] for row in conn.execute("PRAGMA table_info(daily_shipments)")]
+    if existing_columns and 'content_hash' not in existing_columns:
+        # Written by an older to_sql(if_exists='replace') run without the UNIQUE key.
+        # The table is derived from the CSV, so rebuild it and re-ingest from scratch.
+        print("[DB INFO] Rebuilding legacy 'daily_shipments' table.")
+        conn.execute("DROP TABLE daily_shipments")
+        conn.execute("DROP TABLE IF EXISTS ingest_watermarks")
+        conn.commit()
+    schema_version = apply_migrations(conn)
+    print(f"[DB INFO] Database tables ensured (schema version {schema_version}).")
+
+def prepare_shipments_frame(df):
+    # The CSV export calls the carrier-reported label 'on_time_status'.
+    df = df.rename(columns={'on_time_status': 'on_time_status_reported'})
+    for col in NUMERIC_SHIPMENT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['on_time_status_calculated'] = calculate_on_time_status_column(
+        df['planned_arrival_datetime'], df['actual_arrival_datetime'], df['delivery_status']
+    )
+    df['fuel_efficiency_mpg'] = (df['miles_driven'] / df['fuel_consumed_gallons']).round(2)
+    df['fuel_efficiency_mpg'] = df['fuel_efficiency_mpg'].fillna(0)
+    return df[SHIPMENT_COLUMNS]
+
+UPSERT_SHIPMENT_SQL = f'''
+INSERT INTO daily_shipments ({', '.join(SHIPMENT_COLUMNS)}, content_hash)
+VALUES ({', '.join('?' * (len(SHIPMENT_COLUMNS) + 1))})
+ON CONFLICT(shipment_id) DO UPDATE SET
+    {', '.join(f'{col} = excluded.{col}' for col in SHIPMENT_COLUMNS[1:])},
+    content_hash = excluded.content_hash
+WHERE daily_shipments.content_hash IS NOT excluded.content_hash
+'''
 
-def ingest_shipments_data(conn):
+def hash_shipment_rows(raw_df):
+    # Hash the raw CSV fields so the value does not depend on per-chunk dtype inference.
+    return pd.util.hash_pandas_object(raw_df.astype(str), index=False).to_numpy().view(np.int64)
+
+def upsert_shipments_frame(conn, df, content_hash):
+    """Upsert prepared rows on shipment_id; rows whose content hash is unchanged are skipped.
+
+    Returns the number of rows actually inserted or updated.
+    """
+    rows = df.astype(object).where(df.notna(), None)
+    rows['content_hash'] = content_hash.tolist()
+    with conn:
+        # rowcount excludes writes made by the partner_metrics triggers.
+        return conn.executemany(UPSERT_SHIPMENT_SQL, rows.itertuples(index=False, name=None)).rowcount
+
+class _ByteRangeReader(io.RawIOBase):
+    def __init__(self, f, end):
+        self._f = f
+        self._end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._end - self._f.tell())
+        if size <= 0:
+            return 0
+        data = self._f.read(size)
+        buffer[:len(data)] = data
+        return len(data)
+
+def _complete_lines_end(f, size):
+    # Stop at the last newline so a row still being appended is picked up next run.
+    pos = size
+    while pos > 0:
+        start = max(0, pos - WATERMARK_FINGERPRINT_BYTES)
+        f.seek(start)
+        newline = f.read(pos - start).rfind(b"\n")
+        if newline != -1:
+            return start + newline + 1
+        pos = start
+    return 0
+
+def _watermark_fingerprint(f, offset):
+    digest = hashlib.sha256()
+    f.seek(0)
+    digest.update(f.read(min(offset, WATERMARK_FINGERPRINT_BYTES)))
+    tail_start = max(0, offset - WATERMARK_FINGERPRINT_BYTES)
+    f.seek(tail_start)
+    digest.update(f.read(offset - tail_start))
+    return digest.hexdigest()
+
+def _load_watermark(conn, source_file):
+    return conn.execute(
+        "SELECT byte_offset, file_size, file_mtime, fingerprint FROM ingest_watermarks WHERE source_file = ?",
+        (source_file,)
+    ).fetchone()
+
+def _save_watermark(conn, source_file, offset, size, mtime, fingerprint):
+    with conn:
+        conn.execute('''
+        INSERT INTO ingest_watermarks (source_file, byte_offset, file_size, file_mtime, fingerprint, updated_at)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(source_file) DO UPDATE SET
+            byte_offset = excluded.byte_offset, file_size = excluded.file_size,
+            file_mtime = excluded.file_mtime, fingerprint = excluded.fingerprint,
+            updated_at = excluded.updated_at
+        ''', (source_file, offset, size, mtime, fingerprint))
+
+def ingest_shipments_data(conn, chunksize=None, incremental=False):
+    """Load SHIPMENTS_LOG_CSV into daily_shipments.
+
+    With chunksize set, the CSV is streamed: each chunk of rows is derived and
+    written before the next is read, so peak memory is bounded by the chunk size
+    rather than the file size.
+
+    Rows are upserted on shipment_id, keeping the schema from create_db_tables.
+    A full run clears the table first; an incremental run resumes from the
+    per-file byte watermark, so an append-only CSV only costs its new rows.
+    If the file shrank or the already-ingested bytes changed, the whole file is
+    rescanned and rows whose content hash is unchanged are skipped.
+    """
     print(f"\n[INFO] Ingesting shipment data from '{SHIPMENTS_LOG_CSV}'...")
+    source_file = os.path.abspath(SHIPMENTS_LOG_CSV)
     try:
-        df = pd.read_csv(SHIPMENTS_LOG_CSV)
-        df['on_time_status_calculated'] = df.apply(lambda row: calculate_on_time_status(
-            row['planned_arrival_datetime'], row['actual_arrival_datetime'], row['delivery_status']
-        ), axis=1)
-        df['fuel_efficiency_mpg'] = (df['miles_driven'] / df['fuel_consumed_gallons']).round(2)
-        df['fuel_efficiency_mpg'] = df['fuel_efficiency_mpg'].fillna(0)
-        df_to_insert = df[['shipment_id', 'log_date', 'vehicle_id', 'driver_id', 'partner_contract',
-                           'origin_city', 'destination_city', 'load_type', 'package_count', 'shipment_value_usd',
-                           'planned_departure_datetime', 'actual_departure_datetime', 'planned_arrival_datetime',
-                           'actual_arrival_datetime', 'miles_driven', 'fuel_consumed_gallons',
-                           'fuel_efficiency_mpg', 'delivery_status', 'on_time_status_reported',
-                           'on_time_status_calculated', 'notes']]
-        df_to_insert.to_sql('daily_shipments', conn, if_exists='replace', index=False)
-        print(f"[SUCCESS] Ingested {len(df)} shipment records into 'daily_shipments' table.")
+        with open(SHIPMENTS_LOG_CSV, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            watermark = _load_watermark(conn, source_file) if incremental else None
+            if watermark and watermark[1] == stat.st_size and watermark[2] == stat.st_mtime:
+                print(f"[INFO] '{SHIPMENTS_LOG_CSV}' unchanged since last run; nothing to ingest.")
+                return
+
+            offset = 0
+            if watermark and watermark[0] <= stat.st_size and \
+                    _watermark_fingerprint(f, watermark[0]) == watermark[3]:
+                offset = watermark[0]
+            elif watermark:
+                print(f"[INFO] '{SHIPMENTS_LOG_CSV}' was rewritten; rescanning the whole file.")
+            if not incremental:
+                with conn:
+                    conn.execute("DELETE FROM daily_shipments")
+
+            f.seek(0)
+            columns = pd.read_csv(io.BytesIO(f.readline()), nrows=0).columns.tolist()
+            data_start = max(offset, f.tell())
+            end = _complete_lines_end(f, stat.st_size)
+
+            total_rows = written_rows = 0
+            if end > data_start:
+                f.seek(data_start)
+                reader = pd.read_csv(io.BufferedReader(_ByteRangeReader(f, end)), header=None,
+                                     names=columns, dtype=str, chunksize=chunksize)
+                for chunk in (reader if chunksize else [reader]):
+                    content_hash = hash_shipment_rows(chunk)
+                    df_to_upsert = prepare_shipments_frame(chunk)
+                    written_rows += upsert_shipments_frame(conn, df_to_upsert, content_hash)
+                    total_rows += len(df_to_upsert)
+
+            _save_watermark(conn, source_file, end, stat.st_size, stat.st_mtime, _watermark_fingerprint(f, end))
+            if written_rows or not incremental:
+                bump_data_version(conn)
+        print(f"[SUCCESS] Read {total_rows} shipment records; {written_rows} inserted or updated, "
+              f"{total_rows - written_rows} unchanged in 'daily_shipments' table.")
     except FileNotFoundError:
         print(f"[ERROR] Shipment log file not found: {SHIPMENTS_LOG_CSV}")
     except UnicodeDecodeError as e:
@@ -96,16 +542,66 @@ def ingest_shipments_data(conn):
     except Exception as e:
         print(f"[ERROR] Failed to ingest shipment data: {e}")
 
+def create_partner_session(pool_size=PARTNER_FETCH_CONCURRENCY):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch_partner_tasks(session, api_user_id, retries=None, backoff=None):
+    retries = PARTNER_FETCH_RETRIES if retries is None else retries
+    backoff = PARTNER_FETCH_BACKOFF_SECONDS if backoff is None else backoff
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(PARTNER_TASKS_API_URL, params={'userId': api_user_id},
+                                   timeout=PARTNER_FETCH_TIMEOUT)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                response.raise_for_status()
+                return response.json()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
+
+def fetch_all_partner_tasks(max_workers=PARTNER_FETCH_CONCURRENCY, batch_timeout=PARTNER_FETCH_BATCH_TIMEOUT):
+    """Fetch every partner's tasks concurrently over one pooled keep-alive session.
+
+    Returns (todos_by_partner, errors_by_partner). A partner that fails, or is
+    still running when batch_timeout expires, only lands in the error map.
+    """
+    todos_by_partner, errors_by_partner = {}, {}
+    session = create_partner_session(max_workers)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {pool.submit(fetch_partner_tasks, session, api_user_id): partner_name
+               for api_user_id, partner_name in PARTNER_ID_TO_NAME_MAP.items()}
+    try:
+        for future in as_completed(futures, timeout=batch_timeout):
+            try:
+                todos_by_partner[futures[future]] = future.result()
+            except Exception as e:
+                errors_by_partner[futures[future]] = e
+    except FuturesTimeoutError:
+        for future, partner_name in futures.items():
+            if not future.done():
+                errors_by_partner[partner_name] = TimeoutError(f"no response within {batch_timeout}s batch deadline")
+    finally:
+        # Do not wait on stragglers; they finish (or time out) in the background.
+        pool.shutdown(wait=False, cancel_futures=True)
+        # Releases the pooled connections; a straggler still mid-request just loses its result.
+        session.close()
+    return todos_by_partner, errors_by_partner
+
 def ingest_partner_tasks_data(conn):
     print(f"\n[INFO] Ingesting simulated partner tasks from '{PARTNER_TASKS_API_URL}'...")
     partner_tasks_to_insert = []
     try:
-        for api_user_id, partner_name in PARTNER_ID_TO_NAME_MAP.items():
-            response = requests.get(PARTNER_TASKS_API_URL, params={'userId': api_user_id}, timeout=10)
-            response.raise_for_status()
-            todos = response.json()
+        todos_by_partner, errors_by_partner = fetch_all_partner_tasks()
+        for partner_name, error in errors_by_partner.items():
+            print(f"[ERROR] API request failed for partner '{partner_name}': {error}")
 
-            for todo in todos[:5]:
+        for partner_name in PARTNER_ID_TO_NAME_MAP.values():
+            for todo in todos_by_partner.get(partner_name, [])[:5]:
                 task_completed_status = todo['completed']
                 sim_health = "OK" if task_completed_status else "Action Required"
                 partner_tasks_to_insert.append((
@@ -119,28 +615,102 @@ def ingest_partner_tasks_data(conn):
         if partner_tasks_to_insert:
             cursor = conn.cursor()
             cursor.executemany('''
-            INSERT OR IGNORE INTO partner_tasks_status
+            INSERT INTO partner_tasks_status
             (partner_contract, task_source_id, task_title, task_completed_status, simulated_service_health)
             VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(partner_contract, task_source_id) DO UPDATE SET
+                task_title = excluded.task_title,
+                task_completed_status = excluded.task_completed_status,
+                simulated_service_health = excluded.simulated_service_health,
+                log_timestamp = CURRENT_TIMESTAMP
             ''', partner_tasks_to_insert)
             conn.commit()
-            print(f"[SUCCESS] Ingested {len(partner_tasks_to_insert)} simulated partner tasks into 'partner_tasks_status' table.")
+            bump_data_version(conn)
+            print(f"[SUCCESS] Upserted {len(partner_tasks_to_insert)} simulated partner tasks into 'partner_tasks_status' table.")
         else:
             print("[INFO] No partner tasks to ingest.")
 
-    except requests.exceptions.RequestException as e:
-        print(f"[ERROR] API request failed for partner tasks: {e}")
     except Exception as e:
         print(f"[ERROR] Failed to ingest partner tasks: {e}")
 
-def run_ingestion_service():
+def compact_partner_tasks(conn):
+    """Delete duplicate partner tasks left by runs before the natural key existed.
+
+    Keeps the most recently inserted row per (partner_contract, task_source_id)
+    and then adds the unique index so later runs upsert in place.
+    """
+    with conn:
+        removed = conn.execute('''
+        DELETE FROM partner_tasks_status
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM partner_tasks_status GROUP BY partner_contract, task_source_id
+        )
+        ''').rowcount
+        has_data_version = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'data_version'").fetchone()
+        if removed and has_data_version:
+            # Partner health counts change, so cached API responses go in the same commit.
+            conn.execute(BUMP_DATA_VERSION_SQL)
+        conn.execute(PARTNER_TASKS_NATURAL_KEY_SQL)
+    print(f"[SUCCESS] Removed {removed} duplicate rows from 'partner_tasks_status'.")
+    return removed
+
+def rebuild_metrics_rollups(conn):
+    """Recompute every METRICS_ROLLUPS table from daily_shipments."""
+    with conn:
+        for table, key_column, on_demand_sql in METRICS_ROLLUPS:
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(f"INSERT INTO {table} ({key_column}, {', '.join(PARTNER_METRICS_COLUMNS)}) {on_demand_sql}")
+    bump_data_version(conn)
+    print(f"[SUCCESS] Rebuilt {', '.join(repr(table) for table, _, _ in METRICS_ROLLUPS)} from 'daily_shipments'.")
+
+def check_metrics_rollups(conn):
+    """Compare each METRICS_ROLLUPS table with the same aggregates computed on demand.
+
+    All sides are read in one transaction so a concurrent ingest cannot cause
+    false mismatches. Returns a list of (table, key, column, rollup, on_demand).
+    """
+    conn.commit()
+    conn.execute("BEGIN")
+    try:
+        snapshots = [(table,
+                      {row[0]: row[1:] for row in conn.execute(on_demand_sql)},
+                      {row[0]: row[1:] for row in conn.execute(
+                          f"SELECT {key_column}, {', '.join(PARTNER_METRICS_COLUMNS)} FROM {table}")})
+                     for table, key_column, on_demand_sql in METRICS_ROLLUPS]
+    finally:
+        conn.rollback()
+
+    empty = (0,) * len(PARTNER_METRICS_COLUMNS)
+    mismatches = []
+    for table, on_demand, rollup in snapshots:
+        for key in sorted(set(on_demand) | set(rollup)):
+            for column, rollup_value, on_demand_value in zip(PARTNER_METRICS_COLUMNS, rollup.get(key, empty),
+                                                             on_demand.get(key, empty)):
+                if not math.isclose(rollup_value, on_demand_value, rel_tol=1e-9, abs_tol=1e-6):
+                    mismatches.append((table, key, column, rollup_value, on_demand_value))
+    return mismatches
+
+def run_rollup_check():
+    conn = get_db_connection()
+    mismatches = check_metrics_rollups(conn)
+    conn.close()
+    if not mismatches:
+        print("[SUCCESS] Metrics rollups match the on-demand aggregates.")
+        return True
+    for table, key, column, rollup_value, on_demand_value in mismatches:
+        print(f"[ERROR] {table}[{key}].{column}: rollup={rollup_value} on-demand={on_demand_value}")
+    print("[INFO] Run 'python data_ingestion.py --rebuild-rollups' to recompute the rollups.")
+    return False
+
+def run_ingestion_service(full_refresh=False):
     print("-" * 60)
     print("  Maverick Data Ingestion Service")
     print("-" * 60)
 
-    conn = sqlite3.connect(DATABASE_NAME)
+    conn = get_db_connection()
     create_db_tables(conn)
-    ingest_shipments_data(conn)
+    ingest_shipments_data(conn, chunksize=SHIPMENTS_CHUNK_SIZE, incremental=not full_refresh)
     ingest_partner_tasks_data(conn)
     conn.close()
 
@@ -150,4 +720,25 @@ def run_ingestion_service():
     print("-" * 60 + "\n")
 
 if __name__ == "__main__":
-    run_ingestion_service()
+    parser = argparse.ArgumentParser(description="Maverick Data Ingestion Service")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="clear daily_shipments and re-read the whole CSV instead of resuming from the watermark")
+    parser.add_argument("--compact-partner-tasks", action="store_true",
+                        help="one-off: remove duplicate partner tasks from an existing database and exit")
+    parser.add_argument("--check-rollups", action="store_true",
+                        help="verify partner_metrics and daily_metrics against the on-demand SQL and exit (status 1 on mismatch)")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="recompute partner_metrics and daily_metrics from daily_shipments and exit")
+    args = parser.parse_args()
+    if args.compact_partner_tasks:
+        conn = get_db_connection()
+        compact_partner_tasks(conn)
+        conn.close()
+    elif args.check_rollups:
+        sys.exit(0 if run_rollup_check() else 1)
+    elif args.rebuild_rollups:
+        conn = get_db_connection()
+        rebuild_metrics_rollups(conn)
+        conn.close()
+    else:
+        run_ingestion_service(full_refresh=args.full_refresh)
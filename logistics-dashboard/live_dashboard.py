@@ -1,19 +1,43 @@
+import os
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output, State 
-import requests
+from dash.dependencies import ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
+from flask import Response
 import pandas as pd
 import plotly.express as px
 import dash_bootstrap_components as dbc
+from api_client import OperationsApiClient
 
 # --- Configuration ---
 API_BASE_URL = "http://127.0.0.1:5000/api"
 AVAILABLE_PARTNERS = ["Amazon-Prime", "Hertz-Local", "Uhaul-Interstate", "Budget-Airport", "Ryder-Logistics", "Enterprise-Corp"]
 ALL_PARTNERS_FOR_CHART = AVAILABLE_PARTNERS
+# The browser subscribes to the API's SSE stream (assets/data_stream.js) and
+# merges its snapshot and delta events itself; this clientside-only interval
+# copies the result into the layout. The 60s poll of /dashboard/snapshot only
+# runs while the stream is unavailable.
+STREAM_SYNC_INTERVAL_MS = 500
+POLL_FALLBACK_INTERVAL_MS = 60 * 1000
+# 'server' builds KPI cards and Plotly figures in Python on every refresh;
+# 'client' sends only compact_snapshot() to the browser and assets/render_metrics.js
+# builds the cards and updates the charts there.
+RENDER_MODE = os.environ.get("DASHBOARD_RENDER_MODE", "server")
+if RENDER_MODE not in ("server", "client"):
+    raise ValueError(f"DASHBOARD_RENDER_MODE must be 'server' or 'client', not {RENDER_MODE!r}")
+HEALTH_STATUS_COLORS = {'OK': 'green', 'Action Required': 'orange'}
 
 # --- Initialize Dash App with Bootstrap Theme ---
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 app.title = "Maverick Operations Command Center"
+# Shared by all callbacks: pooled keep-alive connections, timeouts, and the
+# last good snapshot while the API is down.
+api_client = OperationsApiClient(API_BASE_URL)
+
+
+@app.server.route('/metrics')
+def dashboard_metrics():
+    return Response(api_client.render_metrics(), mimetype='text/plain; version=0.0.4')
 
 # --- App Layout ---
 app.layout = dbc.Container([
@@ -54,30 +78,96 @@ app.layout = dbc.Container([
                 dbc.Col(
                     dbc.Card([
                         dbc.CardHeader("Partner Service Health (from Simulated External API Data)"),
-                        dbc.CardBody(id='partner-health-chart-kpis')
+                        dbc.CardBody(id='partner-health-chart-kpis', children=(
+                            # Client mode updates this graph's figure in place.
+                            [dcc.Graph(id='partner-health-chart', figure={})] if RENDER_MODE == "client" else None
+                        ))
                     ]), width=12, md=6, className="mb-3"
                 )
             ])
         ], width=12)
     ]),
 
-    dcc.Interval(id='interval-component', interval=60*1000, n_intervals=0) # Refresh every 60s
+    dcc.Interval(id='interval-component', interval=POLL_FALLBACK_INTERVAL_MS, n_intervals=0),
+    dcc.Interval(id='stream-sync-interval', interval=STREAM_SYNC_INTERVAL_MS),
+    dcc.Store(id='stream-config', data={'url': f"{API_BASE_URL}/stream", 'compact': RENDER_MODE == "client"}),
+    dcc.Store(id='data-version-store'),
+    dcc.Store(id='metrics-snapshot'),
+    dcc.Store(id='chart-config', data={'partners': ALL_PARTNERS_FOR_CHART, 'health_colors': HEALTH_STATUS_COLORS,
+                                       'colorway': px.colors.qualitative.Plotly})
 ], fluid=True, className="p-3")
 
 
 # --- Callbacks to Update Dashboard Components ---
 
-# Callback for Daily Logistics Summary
+# Push updates: runs in the browser and fills 'metrics-snapshot' straight from
+# the stream, so neither an idle tab nor a new ingest costs a server request.
+app.clientside_callback(
+    ClientsideFunction(namespace='maverick', function_name='syncStreamSnapshot'),
+    [Output('metrics-snapshot', 'data', allow_duplicate=True),
+     Output('data-version-store', 'data'),
+     Output('interval-component', 'disabled')],
+    [Input('stream-sync-interval', 'n_intervals')],
+    [State('stream-config', 'data'),
+     State('data-version-store', 'data'),
+     State('interval-component', 'disabled')],
+    prevent_initial_call=True
+)
+
+# Poll fallback, and the first load: fetches everything the panels render in
+# one request. The render callbacks below read from the 'metrics-snapshot'
+# store and make no requests.
 @app.callback(
-    Output('daily-summary-kpis', 'children'),
+    Output('metrics-snapshot', 'data'),
     [Input('interval-component', 'n_intervals')]
 )
-def update_daily_summary(n):
+def refresh_metrics_snapshot(n):
     try:
-        response = requests.get(f"{API_BASE_URL}/logistics/daily_summary")
-        response.raise_for_status()
-        data = response.json()
-        
+        snapshot, stale_since = api_client.get_json("/dashboard/snapshot")
+        if stale_since is not None:
+            snapshot = {**snapshot, "stale_since": stale_since.strftime("%H:%M:%S")}
+        return compact_snapshot(snapshot) if RENDER_MODE == "client" else snapshot
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def compact_snapshot(snapshot):
+    """Only the numbers the client-side renderer draws, with short keys."""
+    summary = snapshot.get('daily_summary')
+    compact = {
+        "summary": summary and {
+            "total": summary.get('total_shipments_logged'),
+            "in_transit": summary.get('shipments_in_transit'),
+            "delivered": summary.get('delivered_shipments'),
+            "on_time_pct": summary.get('on_time_delivery_percent'),
+            "mpg": summary.get('average_fleet_mpg'),
+        },
+        "partners": {
+            partner: {
+                "total": status['shipment_metrics']['total_shipments_with_partner'],
+                "delivered": status['shipment_metrics']['delivered_by_partner'],
+                "on_time_pct": status['shipment_metrics']['on_time_delivery_percent_partner'],
+                "health": status['partner_service_health_summary'],
+            }
+            for partner, status in snapshot.get('partners', {}).items()
+        },
+    }
+    if snapshot.get("stale_since"):
+        compact["stale_since"] = snapshot["stale_since"]
+    return compact
+
+
+# Callback for Daily Logistics Summary
+def update_daily_summary(snapshot):
+    if snapshot is None:
+        raise PreventUpdate
+    try:
+        if "error" in snapshot:
+            raise RuntimeError(snapshot["error"])
+        data = snapshot.get('daily_summary')
+        if data is None:
+            raise RuntimeError("No summary data available")
+
         kpi_items = [
             html.P(f"Total Shipments Logged: {data.get('total_shipments_logged', 'N/A')}", className="card-text"),
             html.P(f"Shipments In-Transit: {data.get('shipments_in_transit', 'N/A')}", className="card-text"),
@@ -86,27 +176,26 @@ def update_daily_summary(n):
             html.P("On-Time Delivery Rate", className="card-text text-muted small"),
             html.P(f"Average Fleet MPG: {data.get('average_fleet_mpg', 'N/A')}", className="card-text mt-2"),
         ]
+        if snapshot.get("stale_since"):
+            kpi_items.append(html.P(f"Operations API unavailable - showing data from {snapshot['stale_since']}",
+                                    className="card-text text-warning small"))
         return kpi_items
     except Exception as e:
         return dbc.Alert(f"Error fetching daily summary: {e}", color="danger")
 
 
 # Callback for Shipments by Partner Chart
-@app.callback(
-    Output('partner-shipments-chart', 'figure'),
-    [Input('interval-component', 'n_intervals')]
-)
-def update_partner_shipments_chart(n):
+def update_partner_shipments_chart(snapshot):
+    if snapshot is None:
+        raise PreventUpdate
     partner_data_for_chart = []
     try:
+        if "error" in snapshot:
+            raise RuntimeError(snapshot["error"])
+        statuses = snapshot.get('partners', {})
         for partner in ALL_PARTNERS_FOR_CHART:
-            response = requests.get(f"{API_BASE_URL}/partner_performance/status?partner_contract={partner}")
-            if response.ok:
-                data = response.json()
-                shipments = data.get('shipment_metrics', {}).get('total_shipments_with_partner', 0)
-                partner_data_for_chart.append({'Partner': partner, 'Total Shipments': shipments})
-            else:
-                partner_data_for_chart.append({'Partner': partner, 'Total Shipments': 0})
+            shipments = statuses.get(partner, {}).get('shipment_metrics', {}).get('total_shipments_with_partner', 0)
+            partner_data_for_chart.append({'Partner': partner, 'Total Shipments': shipments})
         
         if not partner_data_for_chart:
             fig = px.bar(title="No Partner Shipment Data Available")
@@ -122,20 +211,18 @@ def update_partner_shipments_chart(n):
 
 
 # Callback for Detailed Partner Performance (KPIs and Health Chart)
-@app.callback(
-    [Output('partner-shipment-metrics-kpis', 'children'),
-     Output('partner-health-chart-kpis', 'children')],
-    [Input('partner-dropdown', 'value'),
-     Input('interval-component', 'n_intervals')]
-)
-def update_partner_performance_details(selected_partner, n):
+def update_partner_performance_details(selected_partner, snapshot):
     if not selected_partner:
         return dbc.Alert("Select partner.", color="info"), html.Div()
+    if snapshot is None:
+        raise PreventUpdate
 
     try:
-        response = requests.get(f"{API_BASE_URL}/partner_performance/status?partner_contract={selected_partner}")
-        response.raise_for_status()
-        data = response.json()
+        if "error" in snapshot:
+            raise RuntimeError(snapshot["error"])
+        data = snapshot.get('partners', {}).get(selected_partner)
+        if data is None:
+            raise RuntimeError(f"No data found for partner: {selected_partner}")
 
         shipment_metrics = data.get('shipment_metrics', {})
         service_health_summary = data.get('partner_service_health_summary', {})
@@ -157,20 +244,14 @@ def update_partner_performance_details(selected_partner, n):
         if health_data:
             df_health = pd.DataFrame(health_data)
             
-            # Define the color map with EXACT key matching from your API data
-            color_map = {
-                'OK': 'green',             # Explicitly green for "OK"
-                'Action Required': 'orange', # Orange for "Action Required"
-                # If you have other statuses like 'Breached', add them here:
-                # 'Breached': 'red' 
-            }
-            
+            # HEALTH_STATUS_COLORS keys must EXACTLY match the statuses the API sends;
+            # add new ones (e.g. 'Breached': 'red') there so both render modes pick them up.
             health_chart_figure = px.pie(df_health, 
                                          names='Status', 
                                          values='Count', 
                                          title=f"Simulated Service Health", # Simplified title
                                          color='Status', # Tell Plotly to color based on the 'Status' column
-                                         color_discrete_map=color_map # Provide the explicit map
+                                         color_discrete_map=HEALTH_STATUS_COLORS # Provide the explicit map
                                         )
             health_chart_figure.update_layout(
                 legend_title_text='Service Status',
@@ -190,6 +271,43 @@ def update_partner_performance_details(selected_partner, n):
         error_msg = dbc.Alert(f"Error: {e}", color="danger")
         return error_msg, html.Div(error_msg) # Return error for both outputs
 
+if RENDER_MODE == "client":
+    app.clientside_callback(
+        ClientsideFunction(namespace='maverick', function_name='renderSummary'),
+        Output('daily-summary-kpis', 'children'),
+        [Input('metrics-snapshot', 'data')]
+    )
+    app.clientside_callback(
+        ClientsideFunction(namespace='maverick', function_name='renderPartnerChart'),
+        Output('partner-shipments-chart', 'figure'),
+        [Input('metrics-snapshot', 'data')],
+        [State('partner-shipments-chart', 'figure'),
+         State('chart-config', 'data')]
+    )
+    app.clientside_callback(
+        ClientsideFunction(namespace='maverick', function_name='renderPartnerDetails'),
+        [Output('partner-shipment-metrics-kpis', 'children'),
+         Output('partner-health-chart', 'figure')],
+        [Input('partner-dropdown', 'value'),
+         Input('metrics-snapshot', 'data')],
+        [State('chart-config', 'data')]
+    )
+else:
+    app.callback(
+        Output('daily-summary-kpis', 'children'),
+        [Input('metrics-snapshot', 'data')]
+    )(update_daily_summary)
+    app.callback(
+        Output('partner-shipments-chart', 'figure'),
+        [Input('metrics-snapshot', 'data')]
+    )(update_partner_shipments_chart)
+    app.callback(
+        [Output('partner-shipment-metrics-kpis', 'children'),
+         Output('partner-health-chart-kpis', 'children')],
+        [Input('partner-dropdown', 'value'),
+         Input('metrics-snapshot', 'data')]
+    )(update_partner_performance_details)
+
 # --- Run the App ---
 if __name__ == '__main__':
     # Set debug=False if using the .sh script that redirects output
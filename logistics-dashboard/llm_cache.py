@@ -0,0 +1,123 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_DB = 'compliance_llm_cache.db'
+LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 500
+
+
+def llm_cache_key(model, prompt, contract_text):
+    # The contract text is part of the key, so editing a contract makes every
+    # response generated from the old text unreachable; those rows age out.
+    digest = hashlib.sha256()
+    for part in (model, prompt, contract_text):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """Persistent SQLite cache of LLM responses with TTL and LRU eviction.
+
+    Entries expire LLM_CACHE_TTL_SECONDS after they were generated; beyond
+    max_entries the least recently used are evicted. The database is opened on
+    first use, and one connection is shared behind a lock so Dash worker
+    threads can use the cache concurrently.
+    """
+
+    def __init__(self, path=LLM_CACHE_DB, ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                 max_entries=LLM_CACHE_MAX_ENTRIES, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "hit_seconds": 0.0}
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                response_text TEXT,
+                created_at REAL,
+                last_used_at REAL
+            )
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used "
+                               "ON llm_responses (last_used_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, model, prompt, contract_text):
+        start = time.perf_counter()
+        key = llm_cache_key(model, prompt, contract_text)
+        now = self.clock()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT response_text, created_at FROM llm_responses WHERE cache_key = ?",
+                               (key,)).fetchone()
+            if row is not None and now - row[1] >= self.ttl_seconds:
+                conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+                conn.commit()
+                self.stats["expired"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            conn.execute("UPDATE llm_responses SET last_used_at = ? WHERE cache_key = ?", (now, key))
+            conn.commit()
+            self.stats["hits"] += 1
+            self.stats["hit_seconds"] += time.perf_counter() - start
+            return row[0]
+
+    def put(self, model, prompt, contract_text, response_text):
+        now = self.clock()
+        with self._lock:
+            conn = self._connection()
+            conn.execute('''
+            INSERT INTO llm_responses (cache_key, model, response_text, created_at, last_used_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                response_text = excluded.response_text, created_at = excluded.created_at,
+                last_used_at = excluded.last_used_at
+            ''', (llm_cache_key(model, prompt, contract_text), model, response_text, now, now))
+            evicted = conn.execute('''
+            DELETE FROM llm_responses WHERE cache_key IN (
+                SELECT cache_key FROM llm_responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+            ''', (self.max_entries,)).rowcount
+            conn.commit()
+            self.stats["evictions"] += evicted
+
+    def render_metrics(self, prefix="compliance_llm_cache"):
+        with self._lock:
+            stats = dict(self.stats)
+        lines = []
+        for name, help_text in (("hits", "Responses served from the cache."),
+                                ("misses", "Lookups that had to call the model."),
+                                ("expired", "Entries dropped on lookup because they outlived the TTL."),
+                                ("evictions", "Least recently used entries dropped to stay under max_entries.")):
+            lines += [
+                f"# HELP {prefix}_{name}_total {help_text}",
+                f"# TYPE {prefix}_{name}_total counter",
+                f"{prefix}_{name}_total {stats[name]}",
+            ]
+        lines += [
+            f"# HELP {prefix}_hit_seconds_total Time spent serving cache hits.",
+            f"# TYPE {prefix}_hit_seconds_total counter",
+            f"{prefix}_hit_seconds_total {stats['hit_seconds']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,196 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+LLM_STREAM_WORKERS = 4  # streams running at once, across all users
+LLM_STREAM_PER_USER = 2  # streams running at once for one user; the rest wait in the queue
+LLM_STREAM_MAX_QUEUED = 20
+LLM_STREAM_MAX_QUEUED_PER_USER = 4  # so one user cannot take every queue slot
+LLM_STREAM_RETENTION_SECONDS = 10 * 60
+LLM_LATENCY_BUCKETS_SECONDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class UserQueueFullError(QueueFullError):
+    pass
+
+
+class LLMStreams:
+    """Job queue that consumes streaming LLM responses for the UI to poll.
+
+    start() takes a zero-argument callable returning an iterator of chunks with
+    a `.text` attribute (e.g. a bound generate_content_stream call) and returns
+    a stream id right away. Streams run on at most `workers` threads, and at
+    most `per_user` of them for one user; the others wait in a FIFO queue of
+    up to `max_queued`, beyond which start() raises QueueFullError. One user
+    may have at most `max_queued_per_user` waiting, beyond which start()
+    raises UserQueueFullError while other users can still queue. A stream
+    started with the same `key` as one still queued or running shares it.
+    `on_complete(text)` is called on the worker thread after a stream ends
+    without error.
+
+    get() returns the status, queue position and text received so far.
+    Finished streams are dropped `retention_seconds` after they complete. Queue
+    wait, time to first token and total time are recorded for render_metrics().
+    """
+
+    def __init__(self, workers=LLM_STREAM_WORKERS, per_user=LLM_STREAM_PER_USER,
+                 max_queued=LLM_STREAM_MAX_QUEUED, max_queued_per_user=LLM_STREAM_MAX_QUEUED_PER_USER,
+                 retention_seconds=LLM_STREAM_RETENTION_SECONDS):
+        self.workers = workers
+        self.per_user = per_user
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-stream")
+        self._streams = {}  # id -> stream dict, see start()
+        self._pending = deque()  # queued stream ids, oldest first
+        self._running = {}  # user -> running stream count
+        self._inflight = {}  # key -> id of the queued or running stream
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._histograms = {name: [0] * len(LLM_LATENCY_BUCKETS_SECONDS) for name in ("queue", "ttft", "total")}
+        self._sums = {"queue": 0.0, "ttft": 0.0, "total": 0.0}
+        self._counts = {"queue": 0, "ttft": 0, "total": 0}
+        self._outcomes = {"ok": 0, "error": 0, "deduplicated": 0, "rejected": 0, "rejected_user": 0}
+
+    def start(self, open_stream, user=None, key=None, on_complete=None):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key is not None and key in self._inflight:
+                self._outcomes["deduplicated"] += 1
+                return self._inflight[key]
+            if len(self._pending) >= self.max_queued:
+                self._outcomes["rejected"] += 1
+                raise QueueFullError(f"{len(self._pending)} requests are already queued")
+            user_queued = sum(1 for queued_id in self._pending if self._streams[queued_id]["user"] == user)
+            if user_queued >= self.max_queued_per_user:
+                self._outcomes["rejected_user"] += 1
+                raise UserQueueFullError(f"{user_queued} requests from this user are already queued")
+            stream_id = str(next(self._ids))
+            self._streams[stream_id] = {
+                "status": "queued", "chunks": [], "error": None, "user": user, "key": key,
+                "open_stream": open_stream, "on_complete": on_complete, "started_at": now, "finished_at": None,
+                "finished": threading.Event(),
+            }
+            self._pending.append(stream_id)
+            if key is not None:
+                self._inflight[key] = stream_id
+            self._dispatch()
+        return stream_id
+
+    def get(self, stream_id):
+        """{"status", "position", "text", "done", "error"}, or None once the stream has expired.
+
+        status is "queued", "running" or "done"; position is the 1-based place
+        in the queue while queued, else None.
+        """
+        with self._lock:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                return None
+            position = self._pending.index(stream_id) + 1 if stream["status"] == "queued" else None
+            return {"status": stream["status"], "position": position, "text": "".join(stream["chunks"]),
+                    "done": stream["status"] == "done", "error": stream["error"]}
+
+    def _dispatch(self):
+        # Called with the lock held: start queued streams, oldest first, while
+        # there is capacity. A user at their limit does not block later users.
+        for stream_id in list(self._pending):
+            if sum(self._running.values()) >= self.workers:
+                return
+            stream = self._streams[stream_id]
+            if self._running.get(stream["user"], 0) >= self.per_user:
+                continue
+            self._pending.remove(stream_id)
+            self._running[stream["user"]] = self._running.get(stream["user"], 0) + 1
+            stream["status"] = "running"
+            self._observe("queue", time.monotonic() - stream["started_at"])
+            self._executor.submit(self._consume, stream_id, stream)
+
+    def _consume(self, stream_id, stream):
+        error = None
+        try:
+            for chunk in stream["open_stream"]():
+                if not chunk.text:
+                    continue
+                with self._lock:
+                    if not stream["chunks"]:
+                        self._observe("ttft", time.monotonic() - stream["started_at"])
+                    stream["chunks"].append(chunk.text)
+        except Exception as e:
+            print(f"[ERROR] LLM stream failed: {e}")
+            error = str(e)
+        with self._lock:
+            stream["finished_at"] = time.monotonic()
+            stream["status"] = "done"
+            stream["error"] = error
+            stream["open_stream"] = None
+            self._observe("total", stream["finished_at"] - stream["started_at"])
+            self._outcomes["error" if error else "ok"] += 1
+            self._running[stream["user"]] -= 1
+            if self._inflight.get(stream["key"]) == stream_id:
+                del self._inflight[stream["key"]]
+            self._dispatch()
+            text = "".join(stream["chunks"])
+        if stream["on_complete"] is not None and error is None:
+            try:
+                stream["on_complete"](text)
+            except Exception as e:
+                print(f"[ERROR] LLM stream completion handler failed: {e}")
+        stream["finished"].set()
+
+    def _observe(self, name, seconds):
+        buckets = self._histograms[name]
+        for i, bound in enumerate(LLM_LATENCY_BUCKETS_SECONDS):
+            if seconds <= bound:
+                buckets[i] += 1
+        self._sums[name] += seconds
+        self._counts[name] += 1
+
+    def _expire(self, now):
+        expired = [stream_id for stream_id, stream in self._streams.items()
+                   if stream["status"] == "done" and now - stream["finished_at"] >= self.retention_seconds]
+        for stream_id in expired:
+            del self._streams[stream_id]
+
+    def wait(self, stream_id, timeout=None):
+        """Block until the stream has finished (for tests and benchmarks)."""
+        with self._lock:
+            finished = self._streams[stream_id]["finished"]
+        return finished.wait(timeout)
+
+    def render_metrics(self, prefix="compliance_llm_stream"):
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_total Stream requests by outcome (deduplicated = joined an "
+                "identical in-flight stream, rejected = queue full, rejected_user = the user's queue share is full).",
+                f"# TYPE {prefix}_total counter",
+            ]
+            for outcome, count in sorted(self._outcomes.items()):
+                lines.append(f'{prefix}_total{{outcome="{outcome}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_queued Streams waiting for a worker.",
+                f"# TYPE {prefix}_queued gauge",
+                f"{prefix}_queued {len(self._pending)}",
+                f"# HELP {prefix}_running Streams being consumed.",
+                f"# TYPE {prefix}_running gauge",
+                f"{prefix}_running {sum(self._running.values())}",
+            ]
+            for name, help_text in (("queue", "Time a stream waited in the queue."),
+                                    ("ttft", "Time from request to the first streamed token."),
+                                    ("total", "Time from request to the end of the stream.")):
+                metric = f"{prefix}_{name}_seconds"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for bound, count in zip(LLM_LATENCY_BUCKETS_SECONDS, self._histograms[name]):
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {self._counts[name]}')
+                lines.append(f"{metric}_sum {self._sums[name]}")
+                lines.append(f"{metric}_count {self._counts[name]}")
+        return "\n".join(lines) + "\n"
@@ -1,112 +1,567 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, g
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import json
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from werkzeug.serving import WSGIRequestHandler
 
 app = Flask(__name__)
 DATABASE_NAME = 'maverick_operational_data.db'
+DB_POOL_SIZE = 8
+DB_BUSY_TIMEOUT_MS = 2000
+DB_STATEMENT_CACHE_SIZE = 256
+# Cached responses are dropped as soon as ingestion bumps data_version; the TTL
+# only bounds staleness if something writes the DB without bumping it.
+RESPONSE_CACHE_TTL_SECONDS = 300
+RESPONSE_CACHE_MAX_ENTRIES = 256
+# /api/stream: one watcher thread polls data_version for all subscribers.
+STREAM_POLL_INTERVAL_SECONDS = 0.5
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_RETRY_MS = 3000
+# The dashboard opens the stream from the browser on another port.
+STREAM_ALLOWED_ORIGIN = '*'
+# daily_summary?from=&to=&granularity= windows; dates are inclusive YYYY-MM-DD.
+SUMMARY_DEFAULT_WINDOW_DAYS = 7
+SUMMARY_MAX_WINDOW_DAYS = {'day': 366, 'hour': 31}
+# Key of the global row in the partner_metrics rollup maintained by data_ingestion.
+GLOBAL_METRICS_KEY = '__all__'
+# The only errors that mean "no rollup here, aggregate on demand".
+MISSING_ROLLUP_ERRORS = ('no such table: partner_metrics', 'no such table: daily_metrics')
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_NAME)
+SUMMARY_ROLLUP_SQL = f"""
+    SELECT
+        shipment_count as total_shipments,
+        delivered_count as delivered_shipments,
+        on_time_count as on_time_deliveries,
+        in_transit_count as shipments_in_transit,
+        CASE WHEN mpg_count > 0 THEN mpg_sum / mpg_count END as average_fleet_mpg,
+        CASE WHEN value_count > 0 THEN value_sum END as total_value_in_transit_or_delivered
+    FROM partner_metrics
+    WHERE partner_contract = '{GLOBAL_METRICS_KEY}'
+"""
+
+SUMMARY_ON_DEMAND_SQL = """
+    SELECT
+        COUNT(shipment_id) as total_shipments,
+        SUM(CASE WHEN delivery_status = 'Delivered' THEN 1 ELSE 0 END) as delivered_shipments,
+        SUM(CASE WHEN on_time_status_calculated = 'On-Time' THEN 1 ELSE 0 END) as on_time_deliveries,
+        SUM(CASE WHEN delivery_status = 'In-Transit' THEN 1 ELSE 0 END) as shipments_in_transit,
+        AVG(fuel_efficiency_mpg) as average_fleet_mpg,
+        SUM(shipment_value_usd) as total_value_in_transit_or_delivered
+    FROM daily_shipments
+    WHERE delivery_status IN ('Delivered', 'In-Transit')
+"""
+
+# Windowed summaries select raw counts and sums per bucket so buckets can be
+# added up into window totals; build_summary_metrics derives the ratios.
+_BUCKET_METRICS = """
+        shipment_count, delivered_count, on_time_count, in_transit_count,
+        value_sum, value_count, mpg_sum, mpg_count
+"""
+_BUCKET_AGGREGATES = """
+        COUNT(shipment_id) as shipment_count,
+        COUNT(CASE WHEN delivery_status = 'Delivered' THEN 1 END) as delivered_count,
+        COUNT(CASE WHEN on_time_status_calculated = 'On-Time' THEN 1 END) as on_time_count,
+        COUNT(CASE WHEN delivery_status = 'In-Transit' THEN 1 END) as in_transit_count,
+        TOTAL(shipment_value_usd) as value_sum,
+        COUNT(shipment_value_usd) as value_count,
+        TOTAL(fuel_efficiency_mpg) as mpg_sum,
+        COUNT(fuel_efficiency_mpg) as mpg_count
+"""
+
+SUMMARY_DAILY_ROLLUP_SQL = f"""
+    SELECT log_date as bucket, {_BUCKET_METRICS}
+    FROM daily_metrics
+    WHERE log_date BETWEEN ? AND ? AND row_count > 0
+    ORDER BY log_date
+"""
+
+SUMMARY_DAILY_ON_DEMAND_SQL = f"""
+    SELECT log_date as bucket, {_BUCKET_AGGREGATES}
+    FROM daily_shipments
+    WHERE delivery_status IN ('Delivered', 'In-Transit') AND log_date BETWEEN ? AND ?
+    GROUP BY log_date
+    ORDER BY log_date
+"""
+
+# Hours come from the departure timestamp; the window is still selected by log_date.
+SUMMARY_HOURLY_SQL = f"""
+    SELECT substr(COALESCE(actual_departure_datetime, planned_departure_datetime), 1, 13) || ':00' as bucket,
+        {_BUCKET_AGGREGATES}
+    FROM daily_shipments
+    WHERE delivery_status IN ('Delivered', 'In-Transit') AND log_date BETWEEN ? AND ?
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+LATEST_LOG_DATE_ROLLUP_SQL = "SELECT MAX(log_date) as latest FROM daily_metrics WHERE row_count > 0"
+LATEST_LOG_DATE_ON_DEMAND_SQL = "SELECT MAX(log_date) as latest FROM daily_shipments"
+
+PARTNER_ROLLUP_SQL = f"""
+    SELECT
+        partner_contract,
+        shipment_count as total_shipments_with_partner,
+        delivered_count as delivered_by_partner,
+        on_time_count as on_time_by_partner,
+        CASE WHEN value_count > 0 THEN value_sum / value_count END as avg_shipment_value_partner
+    FROM partner_metrics
+    WHERE row_count > 0 AND partner_contract != '{GLOBAL_METRICS_KEY}' {{partner_filter}}
+"""
+
+PARTNER_ON_DEMAND_SQL = """
+    SELECT
+        partner_contract,
+        COUNT(shipment_id) as total_shipments_with_partner,
+        SUM(CASE WHEN delivery_status = 'Delivered' THEN 1 ELSE 0 END) as delivered_by_partner,
+        SUM(CASE WHEN on_time_status_calculated = 'On-Time' THEN 1 ELSE 0 END) as on_time_by_partner,
+        AVG(shipment_value_usd) as avg_shipment_value_partner
+    FROM daily_shipments
+    WHERE partner_contract IS NOT NULL {partner_filter}
+    GROUP BY partner_contract
+"""
+
+PARTNER_HEALTH_SQL = """
+    SELECT
+        partner_contract,
+        simulated_service_health,
+        COUNT(id) as status_count
+    FROM partner_tasks_status
+    WHERE partner_contract IS NOT NULL {partner_filter}
+    GROUP BY partner_contract, simulated_service_health
+"""
+
+# Idle read-only connections as (database_name, connection). A connection is
+# checked out by one request thread at a time and returned at teardown, so
+# connections are reused even under Werkzeug's thread-per-request server.
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def open_read_connection(database_name):
+    # Readers never write: open read-only and query_only so a stray statement
+    # cannot take the write lock. WAL (enabled by data_ingestion) lets readers
+    # proceed while ingestion commits; busy_timeout covers checkpoints.
+    conn = sqlite3.connect(f"{Path(database_name).resolve().as_uri()}?mode=ro", uri=True,
+                           timeout=DB_BUSY_TIMEOUT_MS / 1000, cached_statements=DB_STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
     return conn
 
-@app.route('/api/logistics/daily_summary', methods=['GET'])
-def get_daily_logistics_summary():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT
-            COUNT(shipment_id) as total_shipments,
-            SUM(CASE WHEN delivery_status = 'Delivered' THEN 1 ELSE 0 END) as delivered_shipments,
-            SUM(CASE WHEN on_time_status_calculated = 'On-Time' THEN 1 ELSE 0 END) as on_time_deliveries,
-            SUM(CASE WHEN delivery_status = 'In-Transit' THEN 1 ELSE 0 END) as shipments_in_transit,
-            AVG(fuel_efficiency_mpg) as average_fleet_mpg,
-            SUM(shipment_value_usd) as total_value_in_transit_or_delivered
-        FROM daily_shipments
-        WHERE delivery_status IN ('Delivered', 'In-Transit')
-    """)
-    summary = cursor.fetchone()
+def get_db_connection():
+    if 'db_conn' in g:
+        return g.db_conn[1]
+    entry = None
+    while entry is None:
+        try:
+            entry = _db_pool.get_nowait()
+        except queue.Empty:
+            entry = (DATABASE_NAME, open_read_connection(DATABASE_NAME))
+        if entry[0] != DATABASE_NAME:
+            entry[1].close()
+            entry = None
+    g.db_conn = entry
+    return entry[1]
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    entry = g.pop('db_conn', None)
+    if entry is None:
+        return
+    if entry[1].in_transaction:
+        entry[1].rollback()
+    try:
+        _db_pool.put_nowait(entry)
+    except queue.Full:
+        entry[1].close()
+
+def close_db_pool():
+    while True:
+        try:
+            _db_pool.get_nowait()[1].close()
+        except queue.Empty:
+            return
+
+# (path, args) -> (data_version, stored_at, status, body, etag, last_modified), LRU order.
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+response_cache_stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+def clear_response_cache():
+    with _response_cache_lock:
+        _response_cache.clear()
+
+def get_data_version(conn):
+    """(version, last_modified) from the counter data_ingestion bumps, or None if absent."""
+    try:
+        row = conn.execute("SELECT version, updated_at FROM data_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    return row["version"], datetime.strptime(row["updated_at"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+def cached_response(view):
+    """Serve a GET view from the in-process response cache.
+
+    Entries are keyed on path and query args (repeated args keep their order,
+    which batch_status echoes) and stay valid until data_version changes or the
+    TTL expires. Every response carries an ETag and Last-Modified so clients can
+    revalidate with a 304 instead of a fresh body. Databases without the
+    data_version table are served uncached.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        data_version = get_data_version(get_db_connection())
+        if data_version is None:
+            return view(*args, **kwargs)
+
+        key = (request.path, tuple(sorted(request.args.items(multi=True), key=lambda item: item[0])))
+        now = time.monotonic()
+        with _response_cache_lock:
+            entry = _response_cache.get(key)
+            if entry and entry[0] == data_version[0] and now - entry[1] < RESPONSE_CACHE_TTL_SECONDS:
+                _response_cache.move_to_end(key)
+                response_cache_stats["hits"] += 1
+                cache_status = "HIT"
+            else:
+                entry = None
+                response_cache_stats["misses"] += 1
+                cache_status = "MISS"
+
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            body = response.get_data()
+            entry = (data_version[0], now, response.status_code, body,
+                     hashlib.sha1(body).hexdigest(), data_version[1])
+            with _response_cache_lock:
+                _response_cache[key] = entry
+                _response_cache.move_to_end(key)
+                while len(_response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+                    _response_cache.popitem(last=False)
+
+        response = Response(entry[3], status=entry[2], mimetype="application/json")
+        response.set_etag(entry[4])
+        response.last_modified = entry[5]
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Cache"] = cache_status
+        if response.status_code == 200:
+            response.make_conditional(request)
+        if response.status_code == 304:
+            with _response_cache_lock:
+                response_cache_stats["not_modified"] += 1
+        return response
+    return wrapper
+
+def fetch_metrics_rows(cursor, rollup_sql, on_demand_sql, params=()):
+    # Answer from the partner_metrics primary key when ingestion maintains it;
+    # databases without the rollup fall back to aggregating daily_shipments.
+    # Any other error (locked database, I/O failure) is not a reason to scan.
+    try:
+        cursor.execute(rollup_sql, params)
+    except sqlite3.OperationalError as e:
+        if str(e) not in MISSING_ROLLUP_ERRORS:
+            raise
+        cursor.execute(on_demand_sql, params)
+    return cursor.fetchall()
+
+def build_summary_metrics(bucket):
     on_time_percentage = 0
-    if summary and summary["delivered_shipments"] and summary["delivered_shipments"] > 0:
-        on_time_percentage = round((summary["on_time_deliveries"] / summary["delivered_shipments"]) * 100, 2)
-    conn.close()
-    if summary and summary["total_shipments"] is not None:
-        return jsonify({
-            "report_date": "Overall (Demo Data)",
-            "total_shipments_logged": summary["total_shipments"],
-            "shipments_in_transit": summary["shipments_in_transit"] if summary["shipments_in_transit"] is not None else 0,
-            "delivered_shipments": summary["delivered_shipments"] if summary["delivered_shipments"] is not None else 0,
-            "on_time_delivery_percent": on_time_percentage,
-            "average_fleet_mpg": round(summary["average_fleet_mpg"], 2) if summary["average_fleet_mpg"] else None,
-            "total_value_shipped_usd": summary["total_value_in_transit_or_delivered"] if summary["total_value_in_transit_or_delivered"] is not None else 0
-        })
-    else:
-        return jsonify({"error": "No summary data available"}), 404
+    if bucket["delivered_count"] > 0:
+        on_time_percentage = round((bucket["on_time_count"] / bucket["delivered_count"]) * 100, 2)
+    return {
+        "total_shipments_logged": bucket["shipment_count"],
+        "shipments_in_transit": bucket["in_transit_count"],
+        "delivered_shipments": bucket["delivered_count"],
+        "on_time_delivery_percent": on_time_percentage,
+        "average_fleet_mpg": round(bucket["mpg_sum"] / bucket["mpg_count"], 2) if bucket["mpg_count"] else None,
+        "total_value_shipped_usd": round(bucket["value_sum"], 2)
+    }
 
-@app.route('/api/partner_performance/status', methods=['GET'])
-def get_partner_status():
-    partner_contract_param = request.args.get('partner_contract', default="Amazon-Prime", type=str)
-    conn = get_db_connection()
+def parse_summary_window(conn, args):
+    """(from_date, to_date, granularity) for a windowed daily_summary, or an error message.
+
+    'to' defaults to 'from', or to the latest log_date with data; 'from'
+    defaults to SUMMARY_DEFAULT_WINDOW_DAYS before 'to'.
+    """
+    granularity = args.get('granularity', 'day')
+    if granularity not in SUMMARY_MAX_WINDOW_DAYS:
+        return None, f"granularity must be one of: {', '.join(SUMMARY_MAX_WINDOW_DAYS)}"
+    try:
+        from_date = datetime.strptime(args['from'], '%Y-%m-%d').date() if args.get('from') else None
+        to_date = datetime.strptime(args['to'], '%Y-%m-%d').date() if args.get('to') else from_date
+    except ValueError:
+        return None, "'from' and 'to' must be dates in YYYY-MM-DD format"
+    if to_date is None:
+        latest = fetch_metrics_rows(conn.cursor(), LATEST_LOG_DATE_ROLLUP_SQL, LATEST_LOG_DATE_ON_DEMAND_SQL)[0]["latest"]
+        if latest is None:
+            return None, None
+        to_date = datetime.strptime(latest, '%Y-%m-%d').date()
+    if from_date is None:
+        from_date = to_date - timedelta(days=SUMMARY_DEFAULT_WINDOW_DAYS - 1)
+    if from_date > to_date:
+        return None, "'from' must not be after 'to'"
+    if (to_date - from_date).days + 1 > SUMMARY_MAX_WINDOW_DAYS[granularity]:
+        return None, f"{granularity} granularity covers at most {SUMMARY_MAX_WINDOW_DAYS[granularity]} days"
+    return (from_date.isoformat(), to_date.isoformat(), granularity), None
+
+def fetch_summary_buckets(conn, from_date, to_date, granularity):
+    # Day buckets read one daily_metrics row per day, so their cost depends on
+    # the window rather than the history; hour buckets seek the log_date index.
     cursor = conn.cursor()
+    if granularity == 'hour':
+        return cursor.execute(SUMMARY_HOURLY_SQL, (from_date, to_date)).fetchall()
+    return fetch_metrics_rows(cursor, SUMMARY_DAILY_ROLLUP_SQL, SUMMARY_DAILY_ON_DEMAND_SQL, (from_date, to_date))
 
-    cursor.execute("""
-        SELECT
-            partner_contract,
-            COUNT(shipment_id) as total_shipments_with_partner,
-            SUM(CASE WHEN delivery_status = 'Delivered' THEN 1 ELSE 0 END) as delivered_by_partner,
-            SUM(CASE WHEN on_time_status_calculated = 'On-Time' THEN 1 ELSE 0 END) as on_time_by_partner,
-            AVG(shipment_value_usd) as avg_shipment_value_partner
-        FROM daily_shipments
-        WHERE partner_contract = ?
-        GROUP BY partner_contract
-    """, (partner_contract_param,))
-    shipment_stats = cursor.fetchone()
-
-    cursor.execute("""
-        SELECT
-            simulated_service_health, 
-            COUNT(id) as status_count
-        FROM partner_tasks_status 
-        WHERE partner_contract = ?
-        GROUP BY simulated_service_health
-    """, (partner_contract_param,))
-    service_health_logs = cursor.fetchall()
-    conn.close()
-
-    if not shipment_stats and not service_health_logs:
-        return jsonify({"error": f"No data found for partner: {partner_contract_param}"}), 404
+def get_windowed_summary(conn, args):
+    window, error = parse_summary_window(conn, args)
+    if error:
+        return jsonify({"error": error}), 400
+    if window is None:
+        return jsonify({"error": "No summary data available"}), 404
+    from_date, to_date, granularity = window
+    buckets = fetch_summary_buckets(conn, from_date, to_date, granularity)
+    totals = {column: sum(bucket[column] for bucket in buckets) for column in
+              ("shipment_count", "delivered_count", "on_time_count", "in_transit_count",
+               "value_sum", "value_count", "mpg_sum", "mpg_count")}
+    return jsonify({
+        "report_date": from_date if from_date == to_date else f"{from_date} to {to_date}",
+        "from": from_date,
+        "to": to_date,
+        "granularity": granularity,
+        **build_summary_metrics(totals),
+        "buckets": [{"bucket": bucket["bucket"], **build_summary_metrics(bucket)} for bucket in buckets]
+    })
 
+def build_partner_status(partner_contract, shipment_stats, service_health_summary):
     partner_on_time_delivery_percent = 0
     if shipment_stats and shipment_stats["delivered_by_partner"] and shipment_stats["delivered_by_partner"] > 0:
         partner_on_time_delivery_percent = round(
             (shipment_stats["on_time_by_partner"] / shipment_stats["delivered_by_partner"]) * 100, 2
         )
-    
-    service_health_summary = {log["simulated_service_health"]: log["status_count"] for log in service_health_logs}
 
-    return jsonify({
-        "partner_contract": partner_contract_param,
+    return {
+        "partner_contract": partner_contract,
         "shipment_metrics": {
             "total_shipments_with_partner": shipment_stats["total_shipments_with_partner"] if shipment_stats else 0,
             "delivered_by_partner": shipment_stats["delivered_by_partner"] if shipment_stats else 0,
             "on_time_delivery_percent_partner": partner_on_time_delivery_percent,
             "average_shipment_value_usd_partner": round(shipment_stats["avg_shipment_value_partner"], 2) if shipment_stats and shipment_stats["avg_shipment_value_partner"] is not None else None
         },
-        "partner_service_health_summary": service_health_summary 
+        "partner_service_health_summary": service_health_summary
+    }
+
+def fetch_partner_statuses(conn, partners=None):
+    """Status payloads keyed by partner, for the given partners or every partner with data.
+
+    Uses one grouped query for shipment metrics and one for service health,
+    however many partners are requested. Partners without data are omitted.
+    """
+    partner_filter, params = "", ()
+    if partners is not None:
+        partner_filter = f"AND partner_contract IN ({', '.join('?' * len(partners))})"
+        params = tuple(partners)
+
+    cursor = conn.cursor()
+    shipment_stats = {row["partner_contract"]: row for row in fetch_metrics_rows(
+        cursor, PARTNER_ROLLUP_SQL.format(partner_filter=partner_filter),
+        PARTNER_ON_DEMAND_SQL.format(partner_filter=partner_filter), params)}
+    service_health = {}
+    for row in cursor.execute(PARTNER_HEALTH_SQL.format(partner_filter=partner_filter), params):
+        service_health.setdefault(row["partner_contract"], {})[row["simulated_service_health"]] = row["status_count"]
+
+    return {partner: build_partner_status(partner, shipment_stats.get(partner), service_health.get(partner, {}))
+            for partner in sorted(set(shipment_stats) | set(service_health))}
+
+def fetch_daily_summary(conn):
+    rows = fetch_metrics_rows(conn.cursor(), SUMMARY_ROLLUP_SQL, SUMMARY_ON_DEMAND_SQL)
+    summary = rows[0] if rows else None
+    if not summary or summary["total_shipments"] is None:
+        return None
+    on_time_percentage = 0
+    if summary["delivered_shipments"] and summary["delivered_shipments"] > 0:
+        on_time_percentage = round((summary["on_time_deliveries"] / summary["delivered_shipments"]) * 100, 2)
+    return {
+        "report_date": "Overall (Demo Data)",
+        "total_shipments_logged": summary["total_shipments"],
+        "shipments_in_transit": summary["shipments_in_transit"] if summary["shipments_in_transit"] is not None else 0,
+        "delivered_shipments": summary["delivered_shipments"] if summary["delivered_shipments"] is not None else 0,
+        "on_time_delivery_percent": on_time_percentage,
+        "average_fleet_mpg": round(summary["average_fleet_mpg"], 2) if summary["average_fleet_mpg"] else None,
+        "total_value_shipped_usd": round(summary["total_value_in_transit_or_delivered"], 2) if summary["total_value_in_transit_or_delivered"] is not None else 0
+    }
+
+@app.route('/api/logistics/daily_summary', methods=['GET'])
+@cached_response
+def get_daily_logistics_summary():
+    conn = get_db_connection()
+    if any(arg in request.args for arg in ('from', 'to', 'granularity')):
+        return get_windowed_summary(conn, request.args)
+    summary = fetch_daily_summary(conn)
+    if summary is None:
+        return jsonify({"error": "No summary data available"}), 404
+    return jsonify(summary)
+
+@app.route('/api/partner_performance/status', methods=['GET'])
+@cached_response
+def get_partner_status():
+    partner_contract_param = request.args.get('partner_contract', default="Amazon-Prime", type=str)
+    conn = get_db_connection()
+    statuses = fetch_partner_statuses(conn, [partner_contract_param])
+
+    if partner_contract_param not in statuses:
+        return jsonify({"error": f"No data found for partner: {partner_contract_param}"}), 404
+    return jsonify(statuses[partner_contract_param])
+
+@app.route('/api/partner_performance/batch_status', methods=['GET'])
+@cached_response
+def get_partner_status_batch():
+    # ?partner_contract=A&partner_contract=B or ?partner_contract=A,B; omit for every partner.
+    requested = list(dict.fromkeys(p for arg in request.args.getlist('partner_contract') for p in arg.split(',') if p))
+    conn = get_db_connection()
+    statuses = fetch_partner_statuses(conn, requested or None)
+
+    partners = requested or list(statuses)
+    return jsonify({
+        "partners": [statuses[p] for p in partners if p in statuses],
+        "not_found": [p for p in partners if p not in statuses]
     })
 
+def build_metrics_snapshot(conn):
+    return {"daily_summary": fetch_daily_summary(conn), "partners": fetch_partner_statuses(conn)}
+
+@app.route('/api/dashboard/snapshot', methods=['GET'])
+@cached_response
+def get_dashboard_snapshot():
+    # Everything live_dashboard renders, in one response: the overall summary
+    # (null without data) and the status of every partner with data.
+    return jsonify(build_metrics_snapshot(get_db_connection()))
+
+# Latest published snapshot for /api/stream subscribers; guarded by _stream_condition.
+_stream_condition = threading.Condition()
+_stream_state = {"subscribers": 0, "watching": False, "version": None, "snapshot": None}
+
+def diff_stream_snapshots(old, new):
+    """Top-level metric changes from old to new; removed partners map to None."""
+    delta = {}
+    if old["daily_summary"] != new["daily_summary"]:
+        delta["daily_summary"] = new["daily_summary"]
+    partners = {partner: new["partners"].get(partner)
+                for partner in sorted(set(old["partners"]) | set(new["partners"]))
+                if old["partners"].get(partner) != new["partners"].get(partner)}
+    if partners:
+        delta["partners"] = partners
+    return delta
+
+def watch_data_version():
+    # Runs while anyone is subscribed. A new data_version is published with a
+    # snapshot read in the same transaction, so the two always agree.
+    conn = conn_name = None
+    try:
+        while True:
+            with _stream_condition:
+                if _stream_state["subscribers"] == 0:
+                    _stream_state["watching"] = False
+                    return
+            try:
+                if conn_name != DATABASE_NAME:
+                    if conn is not None:
+                        conn.close()
+                    conn, conn_name = open_read_connection(DATABASE_NAME), DATABASE_NAME
+                conn.execute("BEGIN")
+                try:
+                    data_version = get_data_version(conn)
+                    # Keyed on the database too, so switching files republishes.
+                    if data_version and (conn_name, data_version[0]) != _stream_state["version"]:
+                        snapshot = build_metrics_snapshot(conn)
+                        with _stream_condition:
+                            _stream_state["version"] = (conn_name, data_version[0])
+                            _stream_state["snapshot"] = snapshot
+                            _stream_condition.notify_all()
+                finally:
+                    conn.rollback()
+            except sqlite3.Error as e:
+                print(f"[STREAM ERROR] Failed to poll data_version: {e}")
+                if conn is not None:
+                    conn.close()
+                conn = conn_name = None
+            time.sleep(STREAM_POLL_INTERVAL_SECONDS)
+    finally:
+        if conn is not None:
+            conn.close()
+
+def format_stream_event(event, version, payload):
+    return f"id: {version}\nevent: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+def stream_metric_events():
+    """SSE generator: a 'snapshot' event first, then a 'delta' event per change.
+
+    Versions whose metrics did not change send nothing, so an idle subscriber
+    only sees periodic keep-alive comments.
+    """
+    with _stream_condition:
+        _stream_state["subscribers"] += 1
+        if not _stream_state["watching"]:
+            _stream_state["watching"] = True
+            threading.Thread(target=watch_data_version, name="data-version-watcher", daemon=True).start()
+    try:
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        last_version = last_snapshot = None
+        while True:
+            with _stream_condition:
+                published = _stream_condition.wait_for(
+                    lambda: _stream_state["version"] not in (None, last_version)
+                    and _stream_state["version"][0] == DATABASE_NAME,
+                    timeout=STREAM_HEARTBEAT_SECONDS)
+                version, snapshot = _stream_state["version"], _stream_state["snapshot"]
+            if not published:
+                yield ": keep-alive\n\n"
+                continue
+            if last_snapshot is None:
+                yield format_stream_event("snapshot", version[1], snapshot)
+            else:
+                delta = diff_stream_snapshots(last_snapshot, snapshot)
+                if delta:
+                    yield format_stream_event("delta", version[1], delta)
+            last_version, last_snapshot = version, snapshot
+    finally:
+        with _stream_condition:
+            _stream_state["subscribers"] -= 1
+
+@app.route('/api/stream', methods=['GET'])
+def get_metric_stream():
+    return Response(stream_metric_events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        "Access-Control-Allow-Origin": STREAM_ALLOWED_ORIGIN,
+    })
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    # HTTP/1.1 lets the dashboard's pooled client keep connections open between
+    # calls; Werkzeug's default HTTP/1.0 closes the connection after every response.
+    protocol_version = "HTTP/1.1"
+
 def run_api_service():
     print("-" * 60)
     print("  Maverick Operations API Service - Act II")
     print("-" * 60)
     print("[INFO] Starting Flask API server for Maverick Operations...")
     print("[INFO] Daily Summary: http://127.0.0.1:5000/api/logistics/daily_summary")
+    print("           (Add ?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|hour for per-day or per-hour buckets)")
     print("[INFO] Partner Status: http://127.0.0.1:5000/api/partner_performance/status?partner_contract=Amazon-Prime")
     print("           (Try other partners like Uhaul-Interstate, Hertz-Local etc.)")
+    print("[INFO] All Partners: http://127.0.0.1:5000/api/partner_performance/batch_status")
+    print("[INFO] Dashboard Snapshot: http://127.0.0.1:5000/api/dashboard/snapshot")
+    print("[INFO] Live Updates (SSE): http://127.0.0.1:5000/api/stream")
     print("[INFO] Press CTRL+C in this terminal to stop the server.")
     print("-" * 60 + "\n")
     # Set debug=False if using the .sh script that redirects output
-    app.run(host='127.0.0.1', port=5000, debug=False) 
+    app.run(host='127.0.0.1', port=5000, debug=False, request_handler=KeepAliveRequestHandler)
 
 if __name__ == '__main__':
     run_api_service()
@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+# Minimum cosine similarity for a hit. With numbers and qualifiers matched
+# exactly, bench_semantic_cache.py sees its first false hits at 0.60; 0.85 keeps
+# a wide margin for contrasts the qualifier list does not cover.
+SEMANTIC_CACHE_THRESHOLD = 0.85
+SEMANTIC_CACHE_MAX_ENTRIES = 512
+SEMANTIC_CACHE_DIMENSIONS = 1024
+
+# Words that change how a scenario reads but not what it means for the contract.
+# Prepositions such as "over", "on", "in" or "about" are deliberately absent:
+# they can flip a scenario ("delayed over 3 hours", "warning light came on").
+STOP_WORDS = frozenset("""
+a an the is are was were be been being has have had of to by for with from
+and or but so that this these those it its our we us i my me there here just got get very really
+""".split())
+# Negations and comparisons flip a scenario with a one-word edit that barely
+# moves the embedding, so like numbers they must match exactly for a hit.
+QUALIFIER_WORDS = frozenset("""
+not no never none nothing without under over less more fewer than least most above below
+before after on off
+""".split())
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+TOKEN_PATTERN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+
+def scenario_tokens(text):
+    text = text.lower().replace("n't", " not")
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOP_WORDS]
+
+
+def scenario_constraints(text):
+    """The numbers and qualifier words a cached answer depends on."""
+    return (sorted(NUMBER_PATTERN.findall(text)),
+            sorted({token for token in scenario_tokens(text) if token in QUALIFIER_WORDS}))
+
+
+def embed_scenario(text, dimensions=SEMANTIC_CACHE_DIMENSIONS):
+    """Unit-length hashed bag of words and character trigrams.
+
+    Words carry the meaning; trigrams make inflections ("delay", "delayed",
+    "delays") land close together. Returns None for text without tokens.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token in scenario_tokens(text):
+        vector[zlib.crc32(token.encode()) % dimensions] += 2.0
+        padded = f" {token} "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode()) % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+class SemanticCache:
+    """In-memory nearest-neighbour cache for free-text LLM queries.
+
+    Entries live in one preallocated matrix of unit vectors, so a lookup is a
+    single matrix-vector product. A hit needs the same namespace (e.g. model,
+    partner and contract), cosine similarity of at least `threshold`, and the
+    same numbers and qualifier words in the text: "delayed 3 hours", "delayed
+    5 hours" and "delayed over 3 hours" read alike but can fall under
+    different penalty clauses. Beyond `max_entries`
+    the least recently used entry is replaced.
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                 dimensions=SEMANTIC_CACHE_DIMENSIONS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dimensions = dimensions
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._vectors = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self._entries = [None] * max_entries  # (namespace, constraints, query, response) per row
+        self._last_used = np.full(max_entries, -np.inf)
+        self._lock = threading.Lock()
+
+    def lookup(self, namespace, query):
+        """(response, matched query, similarity) for the closest cached query, or None."""
+        vector = embed_scenario(query, self.dimensions)
+        constraints = scenario_constraints(query)
+        with self._lock:
+            if vector is not None:
+                rows = [i for i, entry in enumerate(self._entries)
+                        if entry is not None and entry[0] == namespace and entry[1] == constraints]
+                if rows:
+                    scores = self._vectors[rows] @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        row = rows[best]
+                        self._last_used[row] = time.monotonic()
+                        self.stats["hits"] += 1
+                        _, _, cached_query, response = self._entries[row]
+                        return response, cached_query, float(scores[best])
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, namespace, query, response):
+        vector = embed_scenario(query, self.dimensions)
+        if vector is None:
+            return
+        with self._lock:
+            row = int(np.argmin(self._last_used))
+            if self._entries[row] is not None:
+                self.stats["evictions"] += 1
+            self._vectors[row] = vector
+            self._entries[row] = (namespace, scenario_constraints(query), query, response)
+            self._last_used[row] = time.monotonic()
+
+    def render_metrics(self, prefix="compliance_semantic_cache"):
+        with self._lock:
+            stats = dict(self.stats)
+            size = sum(entry is not None for entry in self._entries)
+        lines = []
+        for name, help_text in (("hits", "Queries answered from a similar cached query."),
+                                ("misses", "Queries with no similar cached query."),
+                                ("evictions", "Least recently used entries replaced.")):
+            lines += [
+                f"# HELP {prefix}_{name}_total {help_text}",
+                f"# TYPE {prefix}_{name}_total counter",
+                f"{prefix}_{name}_total {stats[name]}",
+            ]
+        lines += [
+            f"# HELP {prefix}_entries Cached queries.",
+            f"# TYPE {prefix}_entries gauge",
+            f"{prefix}_entries {size}",
+        ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,556 @@
+"""Tests for the compliance assistant (logistics-dashboard/compliance_dashboard.py)
+and the Gemini plumbing behind it:
+
+  llm_cache.py       on-disk response cache for compliance briefs
+  brief_warmer.py    background generation of every partner's brief
+  llm_streams.py     streamed scenario analyses and their per-user job queue
+  semantic_cache.py  reuse of analyses for near-duplicate scenarios
+
+Gemini is replaced by a fake client that counts calls; no network required.
+"""
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+
+from brief_warmer import BriefWarmer
+from llm_cache import LLMResponseCache, llm_cache_key
+from llm_streams import LLMStreams, QueueFullError, UserQueueFullError
+
+
+class FakeModels:
+    def __init__(self, text="- Keep the trailer sealed."):
+        self.text = text
+        self.calls = []
+        self.release = threading.Event()  # clear to hold calls in flight
+        self.release.set()
+
+    def generate_content(self, model, contents):
+        self.release.wait(5)
+        self.calls.append((model, contents))
+        return type("FakeResponse", (), {"text": self.text})()
+
+    def generate_content_stream(self, model, contents):
+        self.calls.append((model, contents))
+        for word in self.text.split(" "):
+            self.release.wait(5)
+            yield type("FakeChunk", (), {"text": word + " "})()
+
+
+class FakeGeminiClient:
+    def __init__(self, text="- Keep the trailer sealed."):
+        self.models = FakeModels(text)
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+# ── LLM response cache ─────────────────────────────────────────────────────
+
+class TestLLMResponseCache:
+    def test_round_trip_and_stats(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / "llm.db"))
+        assert cache.get("m", "prompt", "contract") is None
+        cache.put("m", "prompt", "contract", "brief")
+        assert cache.get("m", "prompt", "contract") == "brief"
+        assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+        assert "compliance_llm_cache_hits_total 1" in cache.render_metrics()
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "llm.db")
+        cache = LLMResponseCache(path)
+        cache.put("m", "prompt", "contract", "brief")
+        cache.close()
+        assert LLMResponseCache(path).get("m", "prompt", "contract") == "brief"
+
+    def test_key_covers_model_prompt_and_contract(self):
+        base = llm_cache_key("m", "prompt", "contract")
+        assert base != llm_cache_key("m2", "prompt", "contract")
+        assert base != llm_cache_key("m", "prompt2", "contract")
+        assert base != llm_cache_key("m", "prompt", "contract v2")
+        # Separators keep field boundaries from colliding.
+        assert llm_cache_key("ab", "c", "") != llm_cache_key("a", "bc", "")
+
+    def test_ttl_expiry(self, tmp_path):
+        clock = FakeClock()
+        cache = LLMResponseCache(str(tmp_path / "llm.db"), ttl_seconds=60, clock=clock)
+        cache.put("m", "prompt", "contract", "brief")
+        clock.now += 59
+        assert cache.get("m", "prompt", "contract") == "brief"
+        clock.now += 1
+        assert cache.get("m", "prompt", "contract") is None
+        assert cache.stats["expired"] == 1
+
+    def test_lru_eviction_keeps_recently_used(self, tmp_path):
+        clock = FakeClock()
+        cache = LLMResponseCache(str(tmp_path / "llm.db"), max_entries=2, clock=clock)
+        cache.put("m", "a", "", "A")
+        clock.now += 1
+        cache.put("m", "b", "", "B")
+        clock.now += 1
+        assert cache.get("m", "a", "") == "A"  # "b" is now least recently used
+        clock.now += 1
+        cache.put("m", "c", "", "C")
+        assert cache.get("m", "b", "") is None
+        assert cache.get("m", "a", "") == "A"
+        assert cache.get("m", "c", "") == "C"
+        assert cache.stats["evictions"] == 1
+
+
+# ── Brief warmer ───────────────────────────────────────────────────────────
+
+class TestBriefWarmer:
+    def test_warms_every_partner_with_bounded_concurrency(self):
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        def generate(partner, contract):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return f"brief for {partner}"
+
+        warmer = BriefWarmer(generate, concurrency=2)
+        contracts = {f"Partner-{i}": f"contract {i}" for i in range(6)}
+        assert len(warmer.warm(contracts)) == 6
+        assert warmer.warm(contracts) == []  # already queued
+        warmer.wait(timeout=5)
+        assert peak[0] == 2
+        assert warmer.get("Partner-3", "contract 3")["text"] == "brief for Partner-3"
+        assert warmer.stats["generated"] == 6
+
+    def test_get_does_not_block_and_regenerates_on_contract_change(self):
+        release = threading.Event()
+        calls = []
+
+        def generate(partner, contract):
+            calls.append(contract)
+            release.wait(5)
+            return contract.upper()
+
+        warmer = BriefWarmer(generate)
+        assert warmer.get("Hertz-Local", "v1")["status"] == "generating"
+        release.set()
+        warmer.wait(timeout=5)
+        assert warmer.get("Hertz-Local", "v1") == {"status": "ready", "text": "V1", "error": None}
+        release.clear()
+        assert warmer.get("Hertz-Local", "v2")["status"] == "generating"
+        release.set()
+        warmer.wait(timeout=5)
+        assert warmer.get("Hertz-Local", "v2")["text"] == "V2"
+        assert calls == ["v1", "v2"]
+
+    def test_ready_brief_is_regenerated_after_its_ttl(self):
+        now = [0.0]
+        calls = []
+        release = threading.Event()
+        release.set()
+
+        def generate(partner, contract):
+            calls.append(now[0])
+            release.wait(5)
+            return f"brief {len(calls)}"
+
+        warmer = BriefWarmer(generate, ttl_seconds=60, clock=lambda: now[0])
+        warmer.warm({"Hertz-Local": "contract"})
+        warmer.wait(timeout=5)
+        now[0] = 59
+        assert warmer.get("Hertz-Local", "contract")["text"] == "brief 1"
+        release.clear()
+        now[0] = 60
+        assert warmer.get("Hertz-Local", "contract")["status"] == "generating"
+        release.set()
+        warmer.wait(timeout=5)
+        assert warmer.get("Hertz-Local", "contract")["text"] == "brief 2"
+        assert warmer.stats["expired"] == 1
+
+    def test_rate_limit_backs_off_and_retries(self):
+        attempts = []
+
+        def generate(partner, contract):
+            attempts.append(partner)
+            if len(attempts) < 3:
+                raise RateLimitError("429 RESOURCE_EXHAUSTED")
+            return "brief"
+
+        warmer = BriefWarmer(generate, backoff_seconds=0.01)
+        warmer.warm({"Amazon-Prime": "contract"})
+        warmer.wait(timeout=5)
+        assert warmer.get("Amazon-Prime", "contract")["text"] == "brief"
+        assert warmer.stats["rate_limited"] == 2
+
+    def test_failure_is_retried_only_on_request(self):
+        release = threading.Event()
+        release.set()
+        outcomes = [ValueError("bad request"), "brief"]
+
+        def generate(partner, contract):
+            release.wait(5)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        warmer = BriefWarmer(generate)
+        warmer.warm({"Uhaul-Interstate": "contract"})
+        warmer.wait(timeout=5)
+        assert warmer.get("Uhaul-Interstate", "contract") == {"status": "error", "text": None, "error": "bad request"}
+        release.clear()
+        retried = warmer.get("Uhaul-Interstate", "contract", retry_failed=True)
+        assert retried == {"status": "generating", "text": None, "error": "bad request"}
+        release.set()
+        warmer.wait(timeout=5)
+        assert warmer.get("Uhaul-Interstate", "contract")["text"] == "brief"
+
+
+# ── LLM streams ────────────────────────────────────────────────────────────
+
+def _chunks(*texts, fail=None):
+    for text in texts:
+        yield type("FakeChunk", (), {"text": text})()
+    if fail:
+        raise fail
+
+
+class TestLLMStreams:
+    def test_collects_chunks_and_records_latency(self):
+        streams = LLMStreams()
+        stream_id = streams.start(lambda: _chunks("Notify ", None, "dispatch."))
+        streams.wait(stream_id, timeout=5)
+        assert streams.get(stream_id) == {"status": "done", "position": None, "text": "Notify dispatch.",
+                                          "done": True, "error": None}
+        metrics = streams.render_metrics()
+        assert "compliance_llm_stream_ttft_seconds_count 1" in metrics
+        assert "compliance_llm_stream_total_seconds_count 1" in metrics
+        assert 'compliance_llm_stream_total{outcome="ok"} 1' in metrics
+
+    def test_keeps_partial_text_on_error(self):
+        streams = LLMStreams()
+        stream_id = streams.start(lambda: _chunks("Partial", fail=RuntimeError("stream reset")))
+        streams.wait(stream_id, timeout=5)
+        stream = streams.get(stream_id)
+        assert (stream["text"], stream["done"], stream["error"]) == ("Partial", True, "stream reset")
+
+    def test_finished_streams_expire(self):
+        streams = LLMStreams(retention_seconds=0)
+        stream_id = streams.start(lambda: _chunks("done"))
+        streams.wait(stream_id, timeout=5)
+        streams.start(lambda: _chunks("next"))
+        assert streams.get(stream_id) is None
+
+
+# ── LLM stream queue ───────────────────────────────────────────────────────
+
+class TestLLMStreamQueue:
+    @staticmethod
+    def _held(gate, text="ok"):
+        def open_stream():
+            gate.wait(5)
+            yield type("FakeChunk", (), {"text": text})()
+        return open_stream
+
+    def test_global_and_per_user_limits_queue_in_order(self):
+        gate = threading.Event()
+        streams = LLMStreams(workers=2, per_user=1)
+        a1 = streams.start(self._held(gate), user="a")
+        a2 = streams.start(self._held(gate), user="a")
+        b1 = streams.start(self._held(gate), user="b")
+        c1 = streams.start(self._held(gate), user="c")
+        # "a" is at its per-user limit, so "b" takes the second worker ahead of a2.
+        assert [streams.get(s)["status"] for s in (a1, a2, b1, c1)] == ["running", "queued", "running", "queued"]
+        assert streams.get(a2)["position"] == 1 and streams.get(c1)["position"] == 2
+        assert "compliance_llm_stream_queued 2" in streams.render_metrics()
+        gate.set()
+        for stream_id in (a1, a2, b1, c1):
+            assert streams.wait(stream_id, timeout=5)
+        assert all(streams.get(s)["text"] == "ok" for s in (a1, a2, b1, c1))
+
+    def test_identical_in_flight_requests_share_one_call(self):
+        gate = threading.Event()
+        calls = []
+
+        def open_stream():
+            calls.append(1)
+            return self._held(gate)()
+
+        streams = LLMStreams()
+        first = streams.start(open_stream, user="a", key=("model", "prompt"))
+        assert streams.start(open_stream, user="b", key=("model", "prompt")) == first
+        gate.set()
+        streams.wait(first, timeout=5)
+        assert streams.start(open_stream, user="b", key=("model", "prompt")) != first
+        assert 'compliance_llm_stream_total{outcome="deduplicated"} 1' in streams.render_metrics()
+
+    def test_full_queue_rejects(self):
+        gate = threading.Event()
+        streams = LLMStreams(workers=1, max_queued=1)
+        running = streams.start(self._held(gate), user="a")
+        streams.start(self._held(gate), user="b")
+        with pytest.raises(QueueFullError):
+            streams.start(self._held(gate), user="c")
+        gate.set()
+        streams.wait(running, timeout=5)
+
+    def test_one_user_cannot_fill_the_queue(self):
+        gate = threading.Event()
+        streams = LLMStreams(workers=1, max_queued=4, max_queued_per_user=2)
+        running = streams.start(self._held(gate), user="a")
+        streams.start(self._held(gate), user="a")
+        streams.start(self._held(gate), user="a")
+        with pytest.raises(UserQueueFullError):
+            streams.start(self._held(gate), user="a")
+        waiting = streams.start(self._held(gate), user="b")
+        assert streams.get(waiting)["position"] == 3
+        assert 'compliance_llm_stream_total{outcome="rejected_user"} 1' in streams.render_metrics()
+        gate.set()
+        streams.wait(running, timeout=5)
+        streams.wait(waiting, timeout=5)
+
+
+# ── Semantic cache ─────────────────────────────────────────────────────────
+
+class TestSemanticCache:
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_near_duplicate_hits_and_unrelated_misses(self):
+        from semantic_cache import SemanticCache
+
+        cache = SemanticCache()
+        cache.store("Uhaul", "Truck delayed 3 hours", "Notify dispatch.")
+        response, matched, similarity = cache.lookup("Uhaul", "The truck is delayed by 3 hours")
+        assert (response, matched) == ("Notify dispatch.", "Truck delayed 3 hours")
+        assert similarity > 0.99
+        assert cache.lookup("Uhaul", "Van warning light came on") is None
+        assert cache.lookup("Hertz", "Truck delayed 3 hours") is None  # other namespace
+        assert cache.stats == {"hits": 1, "misses": 2, "evictions": 0}
+
+    def test_numbers_must_match(self):
+        from semantic_cache import SemanticCache
+
+        cache = SemanticCache()
+        cache.store("Uhaul", "Truck delayed 3 hours", "Under the 4 hour window.")
+        assert cache.lookup("Uhaul", "Truck delayed 5 hours") is None
+
+    @pytest.mark.parametrize("cached, query", [
+        ("Truck delayed 3 hours", "Truck delayed over 3 hours"),
+        ("Truck delayed 3 hours", "Truck delayed under 3 hours"),
+        ("Van warning light came on", "Van warning light came off"),
+        ("Pallet damaged on delivery", "Pallet not damaged on delivery"),
+        ("Pallet damaged on delivery", "Pallet wasn't damaged on delivery"),
+    ])
+    def test_negations_and_comparisons_must_match(self, cached, query):
+        from semantic_cache import SemanticCache
+
+        cache = SemanticCache(threshold=0.5)
+        cache.store("Uhaul", cached, "analysis")
+        assert cache.lookup("Uhaul", query) is None
+        assert cache.lookup("Uhaul", cached) is not None
+
+    def test_threshold_is_configurable(self):
+        from semantic_cache import SemanticCache, embed_scenario
+
+        a, b = "Truck delayed 3 hours", "Truck running 3 hours late"
+        similarity = float(embed_scenario(a) @ embed_scenario(b))
+        strict, loose = SemanticCache(threshold=similarity + 0.01), SemanticCache(threshold=similarity - 0.01)
+        for cache in (strict, loose):
+            cache.store("Uhaul", a, "analysis")
+        assert strict.lookup("Uhaul", b) is None
+        assert loose.lookup("Uhaul", b) is not None
+
+    def test_evicts_least_recently_used(self):
+        from semantic_cache import SemanticCache
+
+        cache = SemanticCache(max_entries=2)
+        cache.store("p", "truck delayed", "A")
+        cache.store("p", "van warning light", "B")
+        assert cache.lookup("p", "truck delayed") is not None  # "van warning light" is now LRU
+        cache.store("p", "pallet damaged on arrival", "C")
+        assert cache.lookup("p", "van warning light") is None
+        assert cache.lookup("p", "truck delayed") is not None
+        assert cache.stats["evictions"] == 1
+
+
+# ── Compliance briefs ──────────────────────────────────────────────────────
+
+class TestComplianceBriefCache:
+    @pytest.fixture
+    def compliance(self, monkeypatch, tmp_path):
+        pytest.importorskip("dash")
+        pytest.importorskip("dash_bootstrap_components")
+        pytest.importorskip("google.genai")
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        import compliance_dashboard
+
+        fake = FakeGeminiClient()
+        monkeypatch.setattr(compliance_dashboard, "client", fake)
+        monkeypatch.setattr(compliance_dashboard, "GEMINI_READY", True)
+        monkeypatch.setattr(compliance_dashboard, "brief_cache", LLMResponseCache(str(tmp_path / "llm.db")))
+        monkeypatch.setattr(compliance_dashboard, "brief_warmer",
+                            BriefWarmer(compliance_dashboard.generate_compliance_brief))
+        return compliance_dashboard, fake
+
+    @staticmethod
+    def _brief(module, partner):
+        module.get_partner_compliance_brief_for_dashboard(partner)
+        module.brief_warmer.wait(timeout=5)
+        return module.get_partner_compliance_brief_for_dashboard(partner)
+
+    def test_repeat_brief_skips_the_model(self, compliance):
+        module, fake = compliance
+        assert self._brief(module, "Amazon-Prime").children == fake.models.text
+        assert module.get_partner_compliance_brief_for_dashboard("Amazon-Prime").children == fake.models.text
+        assert len(fake.models.calls) == 1
+        assert fake.models.calls[0][0] == module.GEMINI_MODEL
+
+    def test_warmer_reads_through_the_disk_cache(self, compliance, monkeypatch):
+        module, fake = compliance
+        self._brief(module, "Amazon-Prime")
+        # A restarted app has an empty warmer but the same on-disk cache.
+        monkeypatch.setattr(module, "brief_warmer", BriefWarmer(module.generate_compliance_brief))
+        assert self._brief(module, "Amazon-Prime").children == fake.models.text
+        assert len(fake.models.calls) == 1
+        assert module.brief_cache.stats["hits"] == 1
+
+    def test_contract_change_invalidates(self, compliance, monkeypatch):
+        module, fake = compliance
+        self._brief(module, "Hertz-Local")
+        contracts = dict(module.SIMULATED_CONTRACTS)
+        contracts["Hertz-Local"] += " Vehicles must be returned fuelled."
+        monkeypatch.setattr(module, "SIMULATED_CONTRACTS", contracts)
+        self._brief(module, "Hertz-Local")
+        assert len(fake.models.calls) == 2
+
+    def test_generating_brief_is_polled_until_ready(self, compliance):
+        module, fake = compliance
+        fake.models.release.clear()
+        _, poll_disabled, pending = module.render_brief("Amazon-Prime")
+        assert poll_disabled is False and pending == {"brief": "Amazon-Prime"}
+        fake.models.release.set()
+        module.brief_warmer.wait(timeout=5)
+        output, poll_disabled, pending = module.render_brief(pending["brief"], retry_failed=False)
+        assert poll_disabled is True and pending is None
+        assert output.children[1].children == fake.models.text
+
+    def test_errors_are_not_cached(self, compliance):
+        module, fake = compliance
+
+        def fail(model, contents):
+            raise RuntimeError("quota exceeded")
+
+        fake.models.generate_content = fail
+        module.get_partner_compliance_brief_for_dashboard("Uhaul-Interstate")
+        module.brief_warmer.wait(timeout=5)
+        result, generating = module.compliance_brief_view("Uhaul-Interstate", retry_failed=False)
+        assert "quota exceeded" in result.children and not generating
+        del fake.models.generate_content
+        assert self._brief(module, "Uhaul-Interstate").children == fake.models.text
+        assert len(fake.models.calls) == 1
+
+
+# ── Scenario analysis ──────────────────────────────────────────────────────
+
+class TestScenarioStreaming:
+    @pytest.fixture
+    def compliance(self, monkeypatch):
+        pytest.importorskip("dash")
+        pytest.importorskip("dash_bootstrap_components")
+        pytest.importorskip("google.genai")
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        import compliance_dashboard
+
+        fake = FakeGeminiClient("Notify Uhaul Dispatch within 1 hour.")
+        monkeypatch.setattr(compliance_dashboard, "client", fake)
+        monkeypatch.setattr(compliance_dashboard, "GEMINI_READY", True)
+        monkeypatch.setattr(compliance_dashboard, "scenario_streams", LLMStreams())
+        monkeypatch.setattr(compliance_dashboard, "scenario_cache", compliance_dashboard.SemanticCache())
+        return compliance_dashboard, fake
+
+    def test_output_grows_until_the_stream_ends(self, compliance):
+        module, fake = compliance
+        fake.models.release.clear()
+        component, stream_id = module.start_scenario_analysis("Uhaul-Interstate", "Truck delayed 3 hours")
+        assert "Waiting for Gemini" in str(component.children)
+        output, poll_disabled, pending = module.render_scenario_analysis(
+            "Uhaul-Interstate", "Truck delayed 3 hours", component, stream_id, True)
+        assert poll_disabled is False and pending["stream"] == stream_id
+
+        fake.models.release.set()
+        module.scenario_streams.wait(stream_id, timeout=5)
+        component, streaming = module.scenario_analysis_view(stream_id)
+        assert not streaming
+        assert component.children.strip() == fake.models.text
+        assert fake.models.calls[0][0] == module.GEMINI_MODEL
+        assert "Truck delayed 3 hours" in fake.models.calls[0][1]
+
+    def test_partial_text_is_shown_while_streaming(self, compliance):
+        module, _ = compliance
+        gate = threading.Event()
+
+        def slow_stream():
+            yield type("FakeChunk", (), {"text": "Notify "})()
+            gate.wait(5)
+            yield type("FakeChunk", (), {"text": "dispatch."})()
+
+        stream_id = module.scenario_streams.start(slow_stream)
+        deadline = time.monotonic() + 5
+        while not module.scenario_streams.get(stream_id)["text"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        component, streaming = module.scenario_analysis_view(stream_id)
+        assert streaming and component.children.startswith("Notify")
+        gate.set()
+        module.scenario_streams.wait(stream_id, timeout=5)
+        assert module.scenario_analysis_view(stream_id)[0].children == "Notify dispatch."
+
+    def test_blank_scenario_does_not_stream(self, compliance):
+        module, fake = compliance
+        component, stream_id = module.start_scenario_analysis("Amazon-Prime", "   ")
+        assert stream_id is None and "Please provide" in component.children
+        assert fake.models.calls == []
+
+    def test_queued_analysis_shows_its_position(self, compliance, monkeypatch):
+        module, fake = compliance
+        monkeypatch.setattr(module, "scenario_streams", LLMStreams(workers=1, max_queued=1))
+        fake.models.release.clear()
+        module.start_scenario_analysis("Amazon-Prime", "Tracking API down for 2 hours", "user-a")
+        component, stream_id = module.start_scenario_analysis("Hertz-Local", "Van warning light on", "user-b")
+        assert "Queued at position 1" in str(component.children)
+        component, rejected = module.start_scenario_analysis("Uhaul-Interstate", "Load shifted", "user-c")
+        assert rejected is None and "at capacity" in component.children
+        fake.models.release.set()
+        assert module.scenario_streams.wait(stream_id, timeout=5)
+        assert module.scenario_analysis_view(stream_id)[0].children.strip() == fake.models.text
+
+    def test_similar_scenario_is_served_from_the_semantic_cache(self, compliance, monkeypatch):
+        module, fake = compliance
+        _, stream_id = module.start_scenario_analysis("Uhaul-Interstate", "Truck delayed 3 hours")
+        module.scenario_streams.wait(stream_id, timeout=5)
+        component, stream_id = module.start_scenario_analysis("Uhaul-Interstate", "The truck is delayed by 3 hours")
+        assert stream_id is None
+        assert "Cached" in str(component.children[0].children)
+        assert component.children[1].children.strip() == fake.models.text
+        assert len(fake.models.calls) == 1
+
+        # A changed contract must not reuse analyses of the old text.
+        contracts = dict(module.SIMULATED_CONTRACTS)
+        contracts["Uhaul-Interstate"] += " F. Delays over 2 hours incur a $100 fee."
+        monkeypatch.setattr(module, "SIMULATED_CONTRACTS", contracts)
+        _, stream_id = module.start_scenario_analysis("Uhaul-Interstate", "Truck delayed 3 hours")
+        assert stream_id is not None
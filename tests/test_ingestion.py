@@ -0,0 +1,373 @@
+"""Tests for the Maverick data ingestion service
+(logistics-dashboard/data_ingestion.py).
+
+Ingestion runs against temp SQLite files and small generated CSVs.
+No network calls required.
+"""
+from __future__ import annotations
+import os
+import sys
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
+
+import data_ingestion as di  # noqa: E402
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard", "shipments.csv")
+
+
+def _reference_status(planned, actual, delivery_status):
+    try:
+        return di.calculate_on_time_status(planned, actual, delivery_status)
+    except TypeError:
+        return "Error"
+
+
+# ── On-time status ─────────────────────────────────────────────────────────
+
+class TestOnTimeStatusColumn:
+    TIMESTAMPS = [
+        "2025-04-27T12:00:00",
+        "2025-04-27T12:15:00",          # exactly at the grace boundary
+        "2025-04-27T12:15:00.000001",   # just past it
+        "2025-04-27T11:00:00.5",
+        "2025-04-27 12:00",
+        "2025-04-27T12:00:00+02:00",
+        "2025-04",
+        " 2025-04-27T12:00:00",
+        "2025-13-01T00:00:00",
+        "0001-01-01T00:00:00",
+        "garbage",
+        "",
+        None,
+    ]
+
+    def test_parity_with_row_function(self):
+        rows = [(p, a, s) for p in self.TIMESTAMPS for a in self.TIMESTAMPS
+                for s in ("Delivered", "In-Transit", "Delayed", None)]
+        df = pd.DataFrame(rows, columns=["planned", "actual", "status"])
+        result = di.calculate_on_time_status_column(df["planned"], df["actual"], df["status"])
+        expected = [_reference_status(*row) for row in rows]
+        assert result.tolist() == expected
+
+    def test_parity_on_sample_csv(self):
+        df = pd.read_csv(SAMPLE_CSV)
+        result = di.calculate_on_time_status_column(
+            df["planned_arrival_datetime"], df["actual_arrival_datetime"], df["delivery_status"]
+        )
+        expected = [
+            _reference_status(p, a, s) for p, a, s in zip(
+                df["planned_arrival_datetime"], df["actual_arrival_datetime"], df["delivery_status"]
+            )
+        ]
+        assert result.tolist() == expected
+
+    def test_grace_window_labels(self):
+        planned = pd.Series(["2025-04-27T12:00:00"] * 3)
+        actual = pd.Series(["2025-04-27T12:15:00", "2025-04-27T12:16:00", "not-a-date"])
+        status = pd.Series(["Delivered"] * 3)
+        result = di.calculate_on_time_status_column(planned, actual, status)
+        assert result.tolist() == ["On-Time", "Late", "Error"]
+
+
+# ── Shipment ingestion ─────────────────────────────────────────────────────
+
+@pytest.fixture
+def shipments_csv(tmp_path, monkeypatch):
+    path = tmp_path / "shipments.csv"
+    pd.read_csv(SAMPLE_CSV).to_csv(path, index=False)
+    monkeypatch.setattr(di, "SHIPMENTS_LOG_CSV", str(path))
+    return path
+
+
+@pytest.fixture
+def conn(tmp_path):
+    import sqlite3
+    connection = sqlite3.connect(str(tmp_path / "ingest.db"))
+    di.create_db_tables(connection)
+    yield connection
+    connection.close()
+
+
+def _shipment_rows(connection):
+    return connection.execute(
+        "SELECT shipment_id, on_time_status_calculated, fuel_efficiency_mpg, on_time_status_reported "
+        "FROM daily_shipments ORDER BY shipment_id"
+    ).fetchall()
+
+
+class TestIngestShipments:
+    def test_ingests_every_csv_row(self, shipments_csv, conn):
+        di.ingest_shipments_data(conn)
+        assert conn.execute("SELECT COUNT(*) FROM daily_shipments").fetchone()[0] == 100
+
+    def test_chunked_matches_whole_file(self, shipments_csv, conn, tmp_path):
+        import sqlite3
+        di.ingest_shipments_data(conn)
+        chunked = sqlite3.connect(str(tmp_path / "chunked.db"))
+        di.create_db_tables(chunked)
+        di.ingest_shipments_data(chunked, chunksize=7)
+        assert _shipment_rows(chunked) == _shipment_rows(conn)
+        chunked.close()
+
+
+class TestIncrementalIngest:
+    def _rows_read(self, capsys):
+        out = capsys.readouterr().out
+        return int(out.split("[SUCCESS] Read ")[1].split()[0]) if "[SUCCESS] Read " in out else 0
+
+    def test_full_run_keeps_unique_constraint(self, shipments_csv, conn):
+        di.ingest_shipments_data(conn)
+        indexes = conn.execute("PRAGMA index_list(daily_shipments)").fetchall()
+        assert any(idx[2] for idx in indexes), "shipment_id UNIQUE index was dropped"
+
+    def test_unchanged_file_is_skipped(self, shipments_csv, conn, capsys):
+        di.ingest_shipments_data(conn, incremental=True)
+        capsys.readouterr()
+        di.ingest_shipments_data(conn, incremental=True)
+        assert "nothing to ingest" in capsys.readouterr().out
+
+    def test_append_only_reads_new_rows(self, shipments_csv, conn, capsys):
+        di.ingest_shipments_data(conn, incremental=True)
+        capsys.readouterr()
+        extra = pd.read_csv(SAMPLE_CSV).head(3).copy()
+        extra["shipment_id"] = ["NEW-1", "NEW-2", "NEW-3"]
+        with open(shipments_csv, "a", newline="") as f:
+            extra.to_csv(f, header=False, index=False)
+        di.ingest_shipments_data(conn, incremental=True, chunksize=2)
+        assert self._rows_read(capsys) == 3
+        assert conn.execute("SELECT COUNT(*) FROM daily_shipments").fetchone()[0] == 103
+
+    def test_partial_trailing_line_waits_for_next_run(self, shipments_csv, conn, capsys):
+        di.ingest_shipments_data(conn, incremental=True)
+        with open(shipments_csv, "a") as f:
+            f.write("PARTIAL-1,2025-05-01,VAN-1")
+        di.ingest_shipments_data(conn, incremental=True)
+        assert conn.execute("SELECT COUNT(*) FROM daily_shipments WHERE shipment_id = 'PARTIAL-1'").fetchone()[0] == 0
+
+    def test_data_version_bumps_only_when_rows_change(self, shipments_csv, conn):
+        def version():
+            return conn.execute("SELECT version FROM data_version").fetchone()[0]
+
+        start = version()
+        di.ingest_shipments_data(conn, incremental=True)
+        assert version() == start + 1
+        di.ingest_shipments_data(conn, incremental=True)
+        assert version() == start + 1
+
+    def test_rewrite_updates_only_changed_rows(self, shipments_csv, conn, capsys):
+        di.ingest_shipments_data(conn, incremental=True)
+        capsys.readouterr()
+        df = pd.read_csv(SAMPLE_CSV)
+        df.loc[0, "notes"] = "Rewritten export"
+        df.head(50).to_csv(shipments_csv, index=False)
+        di.ingest_shipments_data(conn, incremental=True)
+        out = capsys.readouterr().out
+        assert "rescanning" in out
+        assert "1 inserted or updated, 49 unchanged" in out
+        note = conn.execute("SELECT notes FROM daily_shipments WHERE shipment_id = ?",
+                            (df.loc[0, "shipment_id"],)).fetchone()[0]
+        assert note == "Rewritten export"
+
+
+# ── Partner tasks ──────────────────────────────────────────────────────────
+
+TODOS = [{"id": i, "title": f"task {i}", "completed": i % 2 == 0} for i in range(1, 8)]
+
+
+@pytest.fixture
+def partner_api(monkeypatch):
+    """Local stub of the partner tasks API. Tests set per-userId behaviour in
+    `responses`: a list of status codes to return in order (last one repeats)."""
+    import json
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    state = {"responses": {}, "delay": {}, "calls": {}}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            user_id = int(parse_qs(urlparse(self.path).query)["userId"][0])
+            n = state["calls"][user_id] = state["calls"].get(user_id, 0) + 1
+            time.sleep(state["delay"].get(user_id, 0))
+            codes = state["responses"].get(user_id, [200])
+            code = codes[min(n, len(codes)) - 1]
+            body = json.dumps(TODOS if code == 200 else {"error": code}).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    monkeypatch.setattr(di, "PARTNER_TASKS_API_URL", f"http://127.0.0.1:{server.server_port}/todos")
+    monkeypatch.setattr(di, "PARTNER_FETCH_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(di, "PARTNER_ID_TO_NAME_MAP", {1: "Amazon-Prime", 2: "Hertz-Local", 3: "Uhaul-Interstate"})
+    yield state
+    server.shutdown()
+
+
+class TestPartnerTaskFetch:
+    def test_fetches_all_partners(self, partner_api):
+        todos, errors = di.fetch_all_partner_tasks()
+        assert errors == {}
+        assert set(todos) == {"Amazon-Prime", "Hertz-Local", "Uhaul-Interstate"}
+
+    def test_retries_transient_errors(self, partner_api):
+        partner_api["responses"][2] = [503, 200]
+        session = di.create_partner_session()
+        assert di.fetch_partner_tasks(session, 2, backoff=0) == TODOS
+        assert partner_api["calls"][2] == 2
+
+    def test_failing_partner_is_isolated(self, partner_api, conn):
+        partner_api["responses"][1] = [500]
+        di.ingest_partner_tasks_data(conn)
+        partners = {row[0] for row in conn.execute("SELECT partner_contract FROM partner_tasks_status")}
+        assert partners == {"Hertz-Local", "Uhaul-Interstate"}
+        assert partner_api["calls"][1] == di.PARTNER_FETCH_RETRIES + 1
+
+    def test_slow_partner_does_not_hold_batch(self, partner_api):
+        import time
+        partner_api["delay"][3] = 2
+        start = time.perf_counter()
+        todos, errors = di.fetch_all_partner_tasks(batch_timeout=0.5)
+        assert time.perf_counter() - start < 1.5
+        assert set(todos) == {"Amazon-Prime", "Hertz-Local"}
+        assert "Uhaul-Interstate" in errors
+
+    def test_closes_the_session_after_the_batch(self, partner_api, monkeypatch):
+        create_partner_session = di.create_partner_session
+        closed = []
+
+        def tracked_session(pool_size):
+            session = create_partner_session(pool_size)
+            session.close = lambda: closed.append(session)
+            return session
+
+        monkeypatch.setattr(di, "create_partner_session", tracked_session)
+        di.fetch_all_partner_tasks()
+        assert len(closed) == 1
+
+
+class TestPartnerTaskIdempotence:
+    def test_rerun_does_not_duplicate(self, partner_api, conn):
+        di.ingest_partner_tasks_data(conn)
+        di.ingest_partner_tasks_data(conn)
+        count = conn.execute("SELECT COUNT(*) FROM partner_tasks_status").fetchone()[0]
+        assert count == 3 * 5
+
+    def test_upsert_keeps_latest_status(self, partner_api, conn, monkeypatch):
+        di.ingest_partner_tasks_data(conn)
+        flipped = [dict(todo, completed=True) for todo in TODOS]
+        monkeypatch.setattr(di, "fetch_all_partner_tasks",
+                            lambda: ({"Amazon-Prime": flipped}, {}))
+        di.ingest_partner_tasks_data(conn)
+        health = conn.execute(
+            "SELECT DISTINCT simulated_service_health FROM partner_tasks_status "
+            "WHERE partner_contract = 'Amazon-Prime'"
+        ).fetchall()
+        assert health == [("OK",)]
+
+    def test_compaction_removes_legacy_duplicates(self, tmp_path):
+        import sqlite3
+        legacy = sqlite3.connect(str(tmp_path / "legacy.db"))
+        legacy.execute("""
+            CREATE TABLE partner_tasks_status (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, partner_contract TEXT, task_source_id INTEGER,
+                task_title TEXT, task_completed_status BOOLEAN, simulated_service_health TEXT,
+                log_timestamp TEXT DEFAULT CURRENT_TIMESTAMP)
+        """)
+        legacy.executemany(
+            "INSERT INTO partner_tasks_status (partner_contract, task_source_id, simulated_service_health) "
+            "VALUES (?, ?, ?)",
+            [("Amazon-Prime", 1, "Action Required"), ("Amazon-Prime", 1, "OK"), ("Hertz-Local", 1, "OK")],
+        )
+        di.create_db_tables(legacy)  # warns, cannot add the unique index yet
+        assert di.compact_partner_tasks(legacy) == 1
+        rows = legacy.execute(
+            "SELECT partner_contract, simulated_service_health FROM partner_tasks_status ORDER BY id"
+        ).fetchall()
+        assert rows == [("Amazon-Prime", "OK"), ("Hertz-Local", "OK")]
+        indexes = {row[1] for row in legacy.execute("PRAGMA index_list(partner_tasks_status)")}
+        assert "idx_partner_tasks_natural_key" in indexes
+        legacy.close()
+
+
+# ── Schema migrations ──────────────────────────────────────────────────────
+
+class TestSchemaMigrations:
+    def test_records_latest_version(self, conn):
+        latest = di.SCHEMA_MIGRATIONS[-1][0]
+        assert di.get_schema_version(conn) == latest
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+        assert versions == [m[0] for m in di.SCHEMA_MIGRATIONS]
+
+    def test_rerun_is_noop(self, conn):
+        assert di.apply_migrations(conn) == di.SCHEMA_MIGRATIONS[-1][0]
+        assert conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0] == len(di.SCHEMA_MIGRATIONS)
+
+    @pytest.mark.parametrize("query, index", [
+        ("SELECT COUNT(shipment_id), SUM(shipment_value_usd), AVG(fuel_efficiency_mpg), "
+         "SUM(CASE WHEN on_time_status_calculated = 'On-Time' THEN 1 ELSE 0 END) "
+         "FROM daily_shipments WHERE delivery_status IN ('Delivered', 'In-Transit')",
+         "idx_daily_shipments_status_summary"),
+        ("SELECT partner_contract, COUNT(shipment_id), AVG(shipment_value_usd), "
+         "SUM(CASE WHEN delivery_status = 'Delivered' THEN 1 ELSE 0 END) "
+         "FROM daily_shipments WHERE partner_contract = 'Amazon-Prime' GROUP BY partner_contract",
+         "idx_daily_shipments_partner_summary"),
+    ])
+    def test_api_queries_use_covering_index(self, conn, query, index):
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query))
+        assert f"USING COVERING INDEX {index}" in plan
+
+    def test_hourly_window_searches_log_date_index(self, conn):
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT substr(actual_departure_datetime, 1, 13), COUNT(shipment_id) "
+            "FROM daily_shipments WHERE delivery_status IN ('Delivered', 'In-Transit') "
+            "AND log_date BETWEEN '2025-04-01' AND '2025-04-02' GROUP BY 1"))
+        assert "USING INDEX idx_daily_shipments_log_date (delivery_status=? AND log_date>? AND log_date<?)" in plan
+
+
+# ── partner_metrics rollup ─────────────────────────────────────────────────
+
+class TestPartnerMetricsRollup:
+    def test_consistent_after_ingest(self, shipments_csv, conn):
+        di.ingest_shipments_data(conn, incremental=True)
+        assert di.check_metrics_rollups(conn) == []
+        total = conn.execute(
+            "SELECT row_count FROM partner_metrics WHERE partner_contract = ?", (di.GLOBAL_METRICS_KEY,)
+        ).fetchone()[0]
+        assert total == conn.execute(
+            "SELECT COUNT(*) FROM daily_shipments WHERE delivery_status IN ('Delivered', 'In-Transit')"
+        ).fetchone()[0]
+
+    def test_consistent_after_updates_and_full_refresh(self, shipments_csv, conn):
+        di.ingest_shipments_data(conn, incremental=True)
+        df = pd.read_csv(SAMPLE_CSV)
+        df.loc[:9, "delivery_status"] = "Delivered"
+        df.loc[10:19, "partner_contract"] = "Ryder-Logistics"
+        df.loc[20:29, "shipment_value_usd"] = None
+        df.to_csv(shipments_csv, index=False)
+        di.ingest_shipments_data(conn, incremental=True)
+        assert di.check_metrics_rollups(conn) == []
+        df.head(40).to_csv(shipments_csv, index=False)
+        di.ingest_shipments_data(conn)
+        assert di.check_metrics_rollups(conn) == []
+
+    def test_check_detects_drift_and_rebuild_repairs(self, shipments_csv, conn):
+        di.ingest_shipments_data(conn)
+        conn.execute("UPDATE partner_metrics SET delivered_count = delivered_count + 1 "
+                     "WHERE partner_contract = 'Hertz-Local'")
+        conn.commit()
+        assert [m[:3] for m in di.check_metrics_rollups(conn)] == [("partner_metrics", "Hertz-Local", "delivered_count")]
+        di.rebuild_metrics_rollups(conn)
+        assert di.check_metrics_rollups(conn) == []
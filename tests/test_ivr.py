@@ -101,8 +101,7 @@ class TestAIConversation:
         assert b"<Redirect>" in r.data
 
     def test_recording_url_triggers_ai_response(self, client):
-        with patch("requests.get") as mock_get:
-            mock_get.return_value = MagicMock(content=b"fake-audio-bytes")
+        with patch("main.recordings.fetch", return_value=b"fake-audio-bytes"):
             r = client.post("/ai", data={
                 "From": "+15551234567",
                 "RecordingUrl": "https://api.twilio.com/fake-recording",
@@ -123,3 +122,602 @@ class TestVoicemail:
         r = client.post("/voicemail", data={"DialCallStatus": "completed"})
         assert r.status_code == 200
         assert b"<Hangup/>" in r.data
+
+
+# ── Conversation store ─────────────────────────────────────────────────────
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestConversationStore:
+    def test_keeps_the_last_messages_per_caller(self):
+        from sessions import ConversationStore
+        store = ConversationStore(max_messages=3)
+        for i in range(5):
+            store.append("+1555", "model", f"reply {i}")
+        assert store.history("+1555") == [("model", "reply 2"), ("model", "reply 3"), ("model", "reply 4")]
+        assert store.history("+1999") == []
+
+    def test_idle_sessions_expire(self):
+        from sessions import ConversationStore
+        clock = FakeClock()
+        store = ConversationStore(idle_ttl_seconds=60, clock=clock)
+        store.append("+1555", "model", "hello")
+        clock.now = 30
+        store.append("+1666", "model", "hello")
+        clock.now = 70
+        store.append("+1777", "model", "hello")  # writes sweep the idle front
+        assert len(store) == 2 and store.evictions["idle"] == 1
+        clock.now = 95
+        assert store.history("+1666") == []
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        from sessions import ConversationStore, message_bytes
+        per_session = message_bytes("model", "x" * 100) + 100
+        store = ConversationStore(memory_budget_bytes=per_session * 3)
+        for caller in ("+1001", "+1002", "+1003"):
+            store.append(caller, "model", "x" * 100)
+        store.append("+1001", "model", "y")  # +1002 is now least recently used
+        store.append("+1004", "model", "x" * 100)
+        assert store.history("+1002") == []
+        assert store.history("+1001") and store.history("+1004")
+        assert store.evictions["memory"] >= 1
+        assert store.bytes_held <= store.memory_budget_bytes
+
+    def test_bytes_held_tracks_trimming_and_eviction(self):
+        from sessions import ConversationStore, message_bytes
+        clock = FakeClock()
+        store = ConversationStore(max_messages=2, idle_ttl_seconds=10, clock=clock)
+        for i in range(10):
+            store.append("+1555", "model", "reply " * i)
+        expected = sys.getsizeof("+1555") + sum(message_bytes(*m) for m in store.history("+1555"))
+        assert store.bytes_held == expected
+        clock.now = 20
+        store.append("+1666", "model", "")
+        assert len(store) == 1
+        assert store.bytes_held == sys.getsizeof("+1666") + message_bytes("model", "")
+        metrics = store.render_metrics()
+        assert 'voice_sessions_evictions_total{reason="idle"} 1' in metrics
+        assert f"voice_sessions_bytes {store.bytes_held}" in metrics
+
+
+class TestConversationHistory:
+    def test_model_replies_are_sent_back_as_history(self, client, patch_genai_client):
+        import main as voice_main
+        with patch("main.recordings.fetch", return_value=b"fake-audio-bytes"):
+            for _ in range(2):
+                client.post("/ai", data={"From": "+15550001111",
+                                         "RecordingUrl": "https://api.twilio.com/fake-recording"})
+        contents = patch_genai_client.models.generate_content.call_args.kwargs["contents"]
+        assert [c.role for c in contents] == ["model", "user"]
+        assert contents[0].parts[0].text == "Thank you for contacting Axiom LLC."
+        assert voice_main.conversations.history("+15550001111") == [
+            ("model", "Thank you for contacting Axiom LLC.")] * 2
+        assert b"voice_sessions_active" in client.get("/metrics").data
+
+
+# ── Shared session backends ────────────────────────────────────────────────
+
+class FakeRedisServer:
+    """In-process stand-in for Redis: the RESP commands the session backend
+    uses, with per-connection WATCH/MULTI/EXEC semantics."""
+
+    def __init__(self):
+        import socketserver
+        import threading
+
+        self.data = {}        # key -> {field: bytes}
+        self.modified = {}    # key -> write counter, for WATCH
+        self.expires = {}     # key -> ttl seconds (recorded, not enforced)
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                state = {"watched": {}, "queue": None}
+                while True:
+                    args = self._read_command()
+                    if args is None:
+                        return
+                    self.wfile.write(server.execute(state, args))
+
+            def _read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int(self.rfile.readline()[1:-2])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"redis://127.0.0.1:{self.server.server_address[1]}/0"
+
+    @staticmethod
+    def encode(value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, str):
+            return b"+%s\r\n" % value.encode()
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(FakeRedisServer.encode(v) for v in value)
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def execute(self, state, args):
+        name = args[0].upper().decode()
+        if state["queue"] is not None and name not in ("EXEC", "MULTI"):
+            state["queue"].append(args)
+            return self.encode("QUEUED")
+        with self.lock:
+            if name == "WATCH":
+                state["watched"][args[1]] = self.modified.get(args[1], 0)
+                return self.encode("OK")
+            if name == "UNWATCH":
+                state["watched"] = {}
+                return self.encode("OK")
+            if name == "MULTI":
+                state["queue"] = []
+                return self.encode("OK")
+            if name == "EXEC":
+                queue, state["queue"] = state["queue"], None
+                watched, state["watched"] = state["watched"], {}
+                if any(self.modified.get(key, 0) != count for key, count in watched.items()):
+                    return b"*-1\r\n"
+                return b"*%d\r\n" % len(queue) + b"".join(self._apply(cmd) for cmd in queue)
+            return self._apply(args)
+
+    def _apply(self, args):
+        name, key = args[0].upper().decode(), args[1] if len(args) > 1 else None
+        if name in ("PING", "SELECT", "AUTH"):
+            return self.encode("OK")
+        if name == "HGET":
+            return self.encode(self.data.get(key, {}).get(args[2]))
+        if name == "HMGET":
+            return self.encode([self.data.get(key, {}).get(field) for field in args[2:]])
+        if name == "HSET":
+            fields = self.data.setdefault(key, {})
+            for field, value in zip(args[2::2], args[3::2]):
+                fields[field] = value
+            self.modified[key] = self.modified.get(key, 0) + 1
+            return self.encode(len(args[2:]) // 2)
+        if name == "EXPIRE":
+            self.expires[key] = int(args[2])
+            return self.encode(1)
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_redis():
+    server = FakeRedisServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def worker_pair(request, tmp_path):
+    """Two backend instances that share storage, as two gunicorn workers would
+    (the memory backend can only share within one process)."""
+    import sessions
+    if request.param == "memory":
+        store = sessions.ConversationStore()
+        return store, store
+    if request.param == "sqlite":
+        path = str(tmp_path / "sessions.db")
+        return sessions.SQLiteSessionBackend(path), sessions.SQLiteSessionBackend(path)
+    server = request.getfixturevalue("fake_redis")
+    return sessions.RedisSessionBackend(server.url), sessions.RedisSessionBackend(server.url)
+
+
+class TestSessionBackends:
+    def test_history_round_trips_compactly(self):
+        from sessions import decode_history, encode_history
+        messages = [("user", "Hi — what do you charge?"), ("model", "We charge $35/hr. " * 40)]
+        encoded = encode_history(messages)
+        assert decode_history(encoded) == messages
+        assert encoded[:1] == b"z" and len(encoded) < len("".join(text for _, text in messages)) / 4
+        assert encode_history([("model", "ok")]) == b'j[["m","ok"]]'
+
+    def test_workers_share_sessions(self, worker_pair):
+        a, b = worker_pair
+        a.append("+1555", "model", "first")
+        b.append("+1555", "model", "second")
+        assert a.history("+1555") == [("model", "first"), ("model", "second")]
+
+    def test_stale_version_is_rejected(self, worker_pair):
+        a, b = worker_pair
+        a.append("+1555", "model", "first")
+        messages, version = a.load("+1555")
+        b.append("+1555", "model", "from b")
+        assert a.save("+1555", messages + [("model", "from a")], version) is False
+        assert a.save("+1666", [("model", "new")], 0) is True
+        assert b.save("+1666", [("model", "also new")], 0) is False
+
+    def test_concurrent_appends_lose_nothing(self, worker_pair):
+        import threading
+        a, b = worker_pair
+        backend_for = [a, b, a, b]
+
+        def talk(worker):
+            for turn in range(4):
+                backend_for[worker].append("+1555", "model", f"{worker}-{turn}")
+
+        threads = [threading.Thread(target=talk, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(text for _, text in a.history("+1555")) == sorted(f"{w}-{t}" for w in range(4) for t in range(4))
+
+    def test_sqlite_sessions_expire_when_idle(self, tmp_path):
+        from sessions import SQLiteSessionBackend
+        clock = FakeClock()
+        backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"), idle_ttl_seconds=60, clock=clock)
+        backend.append("+1555", "model", "hello")
+        clock.now = 61
+        assert backend.history("+1555") == []
+        backend.append("+1555", "model", "again")
+        assert backend.history("+1555") == [("model", "again")]
+
+    def test_redis_sessions_carry_the_idle_ttl(self, fake_redis):
+        from sessions import RedisSessionBackend
+        RedisSessionBackend(fake_redis.url, idle_ttl_seconds=90).append("+1555", "model", "hello")
+        assert fake_redis.expires == {b"voice:session:+1555": 90}
+
+    def test_backend_must_implement_load_and_save(self):
+        from sessions import SessionBackend
+
+        class Incomplete(SessionBackend):
+            def load(self, caller):
+                return [], 0
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_reply_survives_a_failed_history_write(self, client):
+        from sessions import SessionConflictError
+        with patch("main.recordings.fetch", return_value=b"fake-audio-bytes"), \
+                patch("main.conversations.append", side_effect=SessionConflictError("busy")):
+            r = client.post("/ai", data={"From": "+15554440000",
+                                         "RecordingUrl": "https://api.twilio.com/fake-recording"})
+        assert b"<Say>Thank you for contacting Axiom LLC.</Say>" in r.data
+
+    def test_backend_is_chosen_by_name(self, tmp_path, monkeypatch):
+        import sessions
+        monkeypatch.setattr(sessions, "SESSION_SQLITE_PATH", str(tmp_path / "sessions.db"))
+        assert isinstance(sessions.create_session_backend("memory"), sessions.ConversationStore)
+        assert sessions.create_session_backend("sqlite").path == str(tmp_path / "sessions.db")
+        with pytest.raises(ValueError):
+            sessions.create_session_backend("memcached")
+
+
+# ── Recording downloads ────────────────────────────────────────────────────
+
+class StubMediaServer:
+    """Local stand-in for Twilio's media host. `responses` is consumed one per
+    request: (status, body, seconds to wait before each 1 KiB of body)."""
+
+    def __init__(self, *responses):
+        import http.server
+        import threading
+        import time
+
+        self.responses = list(responses)
+        self.requests = 0
+        self.connections = set()
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                stub.connections.add(self.client_address)
+                status, body, delay = stub.responses.pop(0) if len(stub.responses) > 1 else stub.responses[0]
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                for i in range(0, len(body), 1024):
+                    time.sleep(delay)
+                    self.wfile.write(body[i:i + 1024])
+                    self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/Recordings/RE1"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def media_server(request):
+    servers = []
+
+    def start(*responses):
+        servers.append(StubMediaServer(*responses))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+class TestRecordingDownloader:
+    def test_recording_error_falls_back_to_menu(self, client):
+        from recordings import RecordingError
+        with patch("main.recordings.fetch", side_effect=RecordingError("too big", "too_large")):
+            r = client.post("/ai", data={"From": "+15551234567",
+                                         "RecordingUrl": "https://api.twilio.com/fake-recording"})
+        assert b"An error occurred." in r.data
+        assert b"voice_recording_download_total" in client.get("/metrics").data
+
+    def test_downloads_over_one_kept_alive_connection(self, media_server):
+        from recordings import RecordingDownloader
+        server = media_server((200, b"RIFF" + b"\0" * 40_000, 0))
+        downloader = RecordingDownloader()
+        assert [len(downloader.fetch(server.url)) for _ in range(3)] == [40_004] * 3
+        assert server.requests == 3 and len(server.connections) == 1
+        assert 'voice_recording_download_total{outcome="ok"} 3' in downloader.render_metrics()
+
+    def test_retries_while_recording_is_not_yet_available(self, media_server):
+        from recordings import RecordingDownloader
+        server = media_server((404, b"", 0), (404, b"", 0), (200, b"audio", 0))
+        downloader = RecordingDownloader(backoff=0.01)
+        assert downloader.fetch(server.url) == b"audio"
+        assert 'voice_recording_download_total{outcome="not_ready_retry"} 2' in downloader.render_metrics()
+
+    def test_gives_up_on_a_missing_recording(self, media_server):
+        from recordings import RecordingDownloader, RecordingError
+        server = media_server((404, b"", 0))
+        with pytest.raises(RecordingError):
+            RecordingDownloader(not_ready_retries=2, backoff=0.01).fetch(server.url)
+        assert server.requests == 3
+
+    def test_rejects_recordings_over_the_size_cap(self, media_server):
+        from recordings import RecordingDownloader, RecordingError
+        server = media_server((200, b"\0" * 5000, 0))
+        with pytest.raises(RecordingError) as error:
+            RecordingDownloader(max_bytes=4096).fetch(server.url)
+        assert error.value.outcome == "too_large"
+
+    def test_slow_media_host_is_cut_off(self, media_server):
+        import time
+        from recordings import RecordingDownloader, RecordingError
+        stalled = media_server((200, b"\0" * 2048, 1.0))
+        with pytest.raises(RecordingError) as error:
+            RecordingDownloader(timeout=(1.0, 0.2)).fetch(stalled.url)
+        assert error.value.outcome == "timeout"
+
+        trickle = media_server((200, b"\0" * 64 * 1024, 0.02))
+        start = time.monotonic()
+        with pytest.raises(RecordingError) as error:
+            RecordingDownloader(deadline_seconds=0.3).fetch(trickle.url)
+        assert error.value.outcome == "timeout" and time.monotonic() - start < 1.0
+
+
+# ── Hold and poll ──────────────────────────────────────────────────────────
+
+class TestHoldAndPoll:
+    RECORDING = {"From": "+15552223333", "RecordingUrl": "https://api.twilio.com/fake-recording"}
+
+    def test_slow_turn_holds_then_returns_the_reply(self, client, monkeypatch):
+        import re
+        import threading
+        import main as voice_main
+        monkeypatch.setattr(voice_main, "AI_TURN_MODE", "async")
+        release = threading.Event()
+
+        def slow_fetch(url):
+            release.wait(5)
+            return b"fake-audio-bytes"
+
+        with patch("main.recordings.fetch", side_effect=slow_fetch):
+            r = client.post("/ai", data=self.RECORDING)
+            assert b"<Say>One moment.</Say>" in r.data
+            result_url = re.search(rb"<Redirect>(/ai_result\?turn=[\w-]+)</Redirect>", r.data).group(1).decode()
+            held = client.post(result_url)
+            assert b"<Pause" in held.data and result_url.encode() in held.data
+            release.set()
+            voice_main.ai_turns.wait(result_url.split("=")[1], timeout=5)
+        r = client.post(result_url)
+        assert b"<Say>Thank you for contacting Axiom LLC.</Say>" in r.data
+        assert b"<Record action=\"/ai\"" in r.data
+
+    def test_failed_or_unknown_turn_falls_back_to_menu(self, client, monkeypatch):
+        import main as voice_main
+        from recordings import RecordingError
+        monkeypatch.setattr(voice_main, "AI_TURN_MODE", "async")
+        with patch("main.recordings.fetch", side_effect=RecordingError("gone")):
+            r = client.post("/ai", data=self.RECORDING)
+            turn_id = r.data.split(b"turn=")[1].split(b"<")[0].decode()
+            voice_main.ai_turns.wait(turn_id, timeout=5)
+        assert b"An error occurred." in client.post(f"/ai_result?turn={turn_id}").data
+        assert b"An error occurred." in client.post("/ai_result?turn=nope").data
+        assert b'voice_ai_turn_total{outcome="failed"}' in client.get("/metrics").data
+
+    def test_turn_expires_when_the_model_is_too_slow(self):
+        import threading
+        from ai_turns import AITurns
+        clock = FakeClock()
+        release = threading.Event()
+        turns = AITurns(max_wait_seconds=30, clock=clock)
+        turn_id = turns.start(lambda: release.wait(5) and "late reply")
+        assert turns.get(turn_id)["status"] == "pending"
+        clock.now = 30
+        assert turns.get(turn_id)["status"] == "expired"
+        release.set()
+        turns.wait(turn_id, timeout=5)
+        assert turns.get(turn_id)["status"] == "expired"
+        assert 'voice_ai_turn_total{outcome="expired"} 1' in turns.render_metrics()
+
+    def test_poll_is_answered_by_another_instance(self, tmp_path):
+        import threading
+        from ai_turns import AITurns
+        from sessions import ConversationStore, SQLiteSessionBackend
+        path = str(tmp_path / "sessions.db")
+        running, other = AITurns(store=SQLiteSessionBackend(path)), AITurns(store=SQLiteSessionBackend(path))
+        release = threading.Event()
+        turn_id = running.start(lambda: release.wait(5) and "shared reply")
+        assert other.get(turn_id)["status"] == "pending"
+        release.set()
+        running.wait(turn_id, timeout=5)
+        assert other.get(turn_id) == {"status": "done", "text": "shared reply", "error": None}
+
+        def fail():
+            raise RuntimeError("model down")
+
+        failed_id = running.start(fail)
+        running.wait(failed_id, timeout=5)
+        assert other.get(failed_id)["status"] == "failed"
+        # An in-process store is not seen by other instances, so their polls cannot be answered.
+        assert AITurns(store=ConversationStore()).get(turn_id) is None
+
+    def test_turn_on_another_instance_expires_from_its_id(self, tmp_path):
+        from ai_turns import AITurns
+        from sessions import SQLiteSessionBackend
+        clock = FakeClock()
+        clock.now = 1000.0
+        turn_id = f"{int(990 * 1000):x}-0123"  # started 10 s ago somewhere else, never finished
+        turns = AITurns(store=SQLiteSessionBackend(str(tmp_path / "sessions.db")), max_wait_seconds=30, clock=clock)
+        assert turns.get(turn_id)["status"] == "pending"
+        clock.now = 1020.0
+        assert turns.get(turn_id)["status"] == "expired"
+
+    def test_full_pool_turns_new_turns_away(self):
+        import threading
+        from ai_turns import AITurns, AITurnsBusyError
+        release = threading.Event()
+        turns = AITurns(max_pending=1)
+        turn_id = turns.start(lambda: release.wait(5) and "reply")
+        with pytest.raises(AITurnsBusyError):
+            turns.start(lambda: "never run")
+        release.set()
+        turns.wait(turn_id, timeout=5)
+        turns.wait(turns.start(lambda: "reply"), timeout=5)
+        assert 'voice_ai_turn_total{outcome="rejected"} 1' in turns.render_metrics()
+
+    def test_busy_assistant_returns_to_the_menu(self, client, monkeypatch):
+        import main as voice_main
+        from ai_turns import AITurns
+        monkeypatch.setattr(voice_main, "AI_TURN_MODE", "async")
+        monkeypatch.setattr(voice_main, "ai_turns", AITurns(max_pending=0))
+        r = client.post("/ai", data=self.RECORDING)
+        assert b"busy right now" in r.data and b"<Redirect>/</Redirect>" in r.data
+
+
+# ── Media streams ──────────────────────────────────────────────────────────
+
+class TestMediaStream:
+    def test_mulaw_round_trip(self):
+        from array import array
+        from media_stream import ulaw_decode, ulaw_encode
+        assert array("h", ulaw_decode(bytes([0xFF, 0x7F, 0x00, 0x80]))).tolist() == [0, 0, -32124, 32124]
+        samples = [0, 100, -100, 1000, -1000, 12000, -12000, 32767, -32768]
+        decoded = array("h", ulaw_decode(ulaw_encode(array("h", samples).tobytes())))
+        for original, restored in zip(samples, decoded):
+            assert abs(original - restored) <= max(8, abs(original) * 0.07)
+
+    def test_replayed_call_yields_one_turn_per_utterance(self, tmp_path):
+        import stream_replay
+        path = str(tmp_path / "call.wav")
+        stream_replay.synthesize_call(path, utterances=((1.5, 1.0), (0.8, 1.0)))
+        heard = []
+        turns = stream_replay.replay(path, heard.append)
+        assert len(turns) == len(heard) == 2
+        # Each utterance keeps up to 200 ms of audio either side of the speech.
+        assert all(speech <= t["audio_seconds"] <= speech + 0.4 for speech, t in zip((1.5, 0.8), turns))
+        assert all(abs(t["hangover_seconds"] - 0.6) < 0.05 for t in turns)
+        assert heard[0][:4] == b"RIFF"
+
+    def test_noise_and_clicks_do_not_start_a_turn(self, tmp_path):
+        import stream_replay
+        from media_stream import MediaStreamSession
+        path = str(tmp_path / "noise.wav")
+        stream_replay.synthesize_call(path, utterances=((0.1, 1.0), (0.1, 1.0)), noise_rms=300)
+        heard = []
+        session = MediaStreamSession(heard.append)
+        for message in stream_replay.media_messages(stream_replay.wav_frames(path), caller="+15557654321"):
+            session.handle(message)
+        assert heard == [] and session.dropped == 2
+        assert session.parameters == {"caller": "+15557654321"} and session.call_sid.startswith("CA")
+        assert session.state == "closed"
+
+    def test_stream_turn_plays_the_reply_on_the_live_call(self, client):
+        with patch("main.recordings.session.post") as post:
+            import main as voice_main
+            assert voice_main.run_stream_turn("+15550002222", "CA123", b"RIFF", "wss://example/media") == \
+                "Thank you for contacting Axiom LLC."
+        url, twiml = post.call_args.args[0], post.call_args.kwargs["data"]["Twiml"]
+        assert url.endswith("/Calls/CA123.json")
+        assert "<Say>Thank you for contacting Axiom LLC.</Say>" in twiml
+        assert '<Stream url="wss://example/media">' in twiml and 'value="+15550002222"' in twiml
+
+    def test_digit_8_connects_the_stream_in_stream_mode(self, client, monkeypatch):
+        import main as voice_main
+        monkeypatch.setattr(voice_main, "AI_TURN_MODE", "stream")
+        monkeypatch.setattr(voice_main, "Sock", object)
+        r = client.post("/route", data={"Digits": "8", "From": "+15550003333"})
+        assert b"<Connect>" in r.data and b'<Stream url="wss://localhost/media">' in r.data
+        assert b"Press star for main menu" in r.data
+
+    def test_keypresses_reach_the_stream_handler(self):
+        import stream_replay
+        from media_stream import MediaStreamSession
+        pressed = []
+        session = MediaStreamSession(lambda audio: None, on_dtmf=pressed.append)
+        for message in stream_replay.media_messages([]):
+            session.handle(message)
+            if message["event"] == "start":
+                session.handle({"event": "dtmf", "streamSid": message["streamSid"],
+                                "dtmf": {"track": "inbound_track", "digit": "9"}})
+        assert pressed == ["9"]
+
+    def test_star_and_9_redirect_the_live_call(self, client, monkeypatch):
+        import main as voice_main
+        monkeypatch.setenv("CONTACT_PHONE", "+15559990000")
+        with patch("main.recordings.session.post") as post:
+            voice_main.stream_keypress("CA123", "*")
+            voice_main.stream_keypress("CA123", "9")
+            voice_main.stream_keypress("CA123", "5")
+        assert post.call_count == 2
+        menu, transfer = (call.kwargs["data"]["Twiml"] for call in post.call_args_list)
+        assert menu == "<Response><Redirect>/</Redirect></Response>"
+        assert "<Number>+15559990000</Number>" in transfer and 'action="/voicemail"' in transfer
+        assert client.post("/ai_nav", data={"Digits": "9"}).data.decode() == voice_main.transfer_to_team()
+
+    def test_failed_call_update_keeps_the_stream_open(self, client):
+        import requests
+        import main as voice_main
+        from media_stream import MediaStreamSession
+        session = MediaStreamSession(lambda audio: None)
+        session.state = "responding"
+        failed_before = voice_main.call_updates["failed"]
+        with patch("main.recordings.session.post", side_effect=requests.ConnectionError("Twilio unreachable")):
+            voice_main.stream_keypress("CA123", "*")
+            assert voice_main.run_stream_turn("+15550002222", "CA123", b"RIFF", "wss://example/media",
+                                              session.resume) == "Thank you for contacting Axiom LLC."
+        assert session.state == "listening"
+        with patch("main.recordings.session.post") as post:
+            post.return_value.raise_for_status.side_effect = requests.HTTPError("404 Client Error")
+            assert voice_main.update_call("CA123", "<Response/>") is False
+        assert voice_main.call_updates["failed"] == failed_before + 3
+        assert 'voice_call_update_total{outcome="failed"}' in client.get("/metrics").get_data(as_text=True)
@@ -8,10 +8,12 @@ a minimal schema so tests run without the real database file.
 No file I/O, no network calls required.
 """
 from __future__ import annotations
+import json
 import os
 import sys
 import sqlite3
 import pytest
+from unittest.mock import MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard"))
 
@@ -129,3 +131,564 @@ class TestPartnerStatus:
         health = data["partner_service_health_summary"]
         assert "OK" in health
         assert "Action Required" in health
+
+
+# ── partner_metrics rollup ─────────────────────────────────────────────────
+
+class TestRollupBackedResponses:
+    """With a database built by data_ingestion the endpoints answer from the
+    partner_metrics rollup; the payloads must match the on-demand SQL."""
+
+    URLS = [
+        "/api/logistics/daily_summary",
+        "/api/partner_performance/status?partner_contract=Hertz-Local",
+        "/api/partner_performance/status?partner_contract=Budget-Airport",
+        "/api/partner_performance/status?partner_contract=NonExistentCo",
+    ]
+
+    def test_rollup_matches_on_demand(self, client, tmp_path, monkeypatch):
+        pytest.importorskip("pandas")
+        import data_ingestion as di
+        import operations_api as api
+
+        db_path = str(tmp_path / "ingested.db")
+        monkeypatch.setattr(di, "SHIPMENTS_LOG_CSV",
+                            os.path.join(os.path.dirname(__file__), "..", "logistics-dashboard", "shipments.csv"))
+        conn = sqlite3.connect(db_path)
+        di.create_db_tables(conn)
+        di.ingest_shipments_data(conn)
+        monkeypatch.setattr(api, "DATABASE_NAME", db_path)
+
+        from_rollup = [(client.get(url).status_code, client.get(url).get_json()) for url in self.URLS]
+        conn.execute("DROP TABLE partner_metrics")
+        conn.commit()
+        conn.close()
+        api.clear_response_cache()
+        on_demand = [(client.get(url).status_code, client.get(url).get_json()) for url in self.URLS]
+        assert from_rollup == on_demand
+        assert from_rollup[0][1]["total_shipments_logged"] > 0
+
+    def test_only_a_missing_rollup_falls_back(self):
+        import operations_api as api
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE daily_shipments (n INTEGER)")
+        rows = api.fetch_metrics_rows(conn.cursor(), "SELECT COUNT(*) FROM partner_metrics",
+                                      "SELECT COUNT(*) FROM daily_shipments")
+        assert rows == [(0,)]
+        locked = MagicMock()
+        locked.execute.side_effect = sqlite3.OperationalError("database is locked")
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            api.fetch_metrics_rows(locked, "SELECT 1", "SELECT 2")
+        assert locked.execute.call_count == 1
+
+
+# ── Batch partner performance ──────────────────────────────────────────────
+
+class TestPartnerStatusBatch:
+    URL = "/api/partner_performance/batch_status"
+
+    def test_all_partners_when_no_param(self, client):
+        data = client.get(self.URL).get_json()
+        assert [p["partner_contract"] for p in data["partners"]] == ["Amazon-Prime", "Hertz-Local"]
+        assert data["not_found"] == []
+
+    def test_requested_partners_keep_order(self, client):
+        data = client.get(
+            self.URL + "?partner_contract=Hertz-Local&partner_contract=Amazon-Prime,NonExistentCo"
+        ).get_json()
+        assert [p["partner_contract"] for p in data["partners"]] == ["Hertz-Local", "Amazon-Prime"]
+        assert data["not_found"] == ["NonExistentCo"]
+
+    def test_matches_single_partner_endpoint(self, client):
+        batch = client.get(self.URL).get_json()["partners"]
+        for status in batch:
+            single = client.get(
+                f"/api/partner_performance/status?partner_contract={status['partner_contract']}"
+            ).get_json()
+            assert single == status
+
+
+# ── Read connection pool ───────────────────────────────────────────────────
+
+class TestReadConnectionPool:
+    def test_connection_reused_across_requests(self, client):
+        import operations_api as api
+
+        api.close_db_pool()
+        client.get("/api/logistics/daily_summary")
+        pooled = api._db_pool.queue[-1][1]
+        client.get("/api/partner_performance/batch_status")
+        assert api._db_pool.qsize() == 1
+        assert api._db_pool.queue[-1][1] is pooled
+
+    def test_connections_are_read_only(self, client):
+        import operations_api as api
+
+        with api.app.app_context():
+            conn = api.get_db_connection()
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM daily_shipments")
+
+    def test_reads_proceed_while_writer_holds_transaction(self, client):
+        import operations_api as api
+
+        writer = sqlite3.connect(api.DATABASE_NAME)
+        writer.execute("PRAGMA journal_mode=WAL")
+        try:
+            writer.execute("BEGIN EXCLUSIVE")
+            writer.execute("UPDATE daily_shipments SET shipment_value_usd = shipment_value_usd")
+            resp = client.get("/api/logistics/daily_summary")
+            assert resp.status_code == 200
+        finally:
+            writer.rollback()
+            writer.close()
+
+
+# ── Response cache ─────────────────────────────────────────────────────────
+
+class TestResponseCache:
+    URL = "/api/logistics/daily_summary"
+
+    @pytest.fixture
+    def versioned_db(self, client, tmp_path, monkeypatch):
+        import operations_api as api
+
+        db_path = str(tmp_path / "versioned.db")
+        _seed_db(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE data_version (id INTEGER PRIMARY KEY, version INTEGER, updated_at TEXT);
+            INSERT INTO data_version VALUES (1, 1, '2025-05-01 12:00:00');
+        """)
+        monkeypatch.setattr(api, "DATABASE_NAME", db_path)
+        api.clear_response_cache()
+        yield conn
+        conn.close()
+        api.clear_response_cache()
+
+    def test_repeat_request_is_served_from_cache(self, client, versioned_db):
+        first = client.get(self.URL)
+        second = client.get(self.URL)
+        assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+        assert first.get_json() == second.get_json()
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert second.headers["Last-Modified"] == "Thu, 01 May 2025 12:00:00 GMT"
+
+    def test_revalidation_returns_304(self, client, versioned_db):
+        etag = client.get(self.URL).headers["ETag"]
+        resp = client.get(self.URL, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.data == b""
+
+    def test_data_version_bump_invalidates(self, client, versioned_db):
+        before = client.get(self.URL)
+        versioned_db.execute("INSERT INTO daily_shipments VALUES ('S004', 'Delivered', 'Delayed', 15.0, 100.0, 'Hertz-Local')")
+        versioned_db.commit()
+        assert client.get(self.URL).headers["X-Cache"] == "HIT"
+
+        versioned_db.execute("UPDATE data_version SET version = 2, updated_at = '2025-05-02 08:00:00'")
+        versioned_db.commit()
+        after = client.get(self.URL, headers={"If-None-Match": before.headers["ETag"]})
+        assert after.status_code == 200
+        assert after.headers["X-Cache"] == "MISS"
+        assert after.get_json()["total_shipments_logged"] == before.get_json()["total_shipments_logged"] + 1
+
+    def test_query_args_are_part_of_the_key(self, client, versioned_db):
+        url = "/api/partner_performance/batch_status?partner_contract="
+        forward = client.get(url + "Amazon-Prime&partner_contract=Hertz-Local").get_json()
+        reverse = client.get(url + "Hertz-Local&partner_contract=Amazon-Prime").get_json()
+        assert [p["partner_contract"] for p in reverse["partners"]] == ["Hertz-Local", "Amazon-Prime"]
+        assert forward["partners"] == reverse["partners"][::-1]
+
+    def test_partner_task_compaction_invalidates(self, client, tmp_path, monkeypatch):
+        pytest.importorskip("pandas")
+        import data_ingestion as di
+        import operations_api as api
+
+        db_path = str(tmp_path / "ingested.db")
+        conn = sqlite3.connect(db_path)
+        di.create_db_tables(conn)
+        # Duplicates as left by runs before the natural key existed.
+        conn.execute("DROP INDEX idx_partner_tasks_natural_key")
+        conn.executemany(
+            "INSERT INTO partner_tasks_status (partner_contract, task_source_id, simulated_service_health) "
+            "VALUES (?, ?, ?)",
+            [("Amazon-Prime", 1, "Action Required"), ("Amazon-Prime", 1, "OK"), ("Amazon-Prime", 2, "OK")],
+        )
+        conn.commit()
+        monkeypatch.setattr(api, "DATABASE_NAME", db_path)
+        api.clear_response_cache()
+
+        before = client.get("/api/partner_performance/status")
+        assert client.get("/api/partner_performance/status").headers["X-Cache"] == "HIT"
+        di.compact_partner_tasks(conn)
+        conn.close()
+        after = client.get("/api/partner_performance/status", headers={"If-None-Match": before.headers["ETag"]})
+        api.clear_response_cache()
+        assert after.status_code == 200 and after.headers["X-Cache"] == "MISS"
+        assert after.get_json() != before.get_json()
+
+    def test_lru_eviction(self, client, versioned_db, monkeypatch):
+        import operations_api as api
+
+        monkeypatch.setattr(api, "RESPONSE_CACHE_MAX_ENTRIES", 2)
+        for partner in ("Amazon-Prime", "Hertz-Local", "NonExistentCo"):
+            client.get(f"/api/partner_performance/status?partner_contract={partner}")
+        resp = client.get("/api/partner_performance/status?partner_contract=Amazon-Prime")
+        assert resp.headers["X-Cache"] == "MISS"
+
+
+# ── Windowed daily summary ─────────────────────────────────────────────────
+
+class TestWindowedSummary:
+    URL = "/api/logistics/daily_summary"
+    ROWS = [
+        # shipment_id, log_date, actual_departure, status, on-time, mpg, value
+        ("W1", "2025-04-01", "2025-04-01T08:10:00", "Delivered", "On-Time", 10.0, 100.0),
+        ("W2", "2025-04-01", "2025-04-01T08:50:00", "Delivered", "Late", 20.0, 200.0),
+        ("W3", "2025-04-01", "2025-04-01T14:00:00", "In-Transit", "Pending", None, 50.0),
+        ("W4", "2025-04-03", "2025-04-03T09:00:00", "Delivered", "On-Time", 30.0, 300.0),
+        ("W5", "2025-04-03", "2025-04-03T09:30:00", "Delayed", "Pending", 5.0, 999.0),
+        ("W6", "2025-04-09", "2025-04-09T23:59:00", "Delivered", "On-Time", 12.0, 10.0),
+    ]
+
+    @pytest.fixture
+    def windowed_db(self, client, tmp_path, monkeypatch):
+        pytest.importorskip("pandas")
+        import data_ingestion as di
+        import operations_api as api
+
+        db_path = str(tmp_path / "windowed.db")
+        conn = sqlite3.connect(db_path)
+        di.create_db_tables(conn)
+        conn.executemany(
+            "INSERT INTO daily_shipments (shipment_id, log_date, actual_departure_datetime, delivery_status, "
+            "on_time_status_calculated, fuel_efficiency_mpg, shipment_value_usd) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self.ROWS)
+        conn.commit()
+        monkeypatch.setattr(api, "DATABASE_NAME", db_path)
+        api.clear_response_cache()
+        yield conn
+        conn.close()
+        api.clear_response_cache()
+
+    def test_no_params_keeps_overall_report(self, client, windowed_db):
+        data = client.get(self.URL).get_json()
+        assert data["report_date"] == "Overall (Demo Data)"
+        assert "buckets" not in data
+
+    def test_daily_buckets(self, client, windowed_db):
+        data = client.get(self.URL + "?from=2025-04-01&to=2025-04-05").get_json()
+        assert data["granularity"] == "day"
+        assert [b["bucket"] for b in data["buckets"]] == ["2025-04-01", "2025-04-03"]
+        first = data["buckets"][0]
+        assert (first["total_shipments_logged"], first["delivered_shipments"], first["shipments_in_transit"]) == (3, 2, 1)
+        assert first["on_time_delivery_percent"] == 50.0
+        assert first["average_fleet_mpg"] == 15.0
+        assert data["total_shipments_logged"] == 4
+        assert data["total_value_shipped_usd"] == 650.0
+
+    def test_hourly_buckets(self, client, windowed_db):
+        data = client.get(self.URL + "?from=2025-04-01&granularity=hour").get_json()
+        assert data["to"] == "2025-04-01"
+        assert [(b["bucket"], b["total_shipments_logged"]) for b in data["buckets"]] == [
+            ("2025-04-01T08:00", 2), ("2025-04-01T14:00", 1)]
+
+    def test_default_window_ends_at_latest_day(self, client, windowed_db):
+        data = client.get(self.URL + "?granularity=day").get_json()
+        assert (data["from"], data["to"]) == ("2025-04-03", "2025-04-09")
+        assert [b["bucket"] for b in data["buckets"]] == ["2025-04-03", "2025-04-09"]
+
+    def test_overall_window_matches_overall_report(self, client, windowed_db):
+        overall = client.get(self.URL).get_json()
+        windowed = client.get(self.URL + "?from=2025-01-01&to=2025-12-31").get_json()
+        for key in ("total_shipments_logged", "delivered_shipments", "shipments_in_transit",
+                    "on_time_delivery_percent", "average_fleet_mpg", "total_value_shipped_usd"):
+            assert windowed[key] == overall[key]
+
+    def test_rollup_matches_on_demand(self, client, windowed_db):
+        import operations_api as api
+
+        url = self.URL + "?from=2025-04-01&to=2025-04-30"
+        from_rollup = client.get(url).get_json()
+        windowed_db.execute("DROP TABLE daily_metrics")
+        windowed_db.commit()
+        api.clear_response_cache()
+        assert client.get(url).get_json() == from_rollup
+
+    @pytest.mark.parametrize("query", [
+        "?from=2025-04-31", "?from=2025-04-09&to=2025-04-01", "?granularity=week",
+        "?from=2025-01-01&to=2025-03-01&granularity=hour",
+    ])
+    def test_invalid_window_returns_400(self, client, windowed_db, query):
+        resp = client.get(self.URL + query)
+        assert resp.status_code == 400
+        assert "error" in resp.get_json()
+
+
+# ── Metric stream (SSE) ────────────────────────────────────────────────────
+
+class TestMetricStream:
+    @pytest.fixture
+    def stream_db(self, client, tmp_path, monkeypatch):
+        import operations_api as api
+
+        db_path = str(tmp_path / "stream.db")
+        _seed_db(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE data_version (id INTEGER PRIMARY KEY, version INTEGER, updated_at TEXT);
+            INSERT INTO data_version VALUES (1, 1, '2025-05-01 12:00:00');
+        """)
+        monkeypatch.setattr(api, "DATABASE_NAME", db_path)
+        monkeypatch.setattr(api, "STREAM_POLL_INTERVAL_SECONDS", 0.02)
+        monkeypatch.setattr(api, "STREAM_HEARTBEAT_SECONDS", 0.05)
+        yield conn
+        conn.close()
+
+    @staticmethod
+    def _next_event(chunks, timeout=5):
+        import time
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            chunk = next(chunks)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith("id:"):
+                fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+                return fields["event"], int(fields["id"]), json.loads(fields["data"])
+        raise AssertionError("no stream event before timeout")
+
+    def test_snapshot_then_delta_on_ingest(self, client, stream_db):
+        resp = client.get("/api/stream", buffered=False)
+        assert resp.mimetype == "text/event-stream"
+        assert resp.headers["Access-Control-Allow-Origin"]
+        chunks = iter(resp.response)
+        try:
+            event, version, snapshot = self._next_event(chunks)
+            assert (event, version) == ("snapshot", 1)
+            assert snapshot["daily_summary"]["total_shipments_logged"] == 3
+            assert set(snapshot["partners"]) == {"Amazon-Prime", "Hertz-Local"}
+
+            stream_db.execute("INSERT INTO daily_shipments VALUES "
+                              "('S004', 'Delivered', 'On-Time', 19.0, 900.0, 'Hertz-Local')")
+            stream_db.execute("UPDATE data_version SET version = 2")
+            stream_db.commit()
+            event, version, delta = self._next_event(chunks)
+            assert (event, version) == ("delta", 2)
+            assert delta["daily_summary"]["total_shipments_logged"] == 4
+            assert list(delta["partners"]) == ["Hertz-Local"]
+        finally:
+            resp.close()
+
+    def test_version_without_changes_sends_nothing(self, client, stream_db):
+        resp = client.get("/api/stream", buffered=False)
+        chunks = iter(resp.response)
+        try:
+            self._next_event(chunks)
+            stream_db.execute("UPDATE data_version SET version = 2")
+            stream_db.commit()
+            with pytest.raises(AssertionError, match="no stream event"):
+                self._next_event(chunks, timeout=0.5)
+        finally:
+            resp.close()
+
+    def test_diff_reports_removed_partner(self):
+        import operations_api as api
+
+        old = {"daily_summary": {"a": 1}, "partners": {"A": {"x": 1}, "B": {"x": 2}}}
+        new = {"daily_summary": {"a": 1}, "partners": {"A": {"x": 1}}}
+        assert api.diff_stream_snapshots(old, new) == {"partners": {"B": None}}
+
+
+# ── Dashboard snapshot ─────────────────────────────────────────────────────
+
+class TestDashboardSnapshot:
+    URL = "/api/dashboard/snapshot"
+
+    def test_matches_individual_endpoints(self, client):
+        snapshot = client.get(self.URL).get_json()
+        assert snapshot["daily_summary"] == client.get("/api/logistics/daily_summary").get_json()
+        batch = client.get("/api/partner_performance/batch_status").get_json()["partners"]
+        assert snapshot["partners"] == {status["partner_contract"]: status for status in batch}
+
+    def test_dashboard_tick_makes_one_request(self, client, monkeypatch):
+        pytest.importorskip("dash")
+        pytest.importorskip("dash_bootstrap_components")
+        import live_dashboard as dashboard
+
+        calls = []
+
+        class ApiThroughTestClient:
+            def get(self, url, **kwargs):
+                calls.append(url)
+                resp = client.get(url.replace(dashboard.API_BASE_URL, "/api"))
+                return type("Response", (), {"raise_for_status": lambda self: None,
+                                             "json": lambda self: resp.get_json()})()
+
+        monkeypatch.setattr(dashboard.api_client, "session", ApiThroughTestClient())
+        snapshot = dashboard.refresh_metrics_snapshot(0)
+        kpis = dashboard.update_daily_summary(snapshot)
+        figure = dashboard.update_partner_shipments_chart(snapshot)
+        details, _ = dashboard.update_partner_performance_details("Hertz-Local", snapshot)
+        missing, _ = dashboard.update_partner_performance_details("Ryder-Logistics", snapshot)
+
+        assert calls == [f"{dashboard.API_BASE_URL}/dashboard/snapshot"]
+        assert "Total Shipments Logged: 3" in str(kpis)
+        assert {trace.x[0]: trace.y[0] for trace in figure.data}["Amazon-Prime"] == 2
+        assert "Total Shipments: 1" in str(details)
+        assert "No data found for partner: Ryder-Logistics" in str(missing)
+
+    def test_stream_feeds_the_snapshot_store_without_a_fetch(self):
+        pytest.importorskip("dash")
+        pytest.importorskip("dash_bootstrap_components")
+        import live_dashboard as dashboard
+
+        writers = {(callback.get("callback") is not None, tuple(i["id"] for i in callback["inputs"]))
+                   for key, callback in dashboard.app.callback_map.items() if "metrics-snapshot.data" in key}
+        # The server fetches only on the poll fallback; stream updates are merged by the clientside sync.
+        assert writers == {(True, ("interval-component",)), (False, ("stream-sync-interval",))}
+
+
+# ── Dashboard API client ───────────────────────────────────────────────────
+
+@pytest.fixture
+def stub_api():
+    """Local keep-alive stub of the Operations API. Tests set `status` and
+    `delay`; `peers` records the client address of every request."""
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {"status": 200, "delay": 0, "peers": [], "version": 1}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            state["peers"].append(self.client_address)
+            time.sleep(state["delay"])
+            body = json.dumps({"version": state["version"]}).encode()
+            self.send_response(state["status"])
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/api"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+class TestOperationsApiClient:
+    @staticmethod
+    def _client(stub_api, **breaker):
+        from api_client import CircuitBreaker, OperationsApiClient
+
+        return OperationsApiClient(stub_api["url"], timeout=(1, 0.2), breaker=CircuitBreaker(**breaker))
+
+    def test_requests_reuse_one_connection(self, stub_api):
+        api_client = self._client(stub_api)
+        for _ in range(5):
+            assert api_client.get_json("/dashboard/snapshot") == ({"version": 1}, None)
+        assert len(set(stub_api["peers"])) == 1
+
+    def test_read_timeout_serves_last_good_response(self, stub_api):
+        from api_client import ApiUnavailableError
+
+        api_client = self._client(stub_api)
+        stub_api["delay"] = 0.5
+        with pytest.raises(ApiUnavailableError):
+            api_client.get_json("/dashboard/snapshot")
+        stub_api["delay"] = 0
+        api_client.get_json("/dashboard/snapshot")
+        stub_api["version"], stub_api["status"] = 2, 503
+        data, stale_since = api_client.get_json("/dashboard/snapshot")
+        assert data == {"version": 1}
+        assert stale_since is not None
+
+    def test_breaker_opens_then_recovers(self, stub_api):
+        api_client = self._client(stub_api, failure_threshold=2, reset_seconds=0.2)
+        api_client.get_json("/dashboard/snapshot")
+        stub_api["status"] = 500
+        for _ in range(2):
+            api_client.get_json("/dashboard/snapshot")
+        calls = len(stub_api["peers"])
+        api_client.get_json("/dashboard/snapshot")
+        assert api_client.breaker.state == "open"
+        assert len(stub_api["peers"]) == calls  # short-circuited
+
+        import time
+        time.sleep(0.25)
+        stub_api["status"] = 200
+        assert api_client.get_json("/dashboard/snapshot") == ({"version": 1}, None)
+        assert api_client.breaker.state == "closed"
+
+    def test_metrics_are_exposed(self, stub_api):
+        api_client = self._client(stub_api)
+        api_client.get_json("/dashboard/snapshot")
+        metrics = api_client.render_metrics()
+        assert 'dashboard_api_requests_total{endpoint="/dashboard/snapshot",outcome="ok"} 1' in metrics
+        assert 'dashboard_api_request_duration_seconds_count{endpoint="/dashboard/snapshot"} 1' in metrics
+        assert "dashboard_api_circuit_open 0" in metrics
+
+    def test_dashboard_serves_metrics(self):
+        pytest.importorskip("dash")
+        pytest.importorskip("dash_bootstrap_components")
+        import live_dashboard as dashboard
+
+        resp = dashboard.app.server.test_client().get("/metrics")
+        assert resp.status_code == 200
+        assert "dashboard_api_circuit_open" in resp.get_data(as_text=True)
+
+
+# ── Dashboard client render mode ───────────────────────────────────────────
+
+class TestClientRenderMode:
+    @pytest.fixture
+    def client_mode_dashboard(self, monkeypatch):
+        pytest.importorskip("dash")
+        pytest.importorskip("dash_bootstrap_components")
+        import importlib
+        import live_dashboard
+
+        monkeypatch.setenv("DASHBOARD_RENDER_MODE", "client")
+        yield importlib.reload(live_dashboard)
+        monkeypatch.delenv("DASHBOARD_RENDER_MODE")
+        importlib.reload(live_dashboard)
+
+    def test_panels_render_clientside(self, client_mode_dashboard):
+        callbacks = client_mode_dashboard.app.callback_map
+        server_rendered = [key for key, callback in callbacks.items() if callback.get("callback") is not None]
+        assert server_rendered == ["metrics-snapshot.data"]
+
+    def test_refresh_sends_compact_payload(self, client, client_mode_dashboard, monkeypatch):
+        class ApiThroughTestClient:
+            def get(self, url, **kwargs):
+                resp = client.get(url.replace(client_mode_dashboard.API_BASE_URL, "/api"))
+                return type("Response", (), {"raise_for_status": lambda self: None,
+                                             "json": lambda self: resp.get_json()})()
+
+        monkeypatch.setattr(client_mode_dashboard.api_client, "session", ApiThroughTestClient())
+        payload = client_mode_dashboard.refresh_metrics_snapshot(0)
+        assert payload["summary"] == {"total": 3, "in_transit": 1, "delivered": 2, "on_time_pct": 100.0, "mpg": 18.27}
+        assert payload["partners"]["Amazon-Prime"] == {
+            "total": 2, "delivered": 1, "on_time_pct": 100.0, "health": {"OK": 2, "Action Required": 1}}
+
+    def test_rejects_unknown_mode(self, monkeypatch):
+        pytest.importorskip("dash")
+        pytest.importorskip("dash_bootstrap_components")
+        import importlib
+        import live_dashboard
+
+        monkeypatch.setenv("DASHBOARD_RENDER_MODE", "browser")
+        with pytest.raises(ValueError):
+            importlib.reload(live_dashboard)
+        monkeypatch.delenv("DASHBOARD_RENDER_MODE")
+        importlib.reload(live_dashboard)
@@ -0,0 +1,170 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+AI_TURN_WORKERS = 16
+AI_TURN_MAX_PENDING = 32  # turns running or queued; more are turned away at once
+AI_TURN_MAX_WAIT_SECONDS = 45  # after this the caller is told to try again
+AI_TURN_RETENTION_SECONDS = 5 * 60
+AI_TURN_KEY_PREFIX = "ai-turn:"
+LATENCY_BUCKETS_SECONDS = (0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+class AITurnsBusyError(Exception):
+    pass
+
+
+def turn_started_at(turn_id):
+    """Wall-clock start time encoded in a turn id, or None if it is not one of ours."""
+    try:
+        return int(turn_id.split("-", 1)[0], 16) / 1000
+    except ValueError:
+        return None
+
+
+class AITurns:
+    """Runs AI turns off the webhook thread for hold-and-poll TwiML.
+
+    start() submits a turn to a bounded executor and returns its id at once;
+    the webhook answers with a hold prompt and Twilio polls get() until the
+    turn is done. At most `max_pending` turns run or wait at a time; past that
+    start() raises AITurnsBusyError rather than queueing a turn that would only
+    expire. A turn is "pending", "done" (with `text`) or "failed" (with
+    `error`), and "expired" once it has been pending for `max_wait_seconds`;
+    the work itself is not cancelled.
+
+    Twilio's poll may reach a different instance than the one running the
+    turn, so finished turns are also written to `store`, a sessions backend.
+    With a shared one (sqlite or redis) any instance can answer the poll; the
+    start time is part of the turn id, so every instance agrees on expiry.
+    """
+
+    def __init__(self, store=None, workers=AI_TURN_WORKERS, max_pending=AI_TURN_MAX_PENDING,
+                 max_wait_seconds=AI_TURN_MAX_WAIT_SECONDS, retention_seconds=AI_TURN_RETENTION_SECONDS,
+                 clock=time.time):
+        self.store = store
+        self.max_pending = max_pending
+        self.max_wait_seconds = max_wait_seconds
+        self.retention_seconds = retention_seconds
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-turn")
+        self._turns = {}  # id -> {"status", "text", "error", "started_at", "finished"}, turns started here
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._outcomes = {"done": 0, "failed": 0, "expired": 0, "rejected": 0}
+        self._polls = 0
+        self._buckets = [0] * len(LATENCY_BUCKETS_SECONDS)
+        self._latency_sum = 0.0
+        self._latency_count = 0
+
+    def start(self, fn, *args):
+        """Run fn(*args), which returns the reply text, and return the turn id."""
+        now = self.clock()
+        turn_id = f"{int(now * 1000):x}-{uuid.uuid4().hex}"
+        turn = {"status": "pending", "text": None, "error": None, "started_at": now,
+                "finished": threading.Event()}
+        with self._lock:
+            self._expire(now)
+            if self._pending >= self.max_pending:
+                self._outcomes["rejected"] += 1
+                raise AITurnsBusyError(f"{self._pending} AI turns are already pending")
+            self._pending += 1
+            self._turns[turn_id] = turn
+        self._executor.submit(self._run, turn_id, turn, fn, args)
+        return turn_id
+
+    def _run(self, turn_id, turn, fn, args):
+        try:
+            text, error = fn(*args), None
+        except Exception as e:
+            print(f"[ERROR] AI turn failed: {e}")
+            text, error = None, str(e)
+        self._publish(turn_id, text, error)
+        with self._lock:
+            self._pending -= 1
+            seconds = self.clock() - turn["started_at"]
+            for i, bound in enumerate(LATENCY_BUCKETS_SECONDS):
+                if seconds <= bound:
+                    self._buckets[i] += 1
+            self._latency_sum += seconds
+            self._latency_count += 1
+            if turn["status"] == "pending":
+                turn.update(status="failed" if error else "done", text=text, error=error)
+                self._outcomes[turn["status"]] += 1
+        turn["finished"].set()
+
+    def _publish(self, turn_id, text, error):
+        if self.store is None or not self.store.shared:
+            return
+        result = [("model", text)] if error is None else [("error", error)]
+        try:
+            self.store.save(AI_TURN_KEY_PREFIX + turn_id, result, 0)
+        except Exception as e:
+            print(f"[ERROR] Could not publish AI turn {turn_id}: {e}")
+
+    def get(self, turn_id):
+        """{"status", "text", "error"}, or None for an unknown or forgotten turn."""
+        with self._lock:
+            self._polls += 1
+            turn = self._turns.get(turn_id)
+            if turn is not None:
+                if turn["status"] == "pending" and self.clock() - turn["started_at"] >= self.max_wait_seconds:
+                    turn["status"] = "expired"
+                    self._outcomes["expired"] += 1
+                return {"status": turn["status"], "text": turn["text"], "error": turn["error"]}
+        return self._get_shared(turn_id)
+
+    def _get_shared(self, turn_id):
+        # A turn started on another instance: its result, if any, is in the shared store.
+        started_at = turn_started_at(turn_id)
+        if self.store is None or not self.store.shared or started_at is None:
+            return None
+        age = self.clock() - started_at
+        if age >= self.retention_seconds or age < -self.max_wait_seconds:
+            return None
+        messages, _ = self.store.load(AI_TURN_KEY_PREFIX + turn_id)
+        if messages:
+            role, text = messages[0]
+            if role == "error":
+                return {"status": "failed", "text": None, "error": text}
+            return {"status": "done", "text": text, "error": None}
+        return {"status": "expired" if age >= self.max_wait_seconds else "pending", "text": None, "error": None}
+
+    def _expire(self, now):
+        expired = [turn_id for turn_id, turn in self._turns.items()
+                   if turn["status"] != "pending" and now - turn["started_at"] >= self.retention_seconds]
+        for turn_id in expired:
+            del self._turns[turn_id]
+
+    def wait(self, turn_id, timeout=None):
+        """Block until the turn's work has finished (for tests and benchmarks)."""
+        with self._lock:
+            finished = self._turns[turn_id]["finished"]
+        return finished.wait(timeout)
+
+    def render_metrics(self, prefix="voice_ai_turn"):
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_total Background AI turns by outcome (expired = the caller "
+                "stopped waiting, rejected = too many turns pending).",
+                f"# TYPE {prefix}_total counter",
+            ]
+            for outcome, count in sorted(self._outcomes.items()):
+                lines.append(f'{prefix}_total{{outcome="{outcome}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_pending AI turns running or queued on this instance.",
+                f"# TYPE {prefix}_pending gauge",
+                f"{prefix}_pending {self._pending}",
+                f"# HELP {prefix}_polls_total Result polls answered.",
+                f"# TYPE {prefix}_polls_total counter",
+                f"{prefix}_polls_total {self._polls}",
+                f"# HELP {prefix}_seconds Time from the webhook to the finished reply.",
+                f"# TYPE {prefix}_seconds histogram",
+            ]
+            for bound, count in zip(LATENCY_BUCKETS_SECONDS, self._buckets):
+                lines.append(f'{prefix}_seconds_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{prefix}_seconds_bucket{{le="+Inf"}} {self._latency_count}')
+            lines.append(f"{prefix}_seconds_sum {self._latency_sum}")
+            lines.append(f"{prefix}_seconds_count {self._latency_count}")
+        return "\n".join(lines) + "\n"
@@ -5,6 +5,14 @@ PROJECT_ID=""       # GCP project ID
 SERVICE_NAME=""     # Cloud Run service name
 REGION="us-east1"
 
+# Twilio's /ai_result polls can reach any instance, so pending AI turns and
+# conversation history have to live in Redis. Without it, pin one instance.
+if [ -n "$SESSION_REDIS_URL" ]; then
+  SESSION_FLAGS=(--set-env-vars SESSION_BACKEND=redis --set-env-vars SESSION_REDIS_URL="$SESSION_REDIS_URL")
+else
+  SESSION_FLAGS=(--max-instances=1)
+fi
+
 gcloud run deploy $SERVICE_NAME \
   --source . \
   --platform managed \
@@ -14,6 +22,10 @@ gcloud run deploy $SERVICE_NAME \
   --set-env-vars TWILIO_ACCOUNT_SID="$TWILIO_ACCOUNT_SID" \
   --set-env-vars TWILIO_AUTH_TOKEN="$TWILIO_AUTH_TOKEN" \
   --set-env-vars CONTACT_PHONE="$CONTACT_PHONE" \
+  --set-env-vars AI_TURN_MODE=async \
+  --no-cpu-throttling \
+  --timeout=3600 \
+  "${SESSION_FLAGS[@]}" \
   --project $PROJECT_ID
 
 echo "Done. Update Twilio webhook to the service URL above."
@@ -1,12 +1,38 @@
 from flask import Flask, request, Response
+import json
 import os
+import threading
 import requests
 from google import genai
 from google.genai import types
 
+from ai_turns import AITurns, AITurnsBusyError
+from media_stream import MediaStreamSession
+from recordings import RecordingDownloader
+from sessions import SESSION_ERRORS, create_session_backend
+
+try:
+    from flask_sock import Sock
+except ImportError:  # only needed for AI_TURN_MODE=stream
+    Sock = None
+
 app = Flask(__name__)
 client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
-conversations = {}
+conversations = create_session_backend()
+recordings = RecordingDownloader(auth=(os.environ.get("TWILIO_ACCOUNT_SID"), os.environ.get("TWILIO_AUTH_TOKEN")))
+ai_turns = AITurns(store=conversations)  # finished turns are shared through the session backend
+# Live-call updates (stream replies and keypresses) by outcome; a failed update is logged and the stream kept open.
+call_updates = {"ok": 0, "failed": 0}
+call_updates_lock = threading.Lock()
+
+# sync: /ai answers with the reply, holding the webhook for the whole model call.
+# async: /ai answers at once with a hold prompt and Twilio polls /ai_result for the reply.
+# stream: the caller's audio arrives over the /media WebSocket and the reply starts
+#         as soon as they stop talking (needs flask-sock).
+AI_TURN_MODE = os.environ.get("AI_TURN_MODE", "sync")
+AI_RESULT_POLL_SECONDS = 1
+AI_ERROR = '<Response><Say>An error occurred.</Say><Redirect>/</Redirect></Response>'
+AI_BUSY = '<Response><Say>Our A I assistant is busy right now. Please try again shortly.</Say><Redirect>/</Redirect></Response>'
 
 SYSTEM_PROMPT = """You are Axiom LLC's AI assistant helping potential clients understand our services.
 
@@ -115,6 +141,11 @@ def route():
     <Redirect>/</Redirect>
 </Response>""", mimetype="text/xml")
 
+    elif digit == "8" and AI_TURN_MODE == "stream" and Sock is not None:
+        caller = request.form.get("From", "unknown")
+        return Response(connect_stream(caller, "Connecting to Axiom's A I assistant. Go ahead and speak.",
+                                       f"wss://{request.host}/media"), mimetype="text/xml")
+
     elif digit == "8":
         return Response("""<?xml version="1.0" encoding="UTF-8"?>
 <Response>
@@ -150,48 +181,180 @@ def ai_conversation():
     if not recording_url:
         return Response('<Response><Redirect>/</Redirect></Response>', mimetype="text/xml")
 
+    if AI_TURN_MODE == "async":
+        try:
+            turn_id = ai_turns.start(run_ai_turn, caller, recording_url)
+        except AITurnsBusyError as e:
+            print(f"[WARNING] {e}; turning away {caller}")
+            return Response(AI_BUSY, mimetype="text/xml")
+        return Response(f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say>One moment.</Say>
+    <Redirect>/ai_result?turn={turn_id}</Redirect>
+</Response>""", mimetype="text/xml")
+
     try:
-        audio = requests.get(
-            recording_url,
-            auth=(os.environ.get("TWILIO_ACCOUNT_SID"), os.environ.get("TWILIO_AUTH_TOKEN"))
-        )
-
-        if caller not in conversations:
-            conversations[caller] = []
-
-        contents = conversations[caller].copy()
-        contents.append(types.Content(
-            parts=[
-                types.Part.from_bytes(data=audio.content, mime_type="audio/wav"),
-                types.Part(text="Transcribe and respond conversationally.")
-            ],
-            role="user"
-        ))
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-lite",
-            contents=contents,
-            config=types.GenerateContentConfig(system_instruction=SYSTEM_PROMPT)
-        )
-
-        ai_text = response.text.strip()
-        conversations[caller].append(types.Content(parts=[types.Part(text=ai_text)], role="model"))
-
-        if len(conversations[caller]) > 20:
-            conversations[caller] = conversations[caller][-20:]
+        return Response(ai_reply(run_ai_turn(caller, recording_url)), mimetype="text/xml")
+    except Exception as e:
+        print(f"Error: {e}")
+        return Response(AI_ERROR, mimetype="text/xml")
+
+
+@app.route("/ai_result", methods=["POST"])
+def ai_result():
+    turn_id = request.args.get("turn", "")
+    turn = ai_turns.get(turn_id)
 
+    if turn is None or turn["status"] in ("failed", "expired"):
+        return Response(AI_ERROR, mimetype="text/xml")
+    if turn["status"] == "pending":
         return Response(f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Pause length="{AI_RESULT_POLL_SECONDS}"/>
+    <Redirect>/ai_result?turn={turn_id}</Redirect>
+</Response>""", mimetype="text/xml")
+    return Response(ai_reply(turn["text"]), mimetype="text/xml")
+
+
+def run_ai_turn(caller, recording_url):
+    """Download the caller's recording, ask Gemini, and store the reply. Returns the reply text."""
+    return answer_audio(caller, recordings.fetch(recording_url))
+
+
+def answer_audio(caller, audio):
+    """Ask Gemini to reply to the caller's WAV audio and store the reply. Returns the reply text."""
+    contents = [types.Content(parts=[types.Part(text=text)], role=role)
+                for role, text in conversations.history(caller)]
+    contents.append(types.Content(
+        parts=[
+            types.Part.from_bytes(data=audio, mime_type="audio/wav"),
+            types.Part(text="Transcribe and respond conversationally.")
+        ],
+        role="user"
+    ))
+
+    response = client.models.generate_content(
+        model="gemini-2.5-flash-lite",
+        contents=contents,
+        config=types.GenerateContentConfig(system_instruction=SYSTEM_PROMPT)
+    )
+
+    ai_text = response.text.strip()
+    try:
+        conversations.append(caller, "model", ai_text)
+    except SESSION_ERRORS as e:
+        # The caller still hears the reply; only the next turn loses it as context.
+        print(f"[WARNING] Could not save conversation history for {caller}: {e}")
+    return ai_text
+
+
+def ai_reply(ai_text):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
 <Response>
     <Say>{ai_text}</Say>
     <Say>Press star for main menu, press 9 to connect with our team, or continue speaking.</Say>
     <Gather action="/ai_nav" numDigits="1" timeout="2" finishOnKey="*9">
         <Record action="/ai" maxLength="30" playBeep="true"/>
     </Gather>
-</Response>""", mimetype="text/xml")
+</Response>"""
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return Response('<Response><Say>An error occurred.</Say><Redirect>/</Redirect></Response>', mimetype="text/xml")
+
+def transfer_to_team():
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say>Transferring you to our team now.</Say>
+    <Dial timeout="25" action="/voicemail">
+        <Number>{os.environ.get("CONTACT_PHONE")}</Number>
+    </Dial>
+</Response>"""
+
+
+def connect_stream(caller, say, stream_url):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    <Say>{say}</Say>
+    <Say>Press star for main menu, press 9 to connect with our team, or continue speaking.</Say>
+    <Connect>
+        <Stream url="{stream_url}">
+            <Parameter name="caller" value="{caller}"/>
+        </Stream>
+    </Connect>
+</Response>"""
+
+
+def run_stream_turn(caller, call_sid, audio, stream_url, resume=None):
+    """Answer an utterance from the media stream and play the reply by redirecting the live call
+    to TwiML that says it and reconnects the stream. Returns the reply text.
+
+    If the call cannot be updated, resume() is called so the open stream keeps listening."""
+    try:
+        ai_text = answer_audio(caller, audio)
+    except Exception:
+        if not update_call(call_sid, AI_ERROR) and resume is not None:
+            resume()
+        raise
+    if not update_call(call_sid, connect_stream(caller, ai_text, stream_url)) and resume is not None:
+        resume()
+    return ai_text
+
+
+def stream_keypress(call_sid, digit):
+    """The /ai_nav keys for a streaming call: star for the menu, 9 for the team. Updating the call ends the stream."""
+    if digit == "*":
+        update_call(call_sid, '<Response><Redirect>/</Redirect></Response>')
+    elif digit == "9":
+        update_call(call_sid, transfer_to_team())
+
+
+def update_call(call_sid, twiml):
+    """Redirect the live call to twiml. Returns False, after logging it, if Twilio could not be reached
+    or refused, so a failure never tears down the media stream the caller is on."""
+    # recordings.session is the pooled client already authenticated against the Twilio API.
+    url = f"https://api.twilio.com/2010-04-01/Accounts/{os.environ.get('TWILIO_ACCOUNT_SID')}/Calls/{call_sid}.json"
+    try:
+        recordings.session.post(url, data={"Twiml": twiml}, timeout=recordings.timeout).raise_for_status()
+        outcome = "ok"
+    except requests.RequestException as e:
+        print(f"[ERROR] Could not update call {call_sid}: {e}")
+        outcome = "failed"
+    with call_updates_lock:
+        call_updates[outcome] += 1
+    return outcome == "ok"
+
+
+def render_call_update_metrics(prefix="voice_call_update"):
+    with call_updates_lock:
+        lines = [
+            f"# HELP {prefix}_total Live-call updates through the Twilio API by outcome.",
+            f"# TYPE {prefix}_total counter",
+        ]
+        for outcome, count in sorted(call_updates.items()):
+            lines.append(f'{prefix}_total{{outcome="{outcome}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route("/media")
+    def media_stream(ws):
+        stream_url = f"wss://{request.host}/media"
+
+        def on_utterance(audio):
+            caller = session.parameters.get("caller", "unknown")
+            try:
+                ai_turns.start(run_stream_turn, caller, session.call_sid, audio, stream_url, session.resume)
+            except AITurnsBusyError as e:
+                print(f"[WARNING] {e}; turning away {caller}")
+                if not update_call(session.call_sid, AI_BUSY):
+                    session.resume()
+
+        session = MediaStreamSession(on_utterance, on_dtmf=lambda digit: stream_keypress(session.call_sid, digit))
+        while session.state != "closed":
+            message = ws.receive()
+            if message is None:
+                break
+            session.handle(json.loads(message))
 
 
 @app.route("/ai_nav", methods=["POST"])
@@ -200,16 +363,15 @@ def ai_nav():
     if digit == "*":
         return Response('<Response><Redirect>/</Redirect></Response>', mimetype="text/xml")
     elif digit == "9":
-        return Response(f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say>Transferring you to our team now.</Say>
-    <Dial timeout="25" action="/voicemail">
-        <Number>{os.environ.get("CONTACT_PHONE")}</Number>
-    </Dial>
-</Response>""", mimetype="text/xml")
+        return Response(transfer_to_team(), mimetype="text/xml")
     return ai_conversation()
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(conversations.render_metrics() + recordings.render_metrics() + ai_turns.render_metrics() + render_call_update_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/voicemail", methods=["POST"])
 def voicemail():
     if request.form.get("DialCallStatus") in ["no-answer", "busy", "failed"]:
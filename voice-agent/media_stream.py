@@ -0,0 +1,164 @@
+import base64
+import io
+import time
+import wave
+from array import array
+from collections import deque
+
+MEDIA_SAMPLE_RATE = 8000  # Twilio Media Streams: 8 kHz mono mu-law
+MEDIA_FRAME_MS = 20  # one Twilio media message
+MEDIA_VAD_RMS_THRESHOLD = 500  # minimum 16-bit RMS for a voiced frame
+MEDIA_VAD_NOISE_RATIO = 3.0  # ...and at least this many times the line's noise floor
+MEDIA_VAD_START_MS = 60  # voiced audio needed to start an utterance
+MEDIA_VAD_SILENCE_MS = 600  # silence that ends an utterance
+MEDIA_VAD_MIN_SPEECH_MS = 200  # shorter utterances are treated as clicks and dropped
+MEDIA_VAD_PRE_ROLL_MS = 200  # audio kept from before speech was detected
+MEDIA_MAX_UTTERANCE_SECONDS = 30  # same cap as the <Record maxLength> it replaces
+
+_ULAW_BIAS = 0x21  # on 14-bit samples; 0x84 on the 16-bit scale
+_ULAW_CLIP = 8159
+
+
+def _ulaw_to_linear(byte):
+    byte = ~byte & 0xFF
+    magnitude = ((((byte & 0x0F) << 3) + 0x84) << ((byte >> 4) & 0x07)) - 0x84
+    return -magnitude if byte & 0x80 else magnitude
+
+
+def _linear_to_ulaw(sample):
+    # G.711 on the top 14 bits, as audioop.lin2ulaw does.
+    sample >>= 2
+    mask = 0x7F if sample < 0 else 0xFF
+    magnitude = min(abs(sample), _ULAW_CLIP) + _ULAW_BIAS
+    exponent = max(magnitude.bit_length() - 6, 0)
+    if exponent > 7:  # only -32768, whose magnitude is still past the clip
+        return 0x7F ^ mask
+    return ((exponent << 4) | ((magnitude >> (exponent + 1)) & 0x0F)) ^ mask
+
+
+_ULAW_DECODE = [array("h", [_ulaw_to_linear(byte)]).tobytes() for byte in range(256)]
+
+
+def ulaw_decode(data):
+    """mu-law bytes -> 16-bit little-endian PCM bytes."""
+    return b"".join([_ULAW_DECODE[byte] for byte in data])
+
+
+def ulaw_encode(pcm):
+    """16-bit little-endian PCM bytes -> mu-law bytes."""
+    return bytes(_linear_to_ulaw(sample) for sample in array("h", pcm))
+
+
+def frame_rms(pcm):
+    samples = array("h", pcm)
+    return (sum(sample * sample for sample in samples) / len(samples)) ** 0.5 if samples else 0.0
+
+
+def pcm_to_wav(pcm, sample_rate=MEDIA_SAMPLE_RATE):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class MediaStreamSession:
+    """One Twilio Media Streams connection, with energy-based end-of-speech detection.
+
+    handle() takes each decoded JSON message from the WebSocket. Media frames
+    are decoded from mu-law and classed as voiced when their RMS clears both
+    `threshold` and MEDIA_VAD_NOISE_RATIO times the line's noise floor, which
+    is tracked while the caller is quiet. An utterance starts after
+    MEDIA_VAD_START_MS of voiced audio (keeping MEDIA_VAD_PRE_ROLL_MS from
+    before it) and ends after MEDIA_VAD_SILENCE_MS of silence, or at
+    MEDIA_MAX_UTTERANCE_SECONDS. `on_utterance(wav_bytes)` is then called with
+    the audio, and the session ignores audio until resume() or the end of the
+    stream. `speech_ended_at` is the clock time of the last voiced frame.
+    Keypresses arrive as dtmf messages and are passed to `on_dtmf(digit)`
+    whatever the state.
+    """
+
+    def __init__(self, on_utterance, threshold=MEDIA_VAD_RMS_THRESHOLD, silence_ms=MEDIA_VAD_SILENCE_MS,
+                 clock=time.monotonic, on_dtmf=None):
+        self.on_utterance = on_utterance
+        self.on_dtmf = on_dtmf
+        self.threshold = threshold
+        self.clock = clock
+        self.stream_sid = None
+        self.call_sid = None
+        self.parameters = {}
+        self.state = "listening"  # listening | speaking | responding | closed
+        self.noise_floor = threshold / MEDIA_VAD_NOISE_RATIO
+        self.speech_ended_at = None
+        self.utterances = 0
+        self.dropped = 0  # voiced blips too short to be speech
+        self._start_frames = MEDIA_VAD_START_MS // MEDIA_FRAME_MS
+        self._silence_frames = silence_ms // MEDIA_FRAME_MS
+        self._min_speech_frames = MEDIA_VAD_MIN_SPEECH_MS // MEDIA_FRAME_MS
+        self._max_frames = MEDIA_MAX_UTTERANCE_SECONDS * 1000 // MEDIA_FRAME_MS
+        self._pre_roll = deque(maxlen=MEDIA_VAD_PRE_ROLL_MS // MEDIA_FRAME_MS)
+        self._frames = []
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._speech_frames = 0
+
+    def handle(self, message):
+        event = message.get("event")
+        if event == "start":
+            start = message.get("start", {})
+            self.stream_sid = start.get("streamSid")
+            self.call_sid = start.get("callSid")
+            self.parameters = start.get("customParameters", {})
+        elif event == "media" and self.state in ("listening", "speaking"):
+            self._frame(ulaw_decode(base64.b64decode(message["media"]["payload"])))
+        elif event == "dtmf" and self.on_dtmf is not None:
+            self.on_dtmf(message.get("dtmf", {}).get("digit"))
+        elif event == "stop":
+            self.state = "closed"
+
+    def resume(self):
+        """Listen for the next utterance after a reply has been played."""
+        if self.state == "responding":
+            self.state = "listening"
+
+    def _frame(self, pcm):
+        rms = frame_rms(pcm)
+        voiced = rms >= max(self.threshold, self.noise_floor * MEDIA_VAD_NOISE_RATIO)
+        if self.state == "listening":
+            self._pre_roll.append(pcm)
+            if not voiced:
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self._start_frames:
+                self.state = "speaking"
+                self._frames = list(self._pre_roll)
+                self._pre_roll.clear()
+                self._speech_frames = self._voiced_run
+                self._silent_run = 0
+                self.speech_ended_at = self.clock()
+            return
+
+        self._frames.append(pcm)
+        if voiced:
+            self._speech_frames += 1
+            self._silent_run = 0
+            self.speech_ended_at = self.clock()
+        else:
+            self._silent_run += 1
+        if self._silent_run >= self._silence_frames or len(self._frames) >= self._max_frames:
+            self._end_utterance()
+
+    def _end_utterance(self):
+        # Keep a little of the trailing silence, like the pre-roll, so the last syllable is not clipped.
+        frames = self._frames[:len(self._frames) - max(self._silent_run - self._pre_roll.maxlen, 0)]
+        self._frames = []
+        self._voiced_run = 0
+        if self._speech_frames < self._min_speech_frames:
+            self.dropped += 1
+            self.state = "listening"
+            return
+        self.utterances += 1
+        self.state = "responding"
+        self.on_utterance(pcm_to_wav(b"".join(frames)))
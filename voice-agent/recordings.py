@@ -0,0 +1,135 @@
+import threading
+import time
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+RECORDING_TIMEOUT = (2.0, 5.0)  # (connect, read) seconds
+RECORDING_DEADLINE_SECONDS = 8.0  # whole download, retries included; Twilio gives the webhook 15 s
+RECORDING_MAX_BYTES = 2 * 2**20  # a 30 s recording is ~480 KB of 8 kHz 16-bit WAV
+RECORDING_CHUNK_BYTES = 16 * 1024  # the deadline is checked between chunks
+RECORDING_POOL_SIZE = 8  # one per gunicorn thread
+RECORDING_NOT_READY_RETRIES = 3
+RECORDING_NOT_READY_BACKOFF_SECONDS = 0.25
+LATENCY_BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+
+
+class RecordingError(Exception):
+    def __init__(self, message, outcome="error"):
+        super().__init__(message)
+        self.outcome = outcome  # metrics label: error, too_large or timeout
+
+
+class RecordingDownloader:
+    """Shared keep-alive client for Twilio recording downloads.
+
+    Bodies are streamed in chunks and the download is abandoned once it passes
+    `max_bytes` or `deadline_seconds`, so a slow or oversized recording cannot
+    hold a worker past the webhook's budget. Twilio can answer 404 for a moment
+    after the recording callback while the file is being stored; those are
+    retried with exponential backoff. Failures raise RecordingError. Outcomes
+    and latency are rendered by render_metrics() in the Prometheus text format.
+    """
+
+    def __init__(self, auth=None, timeout=RECORDING_TIMEOUT, deadline_seconds=RECORDING_DEADLINE_SECONDS,
+                 max_bytes=RECORDING_MAX_BYTES, pool_size=RECORDING_POOL_SIZE,
+                 not_ready_retries=RECORDING_NOT_READY_RETRIES, backoff=RECORDING_NOT_READY_BACKOFF_SECONDS):
+        self.timeout = timeout
+        self.deadline_seconds = deadline_seconds
+        self.max_bytes = max_bytes
+        self.not_ready_retries = not_ready_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.auth = auth
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self._outcomes = {"ok": 0, "not_ready_retry": 0, "error": 0, "too_large": 0, "timeout": 0}
+        self._buckets = [0] * len(LATENCY_BUCKETS_SECONDS)
+        self._latency_sum = 0.0
+        self._latency_count = 0
+
+    def fetch(self, url):
+        """The recording's bytes."""
+        start = time.monotonic()
+        deadline = start + self.deadline_seconds
+        try:
+            for attempt in range(self.not_ready_retries + 1):
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    if response.status_code == 404 and attempt < self.not_ready_retries:
+                        delay = self.backoff * 2 ** attempt
+                        if time.monotonic() + delay >= deadline:
+                            raise RecordingError(f"Recording still not available after {attempt + 1} tries")
+                        self._count("not_ready_retry")
+                        response.content  # drain the error body so the connection goes back to the pool
+                        time.sleep(delay)
+                        continue
+                    response.raise_for_status()
+                    audio = self._read(response, deadline)
+                    self._observe("ok", time.monotonic() - start)
+                    return audio
+        except RecordingError as e:
+            self._observe(e.outcome, time.monotonic() - start)
+            raise
+        except requests.exceptions.Timeout as e:
+            self._observe("timeout", time.monotonic() - start)
+            raise RecordingError(f"Recording download timed out: {e}", "timeout") from e
+        except requests.exceptions.RequestException as e:
+            self._observe("error", time.monotonic() - start)
+            raise RecordingError(f"Recording download failed: {e}") from e
+
+    def _read(self, response, deadline):
+        declared = response.headers.get("Content-Length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            raise RecordingError(f"Recording is {declared} bytes; the limit is {self.max_bytes}", "too_large")
+        chunks, size = [], 0
+        try:
+            for chunk in response.iter_content(RECORDING_CHUNK_BYTES):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise RecordingError(f"Recording exceeded {self.max_bytes} bytes", "too_large")
+                if time.monotonic() > deadline:
+                    raise RecordingError(f"Recording download passed the {self.deadline_seconds} s deadline",
+                                         "timeout")
+                chunks.append(chunk)
+        except requests.exceptions.ConnectionError as e:
+            # requests reports a read timeout in the middle of the body as a ConnectionError.
+            if isinstance(e.args[0] if e.args else None, urllib3.exceptions.ReadTimeoutError):
+                raise RecordingError(f"Recording download stalled: {e}", "timeout") from e
+            raise
+        return b"".join(chunks)
+
+    def _count(self, outcome):
+        with self._lock:
+            self._outcomes[outcome] += 1
+
+    def _observe(self, outcome, seconds):
+        with self._lock:
+            self._outcomes[outcome] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS_SECONDS):
+                if seconds <= bound:
+                    self._buckets[i] += 1
+            self._latency_sum += seconds
+            self._latency_count += 1
+
+    def render_metrics(self, prefix="voice_recording_download"):
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_total Recording downloads by outcome (not_ready_retry = "
+                "404 retried while Twilio stores the file).",
+                f"# TYPE {prefix}_total counter",
+            ]
+            for outcome, count in sorted(self._outcomes.items()):
+                lines.append(f'{prefix}_total{{outcome="{outcome}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_seconds Time to download a recording, retries included.",
+                f"# TYPE {prefix}_seconds histogram",
+            ]
+            for bound, count in zip(LATENCY_BUCKETS_SECONDS, self._buckets):
+                lines.append(f'{prefix}_seconds_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{prefix}_seconds_bucket{{le="+Inf"}} {self._latency_count}')
+            lines.append(f"{prefix}_seconds_sum {self._latency_sum}")
+            lines.append(f"{prefix}_seconds_count {self._latency_count}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,392 @@
+import abc
+import json
+import os
+import random
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")  # memory | sqlite | redis
+SESSION_SQLITE_PATH = os.environ.get("SESSION_SQLITE_PATH", "voice_sessions.db")
+SESSION_REDIS_URL = os.environ.get("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_MAX_MESSAGES = 20
+SESSION_IDLE_TTL_SECONDS = int(os.environ.get("SESSION_IDLE_TTL_SECONDS", 30 * 60))
+SESSION_MEMORY_BUDGET_BYTES = int(os.environ.get("SESSION_MEMORY_BUDGET_BYTES", 64 * 2**20))
+SESSION_SAVE_RETRIES = 5
+SESSION_RETRY_BACKOFF_SECONDS = 0.005
+SESSION_COMPRESS_MIN_BYTES = 512
+SESSION_SQLITE_PURGE_EVERY = 500  # saves between deletes of expired SQLite sessions
+SESSION_REDIS_TIMEOUT_SECONDS = 2.0
+
+ROLE_CODES = {"user": "u", "model": "m"}
+ROLES = {code: role for role, code in ROLE_CODES.items()}
+
+
+class SessionConflictError(Exception):
+    pass
+
+
+def message_bytes(role, text):
+    # What a message actually costs in the store: the text object plus its tuple.
+    # role is one of a few interned literals and is not counted.
+    return sys.getsizeof(text) + sys.getsizeof((role, text))
+
+
+def encode_history(messages):
+    """Compact bytes for a list of (role, text): one-letter roles in minimal
+    JSON, zlib-compressed past SESSION_COMPRESS_MIN_BYTES. The first byte says
+    which ("j" plain, "z" compressed)."""
+    raw = json.dumps([[ROLE_CODES.get(role, role), text] for role, text in messages],
+                     separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) >= SESSION_COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(raw)
+    return b"j" + raw
+
+
+def decode_history(data):
+    raw = zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+    return [(ROLES.get(role, role), text) for role, text in json.loads(raw)]
+
+
+class SessionBackend(abc.ABC):
+    """Per-caller conversation history with optimistic concurrency.
+
+    Backends implement load(caller) -> (messages, version) and
+    save(caller, messages, expected_version) -> bool, where save only succeeds
+    if the stored version still equals expected_version (0 = no session yet).
+    append() retries load/modify/save on conflict, so two workers answering
+    the same caller at once never lose each other's messages.
+    """
+
+    max_messages = SESSION_MAX_MESSAGES
+    shared = False  # True if other processes see the same sessions
+
+    def __init__(self):
+        self.stats = {"saves": 0, "conflicts": 0}
+        self._stats_lock = threading.Lock()
+
+    @abc.abstractmethod
+    def load(self, caller):
+        """(messages, version) for the caller; ([], 0) if there is no session."""
+
+    @abc.abstractmethod
+    def save(self, caller, messages, expected_version):
+        """Store messages if the session is still at expected_version; True on success."""
+
+    def history(self, caller):
+        """The caller's messages, oldest first, as (role, text) tuples."""
+        return self.load(caller)[0]
+
+    def append(self, caller, role, text):
+        for attempt in range(SESSION_SAVE_RETRIES):
+            messages, version = self.load(caller)
+            messages = (messages + [(role, text)])[-self.max_messages:]
+            saved = self.save(caller, messages, version)
+            with self._stats_lock:
+                self.stats["saves" if saved else "conflicts"] += 1
+            if saved:
+                return
+            # Jittered backoff so writers racing on one caller stop colliding in lockstep.
+            time.sleep(random.uniform(0, SESSION_RETRY_BACKOFF_SECONDS * 2 ** attempt))
+        raise SessionConflictError(f"Session for {caller} kept changing; gave up after {SESSION_SAVE_RETRIES} tries")
+
+    def render_metrics(self, prefix="voice_sessions"):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return "\n".join([
+            f"# HELP {prefix}_saves_total Conversation updates written.",
+            f"# TYPE {prefix}_saves_total counter",
+            f"{prefix}_saves_total {stats['saves']}",
+            f"# HELP {prefix}_conflicts_total Updates retried because another worker changed the session first.",
+            f"# TYPE {prefix}_conflicts_total counter",
+            f"{prefix}_conflicts_total {stats['conflicts']}",
+        ]) + "\n"
+
+
+class ConversationStore(SessionBackend):
+    """In-process backend with idle-TTL and LRU eviction (the default).
+
+    Messages are kept as (role, text) tuples of plain strings. Sessions are
+    ordered by last use, so the least recently used session is always first:
+    idle sessions are dropped from the front once they have been idle for
+    `idle_ttl_seconds`, and more are dropped while the bytes held exceed
+    `memory_budget_bytes`. Eviction runs on every write. Each process has its
+    own store, so use the sqlite or redis backend with more than one worker.
+    """
+
+    def __init__(self, max_messages=SESSION_MAX_MESSAGES, idle_ttl_seconds=SESSION_IDLE_TTL_SECONDS,
+                 memory_budget_bytes=SESSION_MEMORY_BUDGET_BYTES, clock=time.monotonic):
+        super().__init__()
+        self.max_messages = max_messages
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.memory_budget_bytes = memory_budget_bytes
+        self.clock = clock
+        self.bytes_held = 0
+        self.evictions = {"idle": 0, "memory": 0}
+        self._sessions = OrderedDict()  # caller -> [last_used, bytes, [(role, text), ...], version]
+        self._lock = threading.Lock()
+
+    def load(self, caller):
+        with self._lock:
+            session = self._sessions.get(caller)
+            if session is None:
+                return [], 0
+            if self.clock() - session[0] >= self.idle_ttl_seconds:
+                self._drop(caller, "idle")
+                return [], 0
+            return list(session[2]), session[3]
+
+    def save(self, caller, messages, expected_version):
+        now = self.clock()
+        with self._lock:
+            session = self._sessions.get(caller)
+            if (session[3] if session is not None else 0) != expected_version:
+                return False
+            size = sys.getsizeof(caller) + sum(message_bytes(role, text) for role, text in messages)
+            if session is not None:
+                self.bytes_held -= session[1]
+            self._sessions[caller] = [now, size, list(messages), expected_version + 1]
+            self.bytes_held += size
+            self._sessions.move_to_end(caller)
+            self._evict(now)
+            return True
+
+    def _evict(self, now):
+        while self._sessions:
+            caller, session = next(iter(self._sessions.items()))
+            if now - session[0] >= self.idle_ttl_seconds:
+                self._drop(caller, "idle")
+            elif self.bytes_held > self.memory_budget_bytes and len(self._sessions) > 1:
+                self._drop(caller, "memory")
+            else:
+                return
+
+    def _drop(self, caller, reason):
+        self.bytes_held -= self._sessions.pop(caller)[1]
+        self.evictions[reason] += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def render_metrics(self, prefix="voice_sessions"):
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_active Conversations held in memory.",
+                f"# TYPE {prefix}_active gauge",
+                f"{prefix}_active {len(self._sessions)}",
+                f"# HELP {prefix}_bytes Approximate bytes held by conversation history.",
+                f"# TYPE {prefix}_bytes gauge",
+                f"{prefix}_bytes {self.bytes_held}",
+                f"# HELP {prefix}_evictions_total Conversations dropped, by reason "
+                "(idle = past the idle TTL, memory = least recently used over the memory budget).",
+                f"# TYPE {prefix}_evictions_total counter",
+            ]
+            for reason, count in sorted(self.evictions.items()):
+                lines.append(f'{prefix}_evictions_total{{reason="{reason}"}} {count}')
+        return "\n".join(lines) + "\n" + super().render_metrics(prefix)
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Sessions in a SQLite file in WAL mode, shared by every worker on the host.
+
+    Each thread has its own autocommit connection. save() is a single
+    UPDATE ... WHERE version = ?, so the version check and the write are
+    atomic. Sessions idle past `idle_ttl_seconds` read as empty and are
+    deleted every SESSION_SQLITE_PURGE_EVERY saves.
+    """
+
+    shared = True
+
+    def __init__(self, path=SESSION_SQLITE_PATH, idle_ttl_seconds=SESSION_IDLE_TTL_SECONDS, clock=time.time):
+        super().__init__()
+        self.path = path
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.clock = clock
+        self._local = threading.local()
+        self._saves_since_purge = 0
+        self._connection().execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            caller TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at REAL NOT NULL,
+            history BLOB NOT NULL
+        )
+        ''')
+        self._connection().execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, caller):
+        row = self._connection().execute(
+            "SELECT version, updated_at, history FROM sessions WHERE caller = ?", (caller,)).fetchone()
+        if row is None:
+            return [], 0
+        version, updated_at, history = row
+        if self.clock() - updated_at >= self.idle_ttl_seconds:
+            # Keep the version so a save still has to match the stored row.
+            return [], version
+        return decode_history(history), version
+
+    def save(self, caller, messages, expected_version):
+        conn = self._connection()
+        now = self.clock()
+        blob = encode_history(messages)
+        if expected_version == 0:
+            saved = conn.execute(
+                "INSERT OR IGNORE INTO sessions (caller, version, updated_at, history) VALUES (?, 1, ?, ?)",
+                (caller, now, blob)).rowcount == 1
+        else:
+            saved = conn.execute(
+                "UPDATE sessions SET version = version + 1, updated_at = ?, history = ? "
+                "WHERE caller = ? AND version = ?", (now, blob, caller, expected_version)).rowcount == 1
+        if saved:
+            with self._stats_lock:
+                self._saves_since_purge += 1
+                purge = self._saves_since_purge >= SESSION_SQLITE_PURGE_EVERY
+                if purge:
+                    self._saves_since_purge = 0
+            if purge:
+                conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.idle_ttl_seconds,))
+        return saved
+
+
+class RedisError(Exception):
+    pass
+
+
+# What a failed history read or write can raise, whichever backend is in use.
+SESSION_ERRORS = (SessionConflictError, RedisError, sqlite3.Error, OSError)
+
+
+class RespConnection:
+    """Minimal Redis protocol (RESP2) client: enough for the session backend."""
+
+    def __init__(self, host, port, db=0, password=None, timeout=SESSION_REDIS_TIMEOUT_SECONDS):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rb")
+        if password:
+            self.command("AUTH", password)
+        if db:
+            self.command("SELECT", db)
+
+    def command(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+        return self._read()
+
+    def _read(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Redis closed the connection")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.file.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+class RedisSessionBackend(SessionBackend):
+    """Sessions in Redis, shared by every worker and instance.
+
+    Each session is a hash {v: version, h: encoded history} that Redis expires
+    after `idle_ttl_seconds`. save() is WATCH / version check / MULTI / EXEC,
+    so a concurrent write to the same caller aborts the transaction. Each
+    thread keeps its own connection, because WATCH state is per connection.
+    """
+
+    shared = True
+
+    def __init__(self, url=SESSION_REDIS_URL, idle_ttl_seconds=SESSION_IDLE_TTL_SECONDS, key_prefix="voice:session:"):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.key_prefix = key_prefix
+        self._local = threading.local()
+
+    def _call(self, operation):
+        # One reconnect on a dropped connection; Redis errors propagate.
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = RespConnection(self.host, self.port, self.db, self.password)
+            try:
+                return operation(conn)
+            except (OSError, ConnectionError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+            except RedisError:
+                # The connection may be left mid-transaction; start the next call on a fresh one.
+                conn.close()
+                self._local.conn = None
+                raise
+
+    def load(self, caller):
+        version, history = self._call(lambda conn: conn.command("HMGET", self.key_prefix + caller, "v", "h"))
+        if version is None:
+            return [], 0
+        return decode_history(history), int(version)
+
+    def save(self, caller, messages, expected_version):
+        key = self.key_prefix + caller
+        blob = encode_history(messages)
+
+        def transaction(conn):
+            conn.command("WATCH", key)
+            current = conn.command("HGET", key, "v")
+            if int(current or 0) != expected_version:
+                conn.command("UNWATCH")
+                return False
+            conn.command("MULTI")
+            conn.command("HSET", key, "v", expected_version + 1, "h", blob)
+            conn.command("EXPIRE", key, self.idle_ttl_seconds)
+            return conn.command("EXEC") is not None
+
+        return self._call(transaction)
+
+
+def create_session_backend(name=None):
+    name = name or SESSION_BACKEND
+    if name == "memory":
+        return ConversationStore()
+    if name == "sqlite":
+        return SQLiteSessionBackend(SESSION_SQLITE_PATH)
+    if name == "redis":
+        return RedisSessionBackend(SESSION_REDIS_URL)
+    raise ValueError(f"Unknown SESSION_BACKEND {name!r}; expected memory, sqlite or redis")
@@ -0,0 +1,124 @@
+"""Simulated Twilio Media Streams client for testing end-of-speech detection.
+
+Replays a WAV file into a MediaStreamSession as the JSON messages Twilio would
+send (connected, start, one media message per 20 ms of mu-law audio, stop)
+and reports, for each utterance, the end-of-speech-to-response latency: the
+VAD's silence hangover plus the time `respond(wav_bytes)` takes. Stream time
+is simulated, so a long call replays in well under its own length; only
+respond() runs in real time.
+
+Usage: python stream_replay.py CALL.wav [MODEL_SECONDS]
+       python stream_replay.py --synthesize CALL.wav   (writes a test call)
+"""
+import base64
+import io
+import math
+import random
+import sys
+import time
+import wave
+from array import array
+
+from media_stream import MEDIA_FRAME_MS, MEDIA_SAMPLE_RATE, MediaStreamSession, ulaw_encode
+
+FRAME_SAMPLES = MEDIA_SAMPLE_RATE * MEDIA_FRAME_MS // 1000
+
+
+def wav_frames(path):
+    """The WAV as mu-law Media Streams payloads, resampled to 8 kHz mono."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        samples = array("h", wav.readframes(wav.getnframes()))
+    if channels > 1:
+        samples = samples[::channels]
+    if rate != MEDIA_SAMPLE_RATE:
+        step = rate / MEDIA_SAMPLE_RATE
+        samples = array("h", (samples[int(i * step)] for i in range(int(len(samples) / step))))
+    pcm = samples.tobytes()
+    frame_bytes = FRAME_SAMPLES * 2
+    return [ulaw_encode(pcm[i:i + frame_bytes]) for i in range(0, len(pcm) - frame_bytes + 1, frame_bytes)]
+
+
+def media_messages(frames, call_sid="CA00000000000000000000000000000000", caller="+15550000000"):
+    stream_sid = "MZ" + call_sid[2:]
+    yield {"event": "connected", "protocol": "Call", "version": "1.0.0"}
+    yield {"event": "start", "sequenceNumber": "1", "streamSid": stream_sid,
+           "start": {"streamSid": stream_sid, "callSid": call_sid, "tracks": ["inbound"],
+                     "customParameters": {"caller": caller},
+                     "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": MEDIA_SAMPLE_RATE, "channels": 1}}}
+    for i, payload in enumerate(frames):
+        yield {"event": "media", "sequenceNumber": str(i + 2), "streamSid": stream_sid,
+               "media": {"track": "inbound", "chunk": str(i + 1), "timestamp": str(i * MEDIA_FRAME_MS),
+                         "payload": base64.b64encode(payload).decode()}}
+    yield {"event": "stop", "sequenceNumber": str(len(frames) + 2), "streamSid": stream_sid,
+           "stop": {"callSid": call_sid}}
+
+
+def replay(path, respond, **session_options):
+    """[{"audio_seconds", "hangover_seconds", "response_seconds", "latency_seconds"}, ...], one per utterance."""
+    stream_time = [0.0]
+    turns = []
+
+    def on_utterance(wav_bytes):
+        hangover = stream_time[0] - session.speech_ended_at
+        start = time.perf_counter()
+        respond(wav_bytes)
+        response = time.perf_counter() - start
+        with wave.open(io.BytesIO(wav_bytes), "rb") as wav:
+            audio_seconds = wav.getnframes() / wav.getframerate()
+        turns.append({"audio_seconds": audio_seconds, "hangover_seconds": hangover,
+                      "response_seconds": response, "latency_seconds": hangover + response})
+        session.resume()
+
+    session = MediaStreamSession(on_utterance, clock=lambda: stream_time[0], **session_options)
+    for message in media_messages(wav_frames(path)):
+        if message["event"] == "media":
+            stream_time[0] += MEDIA_FRAME_MS / 1000
+        session.handle(message)
+    return turns
+
+
+def synthesize_call(path, utterances=((1.5, 1.0), (3.0, 1.5), (0.8, 1.0)), noise_rms=120, seed=1):
+    """Write a test call: line noise throughout, with voiced, syllable-modulated
+    harmonics for each (speech seconds, following silence seconds)."""
+    rng = random.Random(seed)
+    samples = array("h")
+
+    def noise():
+        return rng.gauss(0, noise_rms)
+
+    for _ in range(int(0.5 * MEDIA_SAMPLE_RATE)):
+        samples.append(int(noise()))
+    for speech, silence in utterances:
+        pitch = rng.uniform(110, 220)
+        for n in range(int(speech * MEDIA_SAMPLE_RATE)):
+            t = n / MEDIA_SAMPLE_RATE
+            envelope = 0.55 + 0.45 * math.sin(2 * math.pi * 4 * t)  # ~4 syllables a second
+            voice = sum(math.sin(2 * math.pi * pitch * k * t) / k for k in range(1, 5))
+            samples.append(max(-32768, min(32767, int(5000 * envelope * voice + noise()))))
+        for _ in range(int(silence * MEDIA_SAMPLE_RATE)):
+            samples.append(int(noise()))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(MEDIA_SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+
+def main(args):
+    if args[:1] == ["--synthesize"]:
+        synthesize_call(args[1])
+        print(f"Wrote {args[1]}")
+        return
+    model_seconds = float(args[1]) if len(args) > 1 else 0.0
+    turns = replay(args[0], lambda wav: time.sleep(model_seconds))
+    print(f"{'turn':>4} {'audio (s)':>10} {'hangover (ms)':>14} {'response (ms)':>14} {'latency (ms)':>13}")
+    for i, turn in enumerate(turns, 1):
+        print(f"{i:>4} {turn['audio_seconds']:>10.2f} {turn['hangover_seconds'] * 1000:>14.0f} "
+              f"{turn['response_seconds'] * 1000:>14.0f} {turn['latency_seconds'] * 1000:>13.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])